@@ -205,7 +205,7 @@ abstract contract BaseStrategy {
      * @return A string which holds the current API version of this contract.
      */
     function apiVersion() public pure returns (string memory) {
-        return "0.4.6";
+        return "0.4.7";
     }
 
     /**
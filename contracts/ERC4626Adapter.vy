@@ -0,0 +1,331 @@
+# @version 0.3.10
+"""
+@title ERC-4626 Adapter
+@license GNU AGPLv3
+@author yearn.finance
+@notice
+    Wraps the shares of a Vault in an ERC-4626 token, so they plug into the
+    tooling built for that standard. Each share of this adapter is backed by
+    exactly one share of the Vault, which the adapter holds.
+
+    Every quote comes from the Vault's own `preview*` and `max*` views, so it
+    accounts for the locked profit and the withdrawal queue as the Vault does.
+    Like the Vault, a Strategy may realize a loss when it is withdrawn from:
+    `redeem` accepts up to `MAX_LOSS` of it, `withdraw` none (it either returns
+    `assets` or fails).
+"""
+from vyper.interfaces import ERC20
+from vyper.interfaces import ERC4626
+
+implements: ERC20
+implements: ERC4626
+
+API_VERSION: constant(String[28]) = "0.1.0"
+
+MAX_LOSS: constant(uint256) = 1  # 0.01% [BPS], same as `Vault.withdraw`
+
+
+interface Vault:
+    def token() -> address: view
+    def decimals() -> uint256: view
+    def balanceOf(account: address) -> uint256: view
+    def previewDeposit(amount: uint256) -> uint256: view
+    def previewRedeem(shares: uint256) -> uint256: view
+    def previewWithdraw(amount: uint256) -> uint256: view
+    def maxDeposit(receiver: address) -> uint256: view
+    def maxWithdraw(owner: address) -> uint256: view
+    def deposit(amount: uint256, recipient: address) -> uint256: nonpayable
+    def withdraw(maxShares: uint256, recipient: address, maxLoss: uint256) -> uint256: nonpayable
+
+
+event Transfer:
+    sender: indexed(address)
+    receiver: indexed(address)
+    value: uint256
+
+
+event Approval:
+    owner: indexed(address)
+    spender: indexed(address)
+    value: uint256
+
+
+event Deposit:
+    sender: indexed(address)
+    owner: indexed(address)
+    assets: uint256
+    shares: uint256
+
+
+event Withdraw:
+    sender: indexed(address)
+    receiver: indexed(address)
+    owner: indexed(address)
+    assets: uint256
+    shares: uint256
+
+
+vault: public(immutable(Vault))
+asset: public(immutable(address))
+
+name: public(String[64])
+symbol: public(String[32])
+decimals: public(uint8)
+
+balanceOf: public(HashMap[address, uint256])
+allowance: public(HashMap[address, HashMap[address, uint256]])
+totalSupply: public(uint256)
+
+
+@external
+def __init__(_vault: address, _name: String[64], _symbol: String[32]):
+    """
+    @notice Deploys an adapter for the shares of `_vault`.
+    @param _vault The Vault to wrap.
+    @param _name The name of the adapter's token.
+    @param _symbol The symbol of the adapter's token.
+    """
+    vault = Vault(_vault)
+    asset = Vault(_vault).token()
+    self.name = _name
+    self.symbol = _symbol
+    self.decimals = convert(Vault(_vault).decimals(), uint8)
+
+    # NOTE: The Vault is trusted to only pull what `deposit` asks it to
+    assert ERC20(asset).approve(_vault, max_value(uint256), default_return_value=True)
+
+
+@pure
+@external
+def apiVersion() -> String[28]:
+    """
+    @notice Used to track the deployed version of this contract.
+    @return API_VERSION which holds the current version of this contract.
+    """
+    return API_VERSION
+
+
+@internal
+def _transfer(sender: address, receiver: address, amount: uint256):
+    assert receiver not in [self, empty(address)]
+    self.balanceOf[sender] -= amount
+    self.balanceOf[receiver] += amount
+    log Transfer(sender, receiver, amount)
+
+
+@external
+def transfer(receiver: address, amount: uint256) -> bool:
+    self._transfer(msg.sender, receiver, amount)
+    return True
+
+
+@external
+def transferFrom(sender: address, receiver: address, amount: uint256) -> bool:
+    self._spendAllowance(sender, msg.sender, amount)
+    self._transfer(sender, receiver, amount)
+    return True
+
+
+@external
+def approve(spender: address, amount: uint256) -> bool:
+    self.allowance[msg.sender][spender] = amount
+    log Approval(msg.sender, spender, amount)
+    return True
+
+
+@internal
+def _spendAllowance(owner: address, spender: address, amount: uint256):
+    if owner == spender:
+        return
+
+    allowance: uint256 = self.allowance[owner][spender]
+    # NOTE: An unlimited approval is never spent
+    if allowance != max_value(uint256):
+        self.allowance[owner][spender] = allowance - amount
+        log Approval(owner, spender, allowance - amount)
+
+
+@view
+@external
+def totalAssets() -> uint256:
+    return vault.previewRedeem(vault.balanceOf(self))
+
+
+@view
+@external
+def convertToShares(assetAmount: uint256) -> uint256:
+    return vault.previewDeposit(assetAmount)
+
+
+@view
+@external
+def convertToAssets(shareAmount: uint256) -> uint256:
+    return vault.previewRedeem(shareAmount)
+
+
+@view
+@external
+def maxDeposit(owner: address) -> uint256:
+    return vault.maxDeposit(self)
+
+
+@view
+@external
+def previewDeposit(assets: uint256) -> uint256:
+    return vault.previewDeposit(assets)
+
+
+@view
+@internal
+def _previewMint(shares: uint256) -> uint256:
+    # NOTE: The least `assets` that `deposit` issues `shares` for, the Vault rounds
+    #       down both ways so it's either what `shares` are worth or one more
+    assets: uint256 = vault.previewRedeem(shares)
+    if vault.previewDeposit(assets) < shares:
+        assets += 1
+    return assets
+
+
+@view
+@external
+def maxMint(owner: address) -> uint256:
+    return vault.previewDeposit(vault.maxDeposit(self))
+
+
+@view
+@external
+def previewMint(shares: uint256) -> uint256:
+    return self._previewMint(shares)
+
+
+@view
+@external
+def maxWithdraw(owner: address) -> uint256:
+    return min(vault.previewRedeem(self.balanceOf[owner]), vault.maxWithdraw(self))
+
+
+@view
+@external
+def previewWithdraw(assets: uint256) -> uint256:
+    return vault.previewWithdraw(assets)
+
+
+@view
+@external
+def maxRedeem(owner: address) -> uint256:
+    # NOTE: Past what the Vault can free up, `redeem` would only burn part of them
+    return min(self.balanceOf[owner], vault.previewDeposit(vault.maxWithdraw(self)))
+
+
+@view
+@external
+def previewRedeem(shares: uint256) -> uint256:
+    return vault.previewRedeem(shares)
+
+
+@internal
+def _deposit(assets: uint256, receiver: address) -> uint256:
+    assert ERC20(asset).transferFrom(msg.sender, self, assets, default_return_value=True)
+    shares: uint256 = vault.deposit(assets, self)
+
+    self.totalSupply += shares
+    self.balanceOf[receiver] += shares
+    log Transfer(empty(address), receiver, shares)
+    log Deposit(msg.sender, receiver, assets, shares)
+    return shares
+
+
+@external
+@nonreentrant("adapter")
+def deposit(assets: uint256, receiver: address = msg.sender) -> uint256:
+    """
+    @notice Deposits `assets` into the Vault, issuing its shares to `receiver`.
+    @param assets The quantity of `asset` to deposit.
+    @param receiver The address to issue the shares to.
+    @return The shares issued.
+    """
+    return self._deposit(assets, receiver)
+
+
+@external
+@nonreentrant("adapter")
+def mint(shares: uint256, receiver: address = msg.sender) -> uint256:
+    """
+    @notice Deposits what it takes to issue `shares` to `receiver`.
+    @dev
+        Issues what the Vault issues for those assets, which is at least
+        `shares` (more only if a share is worth less than one unit of
+        `asset`, where the Vault rounds in favor of the depositor).
+    @param shares The quantity of shares to issue.
+    @param receiver The address to issue the shares to.
+    @return The assets deposited.
+    """
+    assets: uint256 = self._previewMint(shares)
+    assert self._deposit(assets, receiver) >= shares
+    return assets
+
+
+@internal
+def _redeem(
+    shares: uint256,
+    receiver: address,
+    owner: address,
+    maxLoss: uint256,
+) -> (uint256, uint256):
+    # NOTE: The Vault burns less than `shares` if it can't free up their value,
+    #       only what it burns is taken from `owner`
+    balance: uint256 = vault.balanceOf(self)
+    assets: uint256 = vault.withdraw(shares, receiver, maxLoss)
+    burned: uint256 = balance - vault.balanceOf(self)
+
+    self._spendAllowance(owner, msg.sender, burned)
+    self.balanceOf[owner] -= burned
+    self.totalSupply -= burned
+    log Transfer(owner, empty(address), burned)
+    log Withdraw(msg.sender, receiver, owner, assets, burned)
+    return assets, burned
+
+
+@external
+@nonreentrant("adapter")
+def withdraw(
+    assets: uint256,
+    receiver: address = msg.sender,
+    owner: address = msg.sender,
+) -> uint256:
+    """
+    @notice Burns the shares of `owner` it takes to send `assets` to `receiver`.
+    @dev Fails if the Vault can't free up `assets`, or realizes a loss doing so.
+    @param assets The quantity of `asset` to withdraw.
+    @param receiver The address to send `assets` to.
+    @param owner The address to burn the shares of.
+    @return The shares burned.
+    """
+    returned: uint256 = 0
+    burned: uint256 = 0
+    returned, burned = self._redeem(vault.previewWithdraw(assets), receiver, owner, 0)
+    assert returned >= assets
+    return burned
+
+
+@external
+@nonreentrant("adapter")
+def redeem(
+    shares: uint256,
+    receiver: address = msg.sender,
+    owner: address = msg.sender,
+) -> uint256:
+    """
+    @notice Burns `shares` of `owner`, sending what they are worth to `receiver`.
+    @dev
+        Burns less than `shares` if the Vault can't free up their value (see
+        `maxRedeem`), and accepts a loss of up to `MAX_LOSS`.
+    @param shares The quantity of shares to burn.
+    @param receiver The address to send the assets to.
+    @param owner The address to burn the shares of.
+    @return The assets sent to `receiver`.
+    """
+    returned: uint256 = 0
+    burned: uint256 = 0
+    returned, burned = self._redeem(shares, receiver, owner, MAX_LOSS)
+    return returned
@@ -0,0 +1,129 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity ^0.8.15;
+pragma experimental ABIEncoderV2;
+
+interface IStrategy {
+    function harvest() external;
+
+    function tend() external;
+}
+
+/**
+ * @dev Lets keeper bots `harvest()`/`tend()` many strategies in a single
+ *  transaction, so the 21k base cost is paid once and the Vault storage read
+ *  by the first strategy stays warm for the others.
+ *
+ *  The router has to be set as the keeper of every strategy it calls. A
+ *  strategy that reverts doesn't revert the others, its result says why.
+ *
+ * Version 0.1.0
+ */
+
+contract KeeperRouter {
+    enum Action {
+        Harvest,
+        Tend
+    }
+
+    struct Call {
+        address strategy;
+        Action action;
+    }
+
+    struct Result {
+        bool success;
+        bytes reason; /// @notice Revert data, if the call reverted
+        uint256 gasUsed;
+    }
+
+    address public governance; /// @notice Governance can grant and revoke access to the router
+    address public pendingGovernance; /// @notice New address must be set by current gov and then accept to transfer power.
+    mapping(address => bool) public authorizedAddresses; /// @notice Keeper bots allowed to use the router
+
+    constructor() {
+        governance = msg.sender; // our deployer should be gov, they can set up the rest
+    }
+
+    // events for subgraph
+    event NewGovernance(address indexed governance);
+
+    event UpdatedAuthorization(address indexed target, bool authorized);
+
+    event StrategyCalled(address indexed strategy, Action action, bool success, uint256 gasUsed, bytes reason);
+
+    /**
+     * @notice Calls `harvest()` or `tend()` on every strategy of `calls`, in order.
+     * @dev Throws if the caller is not authorized or gov. Never throws because
+     *  of a strategy, every call's outcome is in `results` and in a
+     *  `StrategyCalled` event.
+     * @param calls The strategies to call, and what to call on each.
+     * @return results The outcome of each call, in the same order.
+     */
+    function work(Call[] calldata calls) external returns (Result[] memory results) {
+        _onlyAuthorized();
+        results = new Result[](calls.length);
+        for (uint256 i = 0; i < calls.length; i++) {
+            uint256 gasStart = gasleft();
+            // NOTE: `harvest()`/`tend()` return nothing, so calling an address
+            //  without code would revert outside the `try`, and fail the batch
+            if (calls[i].strategy.code.length == 0) {
+                results[i].reason = abi.encodeWithSignature("Error(string)", "!contract");
+            } else if (calls[i].action == Action.Harvest) {
+                try IStrategy(calls[i].strategy).harvest() {
+                    results[i].success = true;
+                } catch (bytes memory reason) {
+                    results[i].reason = reason;
+                }
+            } else {
+                try IStrategy(calls[i].strategy).tend() {
+                    results[i].success = true;
+                } catch (bytes memory reason) {
+                    results[i].reason = reason;
+                }
+            }
+            results[i].gasUsed = gasStart - gasleft();
+            emit StrategyCalled(calls[i].strategy, calls[i].action, results[i].success, results[i].gasUsed, results[i].reason);
+        }
+    }
+
+    /**
+     * @notice Controls whether a keeper bot can use the router.
+     * @dev Throws if the caller is not current governance.
+     * @param _target The address to add/remove authorization for.
+     * @param _value Boolean to grant or revoke access.
+     */
+    function setAuthorized(address _target, bool _value) external {
+        _onlyGovernance();
+        authorizedAddresses[_target] = _value;
+        emit UpdatedAuthorization(_target, _value);
+    }
+
+    /**
+     * @notice Starts the 1st phase of the governance transfer.
+     * @dev Throws if the caller is not current governance.
+     * @param _governance The next governance address
+     */
+    function setPendingGovernance(address _governance) external {
+        _onlyGovernance();
+        pendingGovernance = _governance;
+    }
+
+    /**
+     * @notice Completes the 2nd phase of the governance transfer.
+     * @dev Throws if the caller is not the pending caller.
+     *  Emits a `NewGovernance` event.
+     */
+    function acceptGovernance() external {
+        require(msg.sender == pendingGovernance, "!authorized");
+        governance = msg.sender;
+        emit NewGovernance(msg.sender);
+    }
+
+    function _onlyAuthorized() internal view {
+        require(authorizedAddresses[msg.sender] == true || msg.sender == governance, "!authorized");
+    }
+
+    function _onlyGovernance() internal view {
+        require(msg.sender == governance, "!governance");
+    }
+}
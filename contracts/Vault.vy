@@ -35,7 +35,7 @@
     https://github.com/iearn-finance/yearn-vaults/blob/main/SPECIFICATION.md
 """
 
-API_VERSION: constant(String[28]) = "0.4.6"
+API_VERSION: constant(String[28]) = "0.4.7"
 
 from vyper.interfaces import ERC20
 
@@ -219,6 +219,7 @@ event NewPendingGovernance:
 strategies: public(HashMap[address, StrategyParams])
 MAXIMUM_STRATEGIES: constant(uint256) = 20
 DEGRADATION_COEFFICIENT: constant(uint256) = 10 ** 18
+MAXIMUM_BATCH: constant(uint256) = 50  # Per call of `depositMany` and `withdrawMany`
 
 # Ordering that `withdraw` uses to determine which strategies to pull funds from
 # NOTE: Does *NOT* have to match the ordering of all the current strategies that
@@ -939,6 +940,76 @@ def deposit(_amount: uint256 = MAX_UINT256, recipient: address = msg.sender) ->
     return shares  # Just in case someone wants them
 
 
+@external
+@nonreentrant("withdraw")
+def depositMany(
+    amounts: DynArray[uint256, MAXIMUM_BATCH],
+    recipients: DynArray[address, MAXIMUM_BATCH],
+) -> uint256:
+    """
+    @notice
+        Deposits `amounts[i]` `token` for each of `recipients[i]`, issuing
+        each one their shares, all in one transfer from the caller. If the
+        Vault is in Emergency Shutdown, deposits will not be accepted and this
+        call will fail.
+
+        Meant for those depositing on behalf of many accounts (custodians,
+        aggregators, etc.), each account costs a lot less than its own
+        `deposit` would.
+    @dev
+        Every deposit is issued shares at the price before the batch, as in
+        `deposit` (see @dev note on `deposit`). The deposit limit applies to
+        the total.
+    @param amounts The quantity of tokens to deposit for each recipient.
+    @param recipients The addresses to issue the shares in this Vault to.
+    @return The total Vault shares issued.
+    """
+    assert not self.emergencyShutdown  # Deposits are locked out
+    assert len(amounts) == len(recipients)
+
+    total: uint256 = 0
+    for amount in amounts:
+        total += amount
+
+    # Ensure we are depositing something
+    assert total > 0
+    # Ensure deposit limit is respected
+    assert self._totalAssets() + total <= self.depositLimit
+
+    # Issue new shares (needs to be done before taking deposit to be accurate)
+    # HACK: Same price for all of them, so the totals are only read and written once
+    totalSupply: uint256 = self.totalSupply
+    freeFunds: uint256 = 0
+    if totalSupply > 0:
+        freeFunds = self._freeFunds()
+
+    issued: uint256 = 0
+    for i in range(MAXIMUM_BATCH):
+        if i == len(recipients):
+            break
+        recipient: address = recipients[i]
+        assert recipient not in [self, ZERO_ADDRESS]
+
+        shares: uint256 = amounts[i]  # No existing shares, so mint 1:1
+        if totalSupply > 0:
+            # NOTE: if sqrt(token.totalSupply()) > 1e39, this could potentially revert
+            shares = amounts[i] * totalSupply / freeFunds  # dev: no free funds
+        assert shares != 0  # dev: division rounding resulted in zero
+
+        self.balanceOf[recipient] += shares
+        log Transfer(ZERO_ADDRESS, recipient, shares)
+        log Deposit(recipient, shares, amounts[i])
+        issued += shares
+
+    self.totalSupply = totalSupply + issued
+
+    # Tokens are transferred from msg.sender, once for all of them
+    self.erc20_safe_transferFrom(self.token.address, msg.sender, self, total)
+    self.totalIdle += total
+
+    return issued
+
+
 @view
 @internal
 def _shareValue(shares: uint256) -> uint256:
@@ -1002,80 +1073,156 @@ def maxAvailableShares() -> uint256:
     return shares
 
 
+@view
 @internal
-def _reportLoss(strategy: address, loss: uint256):
+def _withdrawableAssets() -> uint256:
+    # What `withdraw` can free up: what's idle, plus the debt of every Strategy in the
+    # withdrawal queue (the most it takes from each one, see `withdraw`)
+    amount: uint256 = self.totalIdle
+    for strategy in self.withdrawalQueue:
+        if strategy == ZERO_ADDRESS:
+            break
+        amount += self.strategies[strategy].totalDebt
+
+    return amount
+
+
+@view
+@external
+def previewDeposit(_amount: uint256) -> uint256:
+    """
+    @notice
+        Gives the quantity of shares `deposit` would issue for `_amount` of
+        `token`, in this block (ERC-4626).
+    @dev
+        Same math as `deposit`, so it accounts for the profit still locked
+        from the last reports. Doesn't check the deposit limit or Emergency
+        Shutdown, see `maxDeposit` for that.
+    @param _amount The quantity of tokens to deposit.
+    @return The Vault shares `deposit` would issue.
+    """
+    totalSupply: uint256 = self.totalSupply
+    if totalSupply > 0:
+        return _amount * totalSupply / self._freeFunds()
+    else:
+        return _amount
+
+
+@view
+@external
+def previewRedeem(shares: uint256) -> uint256:
+    """
+    @notice
+        Gives the quantity of tokens `withdraw` would return for `shares`, in
+        this block (ERC-4626).
+    @dev
+        Exact as long as the Strategies withdrawn from don't realize a loss,
+        which only they know of until `withdraw` calls them. Any such loss
+        is taken out of what the withdrawer receives (up to `maxLoss`).
+
+        Doesn't check what the withdrawal queue can free up, see
+        `maxWithdraw` for that.
+    @param shares The quantity of shares to redeem.
+    @return The tokens `withdraw` would return.
+    """
+    return self._shareValue(shares)
+
+
+@view
+@external
+def previewWithdraw(_amount: uint256) -> uint256:
+    """
+    @notice
+        Gives the least quantity of shares to pass to `withdraw` to receive
+        `_amount` of `token`, in this block (ERC-4626).
+    @dev
+        Rounds up, so `withdraw` returns at least `_amount` for these shares.
+        See dev note on `previewRedeem` about losses.
+    @param _amount The quantity of tokens to receive.
+    @return The Vault shares to burn.
+    """
+    totalSupply: uint256 = self.totalSupply
+    if totalSupply == 0:
+        return _amount  # See `_shareValue`
+
+    freeFunds: uint256 = self._freeFunds()
+    return (_amount * totalSupply + freeFunds - 1) / freeFunds
+
+
+@view
+@external
+def maxDeposit(receiver: address) -> uint256:
+    """
+    @notice
+        Gives the most `token` that `deposit` accepts for `receiver`, in this
+        block (ERC-4626).
+    @param receiver The address that would receive the shares.
+    @return
+        The quantity of tokens that can be deposited, 0 if deposits are
+        locked out (Emergency Shutdown).
+    """
+    if self.emergencyShutdown or receiver in [self, ZERO_ADDRESS]:
+        return 0
+
+    totalAssets: uint256 = self._totalAssets()
+    if self.depositLimit > totalAssets:
+        return self.depositLimit - totalAssets
+    else:
+        return 0
+
+
+@view
+@external
+def maxWithdraw(owner: address) -> uint256:
+    """
+    @notice
+        Gives the most `token` that `owner` can get back from `withdraw`, in
+        this block (ERC-4626).
+    @dev
+        The value of all of `owner`'s shares, up to what the Vault has idle
+        and can free up from the Strategies in the withdrawal queue. See dev
+        note on `previewRedeem` about losses.
+    @param owner The address holding the shares.
+    @return The quantity of tokens `owner` can withdraw.
+    """
+    return min(self._shareValue(self.balanceOf[owner]), self._withdrawableAssets())
+
+
+@internal
+def _reportLoss(
+    strategy: address,
+    loss: uint256,
+    vault_totalDebt: uint256,
+    vault_debtRatio: uint256,
+) -> uint256:
+    # NOTE: Only adjusts `strategy`, and returns how much its `debtRatio` went down by. The
+    #       caller takes that and `loss` off of the Vault's `debtRatio` and `totalDebt`
     # Loss can only be up the amount of debt issued to strategy
     totalDebt: uint256 = self.strategies[strategy].totalDebt
     assert totalDebt >= loss
 
     # Also, make sure we reduce our trust with the strategy by the amount of loss
-    if self.debtRatio != 0: # if vault with single strategy that is set to EmergencyOne
+    ratio_change: uint256 = 0
+    if vault_debtRatio != 0: # if vault with single strategy that is set to EmergencyOne
         # NOTE: The context to this calculation is different than the calculation in `_reportLoss`,
         # this calculation intentionally approximates via `totalDebt` to avoid manipulatable results
-        ratio_change: uint256 = min(
+        ratio_change = min(
             # NOTE: This calculation isn't 100% precise, the adjustment is ~10%-20% more severe due to EVM math
-            loss * self.debtRatio / self.totalDebt,
+            loss * vault_debtRatio / vault_totalDebt,
             self.strategies[strategy].debtRatio,
         )
         self.strategies[strategy].debtRatio -= ratio_change
-        self.debtRatio -= ratio_change
     # Finally, adjust our strategy's parameters by the loss
     self.strategies[strategy].totalLoss += loss
     self.strategies[strategy].totalDebt = totalDebt - loss
-    self.totalDebt -= loss
+    return ratio_change
 
 
-@external
-@nonreentrant("withdraw")
-def withdraw(
-    maxShares: uint256 = MAX_UINT256,
-    recipient: address = msg.sender,
-    maxLoss: uint256 = 1,  # 0.01% [BPS]
-) -> uint256:
-    """
-    @notice
-        Withdraws the calling account's tokens from this Vault, redeeming
-        amount `_shares` for an appropriate amount of tokens.
-
-        See note on `setWithdrawalQueue` for further details of withdrawal
-        ordering and behavior.
-    @dev
-        Measuring the value of shares is based on the total outstanding debt
-        that this contract has ("expected value") instead of the total balance
-        sheet it has ("estimated value") has important security considerations,
-        and is done intentionally. If this value were measured against external
-        systems, it could be purposely manipulated by an attacker to withdraw
-        more assets than they otherwise should be able to claim by redeeming
-        their shares.
-
-        On withdrawal, this means that shares are redeemed against the total
-        amount that the deposited capital had "realized" since the point it
-        was deposited, up until the point it was withdrawn. If that number
-        were to be higher than the "expected value" at some future point,
-        withdrawing shares via this method could entitle the depositor to
-        *more* than the expected value once the "realized value" is updated
-        from further reports by the Strategies to the Vaults.
-
-        Under exceptional scenarios, this could cause earlier withdrawals to
-        earn "more" of the underlying assets than Users might otherwise be
-        entitled to, if the Vault's estimated value were otherwise measured
-        through external means, accounting for whatever exceptional scenarios
-        exist for the Vault (that aren't covered by the Vault's own design.)
-
-        In the situation where a large withdrawal happens, it can empty the 
-        vault balance and the strategies in the withdrawal queue. 
-        Strategies not in the withdrawal queue will have to be harvested to 
-        rebalance the funds and make the funds available again to withdraw.
-    @param maxShares
-        How many shares to try and redeem for tokens, defaults to all.
-    @param recipient
-        The address to issue the shares in this Vault to. Defaults to the
-        caller's address.
-    @param maxLoss
-        The maximum acceptable loss to sustain on withdrawal. Defaults to 0.01%.
-        If a loss is specified, up to that amount of shares may be burnt to cover losses on withdrawal.
-    @return The quantity of tokens redeemed for `_shares`.
-    """
+@internal
+def _redeem(maxShares: uint256, maxLoss: uint256) -> (uint256, uint256):
+    # Burns up to `maxShares` of the caller's shares, freeing up what they are worth from
+    # the Strategies if needed. Returns that value, for the caller to send out, and the
+    # shares burned
     shares: uint256 = maxShares  # May reduce this number below
 
     # Max Loss is <=100%, revert otherwise
@@ -1091,7 +1238,7 @@ def withdraw(
     # Ensure we are withdrawing something
     assert shares > 0
 
-    # See @dev note, above.
+    # See @dev note on `withdraw`.
     value: uint256 = self._shareValue(shares)
     vault_balance: uint256 = self.totalIdle
 
@@ -1105,6 +1252,9 @@ def withdraw(
         #       can optionally specify the maximum acceptable loss (in BPS)
         #       to prevent excessive losses on their withdrawals (which may
         #       happen in certain edge cases where Strategies realize a loss)
+        # HACK: Only the Strategies move tokens in the loop, so each balance after a
+        #       withdrawal is the balance before the next one
+        preBalance: uint256 = self.token.balanceOf(self)
         for strategy in self.withdrawalQueue:
             if strategy == ZERO_ADDRESS:
                 break  # We've exhausted the queue
@@ -1123,22 +1273,26 @@ def withdraw(
                 continue  # Nothing to withdraw from this Strategy, try the next one
 
             # Force withdraw amount from each Strategy in the order set by governance
-            preBalance: uint256 = self.token.balanceOf(self)
             loss: uint256 = Strategy(strategy).withdraw(amountNeeded)
-            withdrawn: uint256 = self.token.balanceOf(self) - preBalance
+            postBalance: uint256 = self.token.balanceOf(self)
+            withdrawn: uint256 = postBalance - preBalance
+            preBalance = postBalance
             vault_balance += withdrawn
 
             # NOTE: Withdrawer incurs any losses from liquidation
             if loss > 0:
                 value -= loss
                 totalLoss += loss
-                self._reportLoss(strategy, loss)
+                self.debtRatio -= self._reportLoss(strategy, loss, self.totalDebt, self.debtRatio)
+                self.totalDebt -= loss
 
             # Reduce the Strategy's debt by the amount withdrawn ("realized returns")
             # NOTE: This doesn't add to returns as it's not earned by "normal means"
-            self.strategies[strategy].totalDebt -= withdrawn
+            # NOTE: Debt is read after the call, the Strategy may have reported during it
+            strategy_totalDebt: uint256 = self.strategies[strategy].totalDebt - withdrawn
+            self.strategies[strategy].totalDebt = strategy_totalDebt
             self.totalDebt -= withdrawn
-            log WithdrawFromStrategy(strategy, self.strategies[strategy].totalDebt, loss)
+            log WithdrawFromStrategy(strategy, strategy_totalDebt, loss)
 
         self.totalIdle = vault_balance
         # NOTE: We have withdrawn everything possible out of the withdrawal queue
@@ -1158,12 +1312,127 @@ def withdraw(
     self.totalSupply -= shares
     self.balanceOf[msg.sender] -= shares
     log Transfer(msg.sender, ZERO_ADDRESS, shares)
-    
+
     self.totalIdle -= value
+    return value, shares
+
+
+@external
+@nonreentrant("withdraw")
+def withdraw(
+    maxShares: uint256 = MAX_UINT256,
+    recipient: address = msg.sender,
+    maxLoss: uint256 = 1,  # 0.01% [BPS]
+) -> uint256:
+    """
+    @notice
+        Withdraws the calling account's tokens from this Vault, redeeming
+        amount `_shares` for an appropriate amount of tokens.
+
+        See note on `setWithdrawalQueue` for further details of withdrawal
+        ordering and behavior.
+    @dev
+        Measuring the value of shares is based on the total outstanding debt
+        that this contract has ("expected value") instead of the total balance
+        sheet it has ("estimated value") has important security considerations,
+        and is done intentionally. If this value were measured against external
+        systems, it could be purposely manipulated by an attacker to withdraw
+        more assets than they otherwise should be able to claim by redeeming
+        their shares.
+
+        On withdrawal, this means that shares are redeemed against the total
+        amount that the deposited capital had "realized" since the point it
+        was deposited, up until the point it was withdrawn. If that number
+        were to be higher than the "expected value" at some future point,
+        withdrawing shares via this method could entitle the depositor to
+        *more* than the expected value once the "realized value" is updated
+        from further reports by the Strategies to the Vaults.
+
+        Under exceptional scenarios, this could cause earlier withdrawals to
+        earn "more" of the underlying assets than Users might otherwise be
+        entitled to, if the Vault's estimated value were otherwise measured
+        through external means, accounting for whatever exceptional scenarios
+        exist for the Vault (that aren't covered by the Vault's own design.)
+
+        In the situation where a large withdrawal happens, it can empty the 
+        vault balance and the strategies in the withdrawal queue. 
+        Strategies not in the withdrawal queue will have to be harvested to 
+        rebalance the funds and make the funds available again to withdraw.
+    @param maxShares
+        How many shares to try and redeem for tokens, defaults to all.
+    @param recipient
+        The address to issue the shares in this Vault to. Defaults to the
+        caller's address.
+    @param maxLoss
+        The maximum acceptable loss to sustain on withdrawal. Defaults to 0.01%.
+        If a loss is specified, up to that amount of shares may be burnt to cover losses on withdrawal.
+    @return The quantity of tokens redeemed for `_shares`.
+    """
+    value: uint256 = 0
+    shares: uint256 = 0
+    value, shares = self._redeem(maxShares, maxLoss)
+
     # Withdraw remaining balance to _recipient (may be different to msg.sender) (minus fee)
     self.erc20_safe_transfer(self.token.address, recipient, value)
     log Withdraw(recipient, shares, value)
-    
+
+    return value
+
+
+@external
+@nonreentrant("withdraw")
+def withdrawMany(
+    shares: DynArray[uint256, MAXIMUM_BATCH],
+    recipients: DynArray[address, MAXIMUM_BATCH],
+    maxLoss: uint256 = 1,  # 0.01% [BPS]
+) -> uint256:
+    """
+    @notice
+        Redeems `shares[i]` of the calling account's shares for each of
+        `recipients[i]`, sending each one what their shares are worth. Funds
+        are freed up from the Strategies, and shares burnt, once for all of
+        them.
+
+        See note on `setWithdrawalQueue` for further details of withdrawal
+        ordering and behavior.
+    @dev
+        See @dev note on `withdraw`. Any loss on withdrawal is shared by the
+        recipients in proportion to their shares, and `maxLoss` applies to
+        the total.
+
+        Unlike `withdraw`, fails if the withdrawal queue can't free up the
+        value of all the shares, so no recipient is shorted.
+    @param shares The quantity of shares to redeem for each recipient.
+    @param recipients The addresses to send the tokens to.
+    @param maxLoss
+        The maximum acceptable loss to sustain on withdrawal. Defaults to 0.01%.
+    @return The total quantity of tokens redeemed.
+    """
+    assert len(shares) == len(recipients)
+
+    total: uint256 = 0
+    for amount in shares:
+        total += amount
+
+    value: uint256 = 0
+    burnt: uint256 = 0
+    value, burnt = self._redeem(total, maxLoss)
+    assert burnt == total  # dev: not enough freed up
+
+    # NOTE: Pro rata, the last recipient also gets what rounding leaves
+    token: address = self.token.address
+    remaining: uint256 = value
+    for i in range(MAXIMUM_BATCH):
+        if i == len(recipients):
+            break
+        withdrawn: uint256 = remaining
+        if i + 1 < len(recipients):
+            withdrawn = value * shares[i] / total
+        remaining -= withdrawn
+
+        self.erc20_safe_transfer(token, recipients[i], withdrawn)
+        log Withdraw(recipients[i], shares[i], withdrawn)
+
     return value
 
 
@@ -1488,17 +1757,22 @@ def removeStrategyFromQueue(strategy: address):
 
 @view
 @internal
-def _debtOutstanding(strategy: address) -> uint256:
+def _debtOutstanding(
+    strategy_debtRatio: uint256,
+    strategy_totalDebt: uint256,
+    vault_totalAssets: uint256,
+    vault_debtRatio: uint256,
+) -> uint256:
     # See note on `debtOutstanding()`.
-    if self.debtRatio == 0:
-        return self.strategies[strategy].totalDebt
+    # NOTE: Takes what it reads as arguments, so `report` can pass its copies
+    if vault_debtRatio == 0:
+        return strategy_totalDebt
 
     strategy_debtLimit: uint256 = (
-        self.strategies[strategy].debtRatio
-        * self._totalAssets()
+        strategy_debtRatio
+        * vault_totalAssets
         / MAX_BPS
     )
-    strategy_totalDebt: uint256 = self.strategies[strategy].totalDebt
 
     if self.emergencyShutdown:
         return strategy_totalDebt
@@ -1518,22 +1792,32 @@ def debtOutstanding(strategy: address = msg.sender) -> uint256:
     @param strategy The Strategy to check. Defaults to the caller.
     @return The quantity of tokens to withdraw.
     """
-    return self._debtOutstanding(strategy)
+    return self._debtOutstanding(
+        self.strategies[strategy].debtRatio,
+        self.strategies[strategy].totalDebt,
+        self._totalAssets(),
+        self.debtRatio,
+    )
 
 
 @view
 @internal
-def _creditAvailable(strategy: address) -> uint256:
+def _creditAvailable(
+    strategy_debtRatio: uint256,
+    strategy_totalDebt: uint256,
+    strategy_minDebtPerHarvest: uint256,
+    strategy_maxDebtPerHarvest: uint256,
+    vault_totalIdle: uint256,
+    vault_totalDebt: uint256,
+    vault_debtRatio: uint256,
+) -> uint256:
     # See note on `creditAvailable()`.
+    # NOTE: Takes what it reads as arguments, so `report` can pass its copies
     if self.emergencyShutdown:
         return 0
-    vault_totalAssets: uint256 = self._totalAssets()
-    vault_debtLimit: uint256 =  self.debtRatio * vault_totalAssets / MAX_BPS 
-    vault_totalDebt: uint256 = self.totalDebt
-    strategy_debtLimit: uint256 = self.strategies[strategy].debtRatio * vault_totalAssets / MAX_BPS
-    strategy_totalDebt: uint256 = self.strategies[strategy].totalDebt
-    strategy_minDebtPerHarvest: uint256 = self.strategies[strategy].minDebtPerHarvest
-    strategy_maxDebtPerHarvest: uint256 = self.strategies[strategy].maxDebtPerHarvest
+    vault_totalAssets: uint256 = vault_totalIdle + vault_totalDebt
+    vault_debtLimit: uint256 =  vault_debtRatio * vault_totalAssets / MAX_BPS 
+    strategy_debtLimit: uint256 = strategy_debtRatio * vault_totalAssets / MAX_BPS
 
     # Exhausted credit line
     if strategy_debtLimit <= strategy_totalDebt or vault_debtLimit <= vault_totalDebt:
@@ -1547,7 +1831,7 @@ def _creditAvailable(strategy: address) -> uint256:
 
     # Can only borrow up to what the contract has in reserve
     # NOTE: Running near 100% is discouraged
-    available = min(available, self.totalIdle)
+    available = min(available, vault_totalIdle)
 
     # Adjust by min and max borrow limits (per harvest)
     # NOTE: min increase can be used to ensure that if a strategy has a minimum
@@ -1576,7 +1860,15 @@ def creditAvailable(strategy: address = msg.sender) -> uint256:
     @param strategy The Strategy to check. Defaults to caller.
     @return The quantity of tokens available for the Strategy to draw on.
     """
-    return self._creditAvailable(strategy)
+    return self._creditAvailable(
+        self.strategies[strategy].debtRatio,
+        self.strategies[strategy].totalDebt,
+        self.strategies[strategy].minDebtPerHarvest,
+        self.strategies[strategy].maxDebtPerHarvest,
+        self.totalIdle,
+        self.totalDebt,
+        self.debtRatio,
+    )
 
 
 @view
@@ -1626,14 +1918,15 @@ def expectedReturn(strategy: address = msg.sender) -> uint256:
 
 
 @internal
-def _assessFees(strategy: address, gain: uint256) -> uint256:
+def _assessFees(strategy: address, params: StrategyParams, gain: uint256) -> uint256:
     # Issue new shares to cover fees
     # NOTE: In effect, this reduces overall share price by the combined fee
     # NOTE: may throw if Vault.totalAssets() > 1e64, or not called for more than a year
-    if self.strategies[strategy].activation == block.timestamp:
+    # NOTE: `params` are those of `strategy`, after its loss (if any) but before its gain
+    if params.activation == block.timestamp:
         return 0  # NOTE: Just added, no fees to assess
 
-    duration: uint256 = block.timestamp - self.strategies[strategy].lastReport
+    duration: uint256 = block.timestamp - params.lastReport
     assert duration != 0 # can't assessFees twice within the same block
 
     if gain == 0:
@@ -1642,7 +1935,7 @@ def _assessFees(strategy: address, gain: uint256) -> uint256:
 
     management_fee: uint256 = (
         (
-            (self.strategies[strategy].totalDebt - Strategy(strategy).delegatedAssets())
+            (params.totalDebt - Strategy(strategy).delegatedAssets())
             * duration 
             * self.managementFee
         )
@@ -1654,7 +1947,7 @@ def _assessFees(strategy: address, gain: uint256) -> uint256:
     # NOTE: No fee is taken when a Strategy is unwinding it's position, until all debt is paid
     strategist_fee: uint256 = (
         gain
-        * self.strategies[strategy].performanceFee
+        * params.performanceFee
         / MAX_BPS
     )
     # NOTE: Unlikely to throw unless strategy reports >1e72 harvest profit
@@ -1731,35 +2024,64 @@ def report(gain: uint256, loss: uint256, _debtPayment: uint256) -> uint256:
 
     # We have a loss to report, do it before the rest of the calculations
     if loss > 0:
-        self._reportLoss(msg.sender, loss)
+        ratio_change: uint256 = self._reportLoss(msg.sender, loss, self.totalDebt, self.debtRatio)
+        if ratio_change > 0:
+            self.debtRatio -= ratio_change
+        self.totalDebt -= loss
+
+    # HACK: The rest works off of these copies, and only writes back what changed,
+    #       once (saves ~1.7k gas per harvest, post-Berlin)
+    strategy: StrategyParams = self.strategies[msg.sender]
+    vault_totalIdle: uint256 = self.totalIdle
+    vault_totalDebt: uint256 = self.totalDebt
+    vault_debtRatio: uint256 = self.debtRatio
 
     # Assess both management fee and performance fee, and issue both as shares of the vault
-    totalFees: uint256 = self._assessFees(msg.sender, gain)
+    totalFees: uint256 = self._assessFees(msg.sender, strategy, gain)
 
     # Returns are always "realized gains"
-    self.strategies[msg.sender].totalGain += gain
+    strategy.totalGain += gain
 
     # Compute the line of credit the Vault is able to offer the Strategy (if any)
-    credit: uint256 = self._creditAvailable(msg.sender)
+    credit: uint256 = self._creditAvailable(
+        strategy.debtRatio,
+        strategy.totalDebt,
+        strategy.minDebtPerHarvest,
+        strategy.maxDebtPerHarvest,
+        vault_totalIdle,
+        vault_totalDebt,
+        vault_debtRatio,
+    )
 
     # Outstanding debt the Strategy wants to take back from the Vault (if any)
     # NOTE: debtOutstanding <= StrategyParams.totalDebt
-    debt: uint256 = self._debtOutstanding(msg.sender)
+    debt: uint256 = self._debtOutstanding(
+        strategy.debtRatio,
+        strategy.totalDebt,
+        vault_totalIdle + vault_totalDebt,
+        vault_debtRatio,
+    )
     debtPayment: uint256 = min(_debtPayment, debt)
 
     if debtPayment > 0:
-        self.strategies[msg.sender].totalDebt -= debtPayment
-        self.totalDebt -= debtPayment
+        strategy.totalDebt -= debtPayment
+        vault_totalDebt -= debtPayment
         debt -= debtPayment
         # NOTE: `debt` is being tracked for later
 
     # Update the actual debt based on the full credit we are extending to the Strategy
     # or the returns if we are taking funds back
-    # NOTE: credit + self.strategies[msg.sender].totalDebt is always < self.debtLimit
+    # NOTE: credit + strategy.totalDebt is always < self.debtLimit
     # NOTE: At least one of `credit` or `debt` is always 0 (both can be 0)
     if credit > 0:
-        self.strategies[msg.sender].totalDebt += credit
-        self.totalDebt += credit
+        strategy.totalDebt += credit
+        vault_totalDebt += credit
+
+    # Write back what changed
+    self.strategies[msg.sender].totalGain = strategy.totalGain
+    if debtPayment > 0 or credit > 0:
+        self.strategies[msg.sender].totalDebt = strategy.totalDebt
+        self.totalDebt = vault_totalDebt
 
     # Give/take balance to Strategy, based on the difference between the reported gains
     # (if any), the debt payment (if any), the credit increase we are offering (if any),
@@ -1768,10 +2090,10 @@ def report(gain: uint256, loss: uint256, _debtPayment: uint256) -> uint256:
     #       the Vault based on the Strategy's debt limit (as well as the Vault's).
     totalAvail: uint256 = gain + debtPayment
     if totalAvail < credit:  # credit surplus, give to Strategy
-        self.totalIdle -= credit - totalAvail
+        self.totalIdle = vault_totalIdle - (credit - totalAvail)
         self.erc20_safe_transfer(self.token.address, msg.sender, credit - totalAvail)
     elif totalAvail > credit:  # credit deficit, take from Strategy
-        self.totalIdle += totalAvail - credit
+        self.totalIdle = vault_totalIdle + (totalAvail - credit)
         self.erc20_safe_transferFrom(self.token.address, msg.sender, self, totalAvail - credit)
     # else, don't do anything because it is balanced
 
@@ -1792,14 +2114,14 @@ def report(gain: uint256, loss: uint256, _debtPayment: uint256) -> uint256:
         gain,
         loss,
         debtPayment,
-        self.strategies[msg.sender].totalGain,
-        self.strategies[msg.sender].totalLoss,
-        self.strategies[msg.sender].totalDebt,
+        strategy.totalGain,
+        strategy.totalLoss,
+        strategy.totalDebt,
         credit,
-        self.strategies[msg.sender].debtRatio,
+        strategy.debtRatio,
     )
 
-    if self.strategies[msg.sender].debtRatio == 0 or self.emergencyShutdown:
+    if strategy.debtRatio == 0 or self.emergencyShutdown:
         # Take every last penny the Strategy has (Emergency Exit/revokeStrategy)
         # NOTE: This is different than `debt` in order to extract *all* of the returns
         return Strategy(msg.sender).estimatedTotalAssets()
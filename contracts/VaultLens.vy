@@ -0,0 +1,165 @@
+# @version 0.3.10
+"""
+@title Vault Lens
+@license GNU AGPLv3
+@author yearn.finance
+@notice
+    Reads the full accounting of a Vault, along with the parameters of every
+    Strategy in its withdrawal queue, in a single call. Off-chain readers
+    (dashboards, keepers) only need one `eth_call` per Vault instead of one per
+    getter, or even one for many Vaults with `snapshots`.
+
+    Nothing here changes state, this contract is only meant to be called.
+"""
+
+API_VERSION: constant(String[28]) = "0.1.0"
+
+MAXIMUM_STRATEGIES: constant(uint256) = 20  # See `Vault.MAXIMUM_STRATEGIES`
+MAXIMUM_VAULTS: constant(uint256) = 50  # Per call of `snapshots`
+
+
+struct StrategyParams:
+    performanceFee: uint256
+    activation: uint256
+    debtRatio: uint256
+    minDebtPerHarvest: uint256
+    maxDebtPerHarvest: uint256
+    lastReport: uint256
+    totalDebt: uint256
+    totalGain: uint256
+    totalLoss: uint256
+
+
+interface Vault:
+    def token() -> address: view
+    def decimals() -> uint256: view
+    def totalSupply() -> uint256: view
+    def totalAssets() -> uint256: view
+    def totalIdle() -> uint256: view
+    def totalDebt() -> uint256: view
+    def debtRatio() -> uint256: view
+    def lockedProfit() -> uint256: view
+    def lockedProfitDegradation() -> uint256: view
+    def lastReport() -> uint256: view
+    def activation() -> uint256: view
+    def depositLimit() -> uint256: view
+    def availableDepositLimit() -> uint256: view
+    def pricePerShare() -> uint256: view
+    def performanceFee() -> uint256: view
+    def managementFee() -> uint256: view
+    def emergencyShutdown() -> bool: view
+    def withdrawalQueue(index: uint256) -> address: view
+    def strategies(strategy: address) -> StrategyParams: view
+    def creditAvailable(strategy: address) -> uint256: view
+    def debtOutstanding(strategy: address) -> uint256: view
+
+
+struct StrategySnapshot:
+    strategy: address
+    params: StrategyParams  # Same as `Vault.strategies(strategy)`
+    creditAvailable: uint256
+    debtOutstanding: uint256
+
+
+struct VaultSnapshot:
+    vault: address
+    blockNumber: uint256
+    timestamp: uint256  # block.timestamp, for what depends on time (locked profit)
+    token: address
+    decimals: uint256
+    totalSupply: uint256
+    totalAssets: uint256
+    totalIdle: uint256
+    totalDebt: uint256
+    debtRatio: uint256
+    lockedProfit: uint256
+    lockedProfitDegradation: uint256
+    lastReport: uint256
+    activation: uint256
+    depositLimit: uint256
+    availableDepositLimit: uint256
+    pricePerShare: uint256
+    performanceFee: uint256
+    managementFee: uint256
+    emergencyShutdown: bool
+    strategies: DynArray[StrategySnapshot, MAXIMUM_STRATEGIES]  # In queue order
+
+
+@pure
+@external
+def apiVersion() -> String[28]:
+    """
+    @notice
+        Used to track the deployed version of this contract.
+    @return API_VERSION which holds the current version of this contract.
+    """
+    return API_VERSION
+
+
+@view
+@internal
+def _snapshot(vault: address) -> VaultSnapshot:
+    strategies: DynArray[StrategySnapshot, MAXIMUM_STRATEGIES] = []
+    for i in range(MAXIMUM_STRATEGIES):
+        strategy: address = Vault(vault).withdrawalQueue(i)
+        if strategy == empty(address):
+            break  # We've exhausted the queue
+        strategies.append(
+            StrategySnapshot({
+                strategy: strategy,
+                params: Vault(vault).strategies(strategy),
+                creditAvailable: Vault(vault).creditAvailable(strategy),
+                debtOutstanding: Vault(vault).debtOutstanding(strategy),
+            })
+        )
+
+    return VaultSnapshot({
+        vault: vault,
+        blockNumber: block.number,
+        timestamp: block.timestamp,
+        token: Vault(vault).token(),
+        decimals: Vault(vault).decimals(),
+        totalSupply: Vault(vault).totalSupply(),
+        totalAssets: Vault(vault).totalAssets(),
+        totalIdle: Vault(vault).totalIdle(),
+        totalDebt: Vault(vault).totalDebt(),
+        debtRatio: Vault(vault).debtRatio(),
+        lockedProfit: Vault(vault).lockedProfit(),
+        lockedProfitDegradation: Vault(vault).lockedProfitDegradation(),
+        lastReport: Vault(vault).lastReport(),
+        activation: Vault(vault).activation(),
+        depositLimit: Vault(vault).depositLimit(),
+        availableDepositLimit: Vault(vault).availableDepositLimit(),
+        pricePerShare: Vault(vault).pricePerShare(),
+        performanceFee: Vault(vault).performanceFee(),
+        managementFee: Vault(vault).managementFee(),
+        emergencyShutdown: Vault(vault).emergencyShutdown(),
+        strategies: strategies,
+    })
+
+
+@view
+@external
+def snapshot(vault: address) -> VaultSnapshot:
+    """
+    @notice Reads the accounting of `vault` and of every Strategy in its queue.
+    @param vault The Vault to read, of the same API as `Vault.vy`.
+    @return The snapshot of `vault`, as of the block of the call.
+    """
+    return self._snapshot(vault)
+
+
+@view
+@external
+def snapshots(
+    vaults: DynArray[address, MAXIMUM_VAULTS]
+) -> DynArray[VaultSnapshot, MAXIMUM_VAULTS]:
+    """
+    @notice Same as `snapshot`, for each of `vaults`, as of the same block.
+    @param vaults The Vaults to read (at most 50).
+    @return The snapshots of `vaults`, in the same order.
+    """
+    result: DynArray[VaultSnapshot, MAXIMUM_VAULTS] = []
+    for vault in vaults:
+        result.append(self._snapshot(vault))
+    return result
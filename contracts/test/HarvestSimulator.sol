@@ -0,0 +1,80 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.8.15;
+pragma experimental ABIEncoderV2;
+
+import {StrategyAPI, StrategyParams, VaultAPI} from "../BaseStrategy.sol";
+
+/*
+ * Dry-runs `harvest()` on many strategies in a single `eth_call`, for the keeper
+ * bot to see what each one would report before paying for it.
+ *
+ * It is never deployed: the keeper overrides the code of its own address with
+ * this contract's runtime code for the duration of the call, so `harvest()`
+ * sees the keeper as `msg.sender` and passes `onlyKeepers`.
+ *
+ * Each strategy is harvested in a sub-call that always reverts (carrying the
+ * result back in `Simulated`), so every simulation starts from the same state
+ * and none of them sees what the others did.
+ */
+
+contract HarvestSimulator {
+    struct Result {
+        bool success;
+        bytes revertData; // Of `harvest()`, if it reverted
+        uint256 gain; // Reported to the Vault
+        uint256 loss; // Reported to the Vault
+        uint256 debtBefore; // `totalDebt` of the strategy before `harvest()`
+        uint256 debtAfter; // `totalDebt` of the strategy after `harvest()`
+        uint256 gasUsed; // By `harvest()` itself
+    }
+
+    error Simulated(Result result);
+
+    function simulate(address[] calldata strategies) external returns (Result[] memory results) {
+        results = new Result[](strategies.length);
+        for (uint256 i = 0; i < strategies.length; i++) {
+            try this.simulateOne(strategies[i]) {
+                // NOTE: Never happens, `simulateOne` always reverts
+            } catch (bytes memory data) {
+                if (data.length > 4 && bytes4(data) == Simulated.selector) {
+                    // NOTE: Drop the selector to decode the arguments in place
+                    assembly {
+                        mstore(add(data, 4), sub(mload(data), 4))
+                        data := add(data, 4)
+                    }
+                    results[i] = abi.decode(data, (Result));
+                } else {
+                    // NOTE: Failed outside of `harvest()`, e.g. not a strategy
+                    results[i].revertData = data;
+                }
+            }
+        }
+    }
+
+    function simulateOne(address strategy) external {
+        require(msg.sender == address(this));
+        VaultAPI vault = VaultAPI(StrategyAPI(strategy).vault());
+
+        Result memory result;
+        StrategyParams memory params = vault.strategies(strategy);
+        result.debtBefore = params.totalDebt;
+        uint256 totalGain = params.totalGain;
+        uint256 totalLoss = params.totalLoss;
+
+        uint256 gasStart = gasleft();
+        try StrategyAPI(strategy).harvest() {
+            result.gasUsed = gasStart - gasleft();
+            result.success = true;
+            params = vault.strategies(strategy);
+            result.gain = params.totalGain - totalGain;
+            result.loss = params.totalLoss - totalLoss;
+            result.debtAfter = params.totalDebt;
+        } catch (bytes memory reason) {
+            result.gasUsed = gasStart - gasleft();
+            result.revertData = reason;
+            result.debtAfter = result.debtBefore;
+        }
+
+        revert Simulated(result);
+    }
+}
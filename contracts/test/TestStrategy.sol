@@ -13,6 +13,7 @@ import {SafeERC20} from "@openzeppelin/contracts/token/ERC20/utils/SafeERC20.sol
 
 contract TestStrategy is BaseStrategyInitializable {
     bool public doReentrancy;
+    bool public doReportOnWithdraw;
     bool public delegateEverything;
 
     // Some token that needs to be protected for some reason
@@ -49,6 +50,11 @@ contract TestStrategy is BaseStrategyInitializable {
         doReentrancy = !doReentrancy;
     }
 
+    // NOTE: This is a test-only function to report any losses from within withdraw
+    function _toggleReportOnWithdraw() public {
+        doReportOnWithdraw = !doReportOnWithdraw;
+    }
+
     // NOTE: This is a test-only function to simulate a wrong want token
     function _setWant(IERC20 _want) public {
         want = _want;
@@ -102,6 +108,13 @@ contract TestStrategy is BaseStrategyInitializable {
             VaultAPI(address(vault)).withdraw(stratBalance, address(this));
         }
 
+        if (doReportOnWithdraw) {
+            // simulate a strategy that reports its losses to the vault while it is withdrawn from
+            uint256 debt = vault.strategies(address(this)).totalDebt;
+            uint256 assets = want.balanceOf(address(this));
+            if (debt > assets) vault.report(0, debt - assets, 0);
+        }
+
         uint256 totalDebt = vault.strategies(address(this)).totalDebt;
         uint256 totalAssets = want.balanceOf(address(this));
         if (_amountNeeded > totalAssets) {
@@ -0,0 +1,99 @@
+from collections import Counter
+from typing import Dict, Tuple
+
+import click
+from brownie import (
+    TestStrategy,
+    Token,
+    Vault,
+    VaultPacked,
+    accounts,
+    chain,
+    network,
+)
+
+VARIANTS = (Vault, VaultPacked)  # The first one is the baseline
+STRATEGIES = 10  # 5% of the Vault each
+BATCH = 8  # Recipients of `depositMany` and `withdrawMany`
+STORAGE_OPS = ("SLOAD", "SSTORE")
+
+
+def storage_ops(tx) -> Counter:
+    # NOTE: Needs a node that can trace transactions (e.g. ganache or anvil)
+    return Counter(step["op"] for step in tx.trace if step["op"] in STORAGE_OPS)
+
+
+def benchmark(container, gov) -> Dict:
+    """
+    Runs the same scenario on a new Vault deployed from `container`, and
+    returns the transactions of each function benchmarked:
+      - `report`: a harvest with a gain, from a strategy with debt
+      - `creditAvailable`: for a strategy that can borrow more
+      - `deposit`, `depositMany`: for one, and `BATCH` recipients
+      - `withdrawMany`: to `BATCH` recipients, from what's idle
+      - `withdraw`: a withdrawal that takes from every strategy, one at a loss
+    """
+    token = gov.deploy(Token, 18)
+    vault = container.deploy({"from": gov})
+    vault.initialize(token, gov, gov, "", "", gov, gov, {"from": gov})
+    vault.setDepositLimit(2**256 - 1, {"from": gov})
+    token.approve(vault, 2**256 - 1, {"from": gov})
+    vault.deposit(token.balanceOf(gov) // 2, {"from": gov})
+
+    strategies = [gov.deploy(TestStrategy, vault) for _ in range(STRATEGIES)]
+    for strategy in strategies:
+        vault.addStrategy(strategy, 500, 0, 2**256 - 1, 1_000, {"from": gov})
+        strategy.harvest({"from": gov})  # Seed it with debt
+
+    txs = {}
+    token.transfer(strategies[0], token.balanceOf(strategies[0]) // 10, {"from": gov})
+    chain.sleep(3600)
+    txs["report"] = strategies[0].harvest({"from": gov})
+
+    vault.updateStrategyDebtRatio(strategies[1], 1_000, {"from": gov})
+    # NOTE: A transaction, so the view can be traced like the others
+    txs["creditAvailable"] = vault.creditAvailable.transact(
+        strategies[1], {"from": gov}
+    )
+
+    amount = 10 ** token.decimals()
+    recipients = accounts[1 : BATCH + 1]
+    txs["deposit"] = vault.deposit(amount, accounts[BATCH + 1], {"from": gov})
+    txs["depositMany"] = vault.depositMany([amount] * BATCH, recipients, {"from": gov})
+    txs["withdrawMany"] = vault.withdrawMany(
+        [amount] * BATCH, recipients, {"from": gov}
+    )
+
+    strategies[2]._takeFunds(token.balanceOf(strategies[2]) // 10, {"from": gov})
+    txs["withdraw"] = vault.withdraw(vault.balanceOf(gov), gov, 10_000, {"from": gov})
+    return txs
+
+
+def measure(container, gov) -> Dict[str, Tuple[int, Counter]]:
+    chain.snapshot()
+    try:
+        return {
+            name: (tx.gas_used, storage_ops(tx))
+            for name, tx in benchmark(container, gov).items()
+        }
+    finally:
+        chain.revert()
+
+
+def main():
+    click.echo(f"You are using the '{network.show_active()}' network")
+    gov = accounts[0]
+    results = {container._name: measure(container, gov) for container in VARIANTS}
+
+    baseline = results[VARIANTS[0]._name]
+    for name, result in results.items():
+        click.echo(f"\n{name}")
+        for function, (gas, ops) in result.items():
+            delta = gas - baseline[function][0]
+            sload = ops["SLOAD"] - baseline[function][1]["SLOAD"]
+            sstore = ops["SSTORE"] - baseline[function][1]["SSTORE"]
+            click.echo(
+                f"  {function:16} {gas:>8} gas ({delta:+})"
+                f"  SLOAD {ops['SLOAD']:>3} ({sload:+})"
+                f"  SSTORE {ops['SSTORE']:>3} ({sstore:+})"
+            )
@@ -0,0 +1,53 @@
+from brownie import network, Registry, Vault
+from eth_utils import is_checksum_address
+import os
+import pyarrow.parquet as pq
+from time import sleep
+
+from scripts.indexer.logs import EventIndexer
+from scripts.indexer.store import ColumnStore
+from scripts.model.history import price_history
+
+POLL_INTERVAL = 15  # Seconds between runs, about a block
+
+
+def get_address(msg: str) -> str:
+    while True:
+        addr = input(msg)
+        if is_checksum_address(addr):
+            return addr
+        print(f"I'm sorry, but '{addr}' is not a checksummed address")
+
+
+def load_indexer() -> EventIndexer:
+    # NOTE: Set `INDEX_FORMAT=arrow` for Arrow IPC files instead of Parquet
+    path = os.environ.get("INDEX_PATH", "index")
+    store = ColumnStore(path, format=os.environ.get("INDEX_FORMAT", "parquet"))
+    print(f"You are using the index at '{path}' ({store.format})")
+    registry = Registry.at(get_address("Vault Registry: "))
+    start_block = int(input("Start block (0): ") or 0)
+    return EventIndexer(store, registry, start_block=start_block)
+
+
+def main():
+    print(f"You are using the '{network.show_active()}' network")
+    indexer = load_indexer()
+    if indexer.last_block >= indexer.start_block:
+        print(f"Resuming after block {indexer.last_block}")
+
+    while True:
+        count = indexer.run()
+        if count > 0:
+            print(f"Indexed {count} logs up to block {indexer.last_block}")
+        sleep(POLL_INTERVAL)
+
+
+def main_history():
+    # NOTE: Rebuilds `pricePerShare()` from the index, with no historical calls
+    path = os.environ.get("INDEX_PATH", "index")
+    store = ColumnStore(path, format=os.environ.get("INDEX_FORMAT", "parquet"))
+    vaults = store.load_checkpoint().get("vaults", {})
+    decimals = {vault: Vault.at(vault).decimals() for vault in vaults}
+    history = price_history(store, decimals)
+    pq.write_table(history, os.path.join(path, "price_history.parquet"))
+    print(f"Rebuilt {len(history)} states of {len(vaults)} Vaults")
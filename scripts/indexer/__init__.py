@@ -0,0 +1,4 @@
+"""
+Indexes the logs of the Registry and its Vaults into columnar files, for
+analytics off the chain (see `scripts/index.py`).
+"""
@@ -0,0 +1,271 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from brownie import Registry, Vault, web3
+from eth_abi import decode
+from eth_utils import event_abi_to_log_topic, to_checksum_address, to_hex
+from hexbytes import HexBytes
+from web3.exceptions import BlockNotFound
+
+from scripts.indexer.store import ColumnStore, event_schema
+from scripts.keeper.discovery import MAX_BLOCK_RANGE
+
+VAULT_EVENTS = (
+    "StrategyReported",
+    "FeeReport",
+    "Deposit",
+    "Withdraw",
+    "Transfer",
+    # NOTE: Also needed to rebuild the Vault's accounting (see `VaultHistory`)
+    "WithdrawFromStrategy",
+    "StrategyMigrated",
+    "LockedProfitDegradationUpdated",
+)
+REGISTRY_EVENTS = ("NewVault", "NewRelease")
+MAX_WORKERS = 8  # Concurrent requests to the node
+REORG_DEPTH = 64  # Blocks that may still be reorganized
+
+
+class ReorgTooDeep(Exception):
+    pass
+
+
+def block_ranges(from_block: int, to_block: int, size: int) -> List[Tuple[int, int]]:
+    """
+    `from_block` to `to_block` (included), split in ranges of `size` blocks.
+    """
+    return [
+        (start, min(start + size - 1, to_block))
+        for start in range(from_block, to_block + 1, size)
+    ]
+
+
+def _column(abi_type: str, value):
+    if abi_type == "address":
+        return to_checksum_address(value)
+    if abi_type.startswith(("uint", "int")):
+        return str(value)
+    return value
+
+
+class EventDecoder:
+    """
+    Decodes the logs of `events` with `abi`, the compiled ABI of the contract
+    that emits them.
+    """
+
+    def __init__(self, abi: List[Dict], events: Iterable[str]):
+        self.abis = {
+            event["name"]: event
+            for event in abi
+            if event["type"] == "event" and event["name"] in events
+        }
+        missing = set(events) - set(self.abis)
+        assert len(missing) == 0, f"Not in the ABI: {', '.join(sorted(missing))}"
+        self.events = {
+            HexBytes(event_abi_to_log_topic(abi)): name
+            for name, abi in self.abis.items()
+        }
+        self.schemas = {name: event_schema(abi) for name, abi in self.abis.items()}
+
+    @property
+    def topics(self) -> List[str]:
+        return [to_hex(topic) for topic in self.events]
+
+    def decode(self, log, timestamp: int) -> Tuple[str, Dict]:
+        """
+        The event `log` is, and its row (see `event_schema`).
+        """
+        name = self.events[HexBytes(log["topics"][0])]
+        abi = self.abis[name]
+        row = {
+            "block_number": log["blockNumber"],
+            "timestamp": timestamp,
+            "log_index": log["logIndex"],
+            "transaction_hash": to_hex(HexBytes(log["transactionHash"])),
+            "address": to_checksum_address(log["address"]),
+        }
+        # NOTE: None of the indexed arguments are dynamic, so topics are values
+        indexed = [i for i in abi["inputs"] if i["indexed"]]
+        for i, topic in zip(indexed, log["topics"][1:]):
+            (value,) = decode([i["type"]], bytes(HexBytes(topic)))
+            row[i["name"]] = _column(i["type"], value)
+        data = [i for i in abi["inputs"] if not i["indexed"]]
+        values = decode([i["type"] for i in data], bytes(HexBytes(log["data"])))
+        for i, value in zip(data, values):
+            row[i["name"]] = _column(i["type"], value)
+        return name, row
+
+
+class EventIndexer:
+    """
+    Indexes the logs of `registry` (`REGISTRY_EVENTS`) and of `vaults` plus
+    every Vault the Registry endorses (`VAULT_EVENTS`) into `store`, from
+    `start_block` on.
+
+    Each `run` picks up from the checkpoint of the last one. The logs are read
+    in ranges of `max_block_range` blocks, `max_workers` of them at a time, and
+    the logs of a Vault found by this run are read all the way from
+    `start_block`, since it may have been used before it was endorsed.
+
+    The hashes of the last `reorg_depth` blocks indexed are kept in the
+    checkpoint. If the chain no longer has them, everything indexed since the
+    last block it still has is rolled back before indexing again.
+    """
+
+    def __init__(
+        self,
+        store: ColumnStore,
+        registry=None,
+        vaults: Iterable[str] = (),
+        start_block: int = 0,
+        max_block_range: int = MAX_BLOCK_RANGE,
+        max_workers: int = MAX_WORKERS,
+        reorg_depth: int = REORG_DEPTH,
+    ):
+        self.store = store
+        self.registry = registry
+        self.start_block = start_block
+        self.max_block_range = max_block_range
+        self.max_workers = max_workers
+        self.reorg_depth = reorg_depth
+        self.vault_decoder = EventDecoder(Vault.abi, VAULT_EVENTS)
+        self.registry_decoder = EventDecoder(Registry.abi, REGISTRY_EVENTS)
+
+        checkpoint = store.load_checkpoint()
+        self.last_block: int = checkpoint.get("block", start_block - 1)
+        # NOTE: Vault => block it was found at (`start_block` if given)
+        self.vaults: Dict[str, int] = checkpoint.get("vaults", {})
+        self.hashes: Dict[int, str] = {
+            int(number): block_hash
+            for number, block_hash in checkpoint.get("hashes", {}).items()
+        }
+        self._pending = {
+            vault: start_block for vault in vaults if vault not in self.vaults
+        }
+        # NOTE: Partitions written by a run that stopped before its checkpoint
+        store.discard(self.last_block)
+
+    def _get_logs(self, addresses: List[str], topics: List[str], ranges) -> List:
+        def get_logs(block_range):
+            from_block, to_block = block_range
+            return web3.eth.get_logs(
+                {
+                    "address": addresses,
+                    "fromBlock": from_block,
+                    "toBlock": to_block,
+                    "topics": [topics],
+                }
+            )
+
+        if len(addresses) == 0:
+            return []
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            return [log for logs in executor.map(get_logs, ranges) for log in logs]
+
+    def _get_blocks(self, numbers: Iterable[int]) -> Dict[int, Dict]:
+        numbers = sorted(set(numbers))
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            return dict(zip(numbers, executor.map(web3.eth.get_block, numbers)))
+
+    def _block_hash(self, number: int) -> Optional[str]:
+        try:
+            return HexBytes(web3.eth.get_block(number)["hash"]).hex()
+        except BlockNotFound:
+            return None  # The new chain is shorter
+
+    def find_fork(self) -> Optional[int]:
+        """
+        First block indexed that the chain no longer has, if any.
+        """
+        # NOTE: Blocks chain their parent's hash, so if the last one matches
+        #       then so does everything before it
+        for number in sorted(self.hashes, reverse=True):
+            if self._block_hash(number) == self.hashes[number]:
+                return None if number == self.last_block else number + 1
+        if len(self.hashes) > 0:
+            raise ReorgTooDeep(f"None of the last {len(self.hashes)} blocks is left")
+        return None
+
+    def rollback(self, block_number: int):
+        """
+        Forgets everything indexed from `block_number` on.
+        """
+        self.store.rollback(block_number)
+        self.last_block = min(self.last_block, block_number - 1)
+        self.hashes = {n: h for n, h in self.hashes.items() if n < block_number}
+        # NOTE: Vaults are kept even if their `NewVault` is rolled back, as their
+        #       logs from before `block_number` are kept too
+        self._save()
+
+    def _save(self):
+        self.store.save_checkpoint(
+            {
+                "block": self.last_block,
+                "vaults": self.vaults,
+                "hashes": {str(n): h for n, h in self.hashes.items()},
+            }
+        )
+
+    def run(self, to_block: Optional[int] = None) -> int:
+        """
+        Indexes the logs up to `to_block` (the chain head by default), and
+        returns how many there were.
+        """
+        fork = self.find_fork()
+        if fork is not None:
+            print(f"Reorg at block {fork}, rolling back {self.last_block - fork + 1}")
+            self.rollback(fork)
+
+        to_block = web3.eth.block_number if to_block is None else to_block
+        from_block = self.last_block + 1
+        if from_block > to_block:
+            return 0
+        ranges = block_ranges(from_block, to_block, self.max_block_range)
+
+        logs = []  # (decoder, log)
+        if self.registry:
+            for log in self._get_logs(
+                [self.registry.address], self.registry_decoder.topics, ranges
+            ):
+                logs.append((self.registry_decoder, log))
+                name, row = self.registry_decoder.decode(log, 0)
+                if name == "NewVault" and row["vault"] not in self.vaults:
+                    self._pending.setdefault(row["vault"], log["blockNumber"])
+
+        for log in self._get_logs(list(self.vaults), self.vault_decoder.topics, ranges):
+            logs.append((self.vault_decoder, log))
+        backfill_from = min([from_block, *self._pending.values()])
+        if len(self._pending) > 0:
+            for log in self._get_logs(
+                list(self._pending),
+                self.vault_decoder.topics,
+                block_ranges(
+                    min(self.start_block, from_block), to_block, self.max_block_range
+                ),
+            ):
+                logs.append((self.vault_decoder, log))
+                backfill_from = min(backfill_from, log["blockNumber"])
+
+        # NOTE: Also the tail of the range, to check it for reorgs on the next run
+        tail = range(max(from_block, to_block - self.reorg_depth + 1), to_block + 1)
+        blocks = self._get_blocks([log["blockNumber"] for _, log in logs] + list(tail))
+
+        rows = defaultdict(list)
+        for decoder, log in logs:
+            name, row = decoder.decode(log, blocks[log["blockNumber"]]["timestamp"])
+            rows[name].append(row)
+        schemas = {**self.vault_decoder.schemas, **self.registry_decoder.schemas}
+        for name, event_rows in rows.items():
+            self.store.write(name, schemas[name], event_rows, backfill_from, to_block)
+
+        self.last_block = to_block
+        self.vaults.update(self._pending)
+        self._pending = {}
+        self.hashes.update({n: HexBytes(blocks[n]["hash"]).hex() for n in tail})
+        self.hashes = {
+            n: h for n, h in self.hashes.items() if n > to_block - self.reorg_depth
+        }
+        self._save()
+        return len(logs)
@@ -0,0 +1,226 @@
+import heapq
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+# Columns every event has, ahead of its own arguments
+LOG_COLUMNS = [
+    ("block_number", pa.int64()),
+    ("timestamp", pa.int64()),
+    ("log_index", pa.int32()),
+    ("transaction_hash", pa.string()),
+    ("address", pa.string()),  # Contract that emitted the log
+]
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}  # Arrow is the IPC file format
+CHECKPOINT = "checkpoint.json"
+
+
+def _sorted(table: pa.Table) -> pa.Table:
+    return table.sort_by([("block_number", "ascending"), ("log_index", "ascending")])
+
+
+def arrow_type(abi_type: str) -> pa.DataType:
+    # NOTE: Arrow has no 256 bit integers, so integers are decimal strings
+    if abi_type == "bool":
+        return pa.bool_()
+    if abi_type.startswith("bytes"):
+        return pa.binary()
+    return pa.string()
+
+
+def event_schema(abi: Dict) -> pa.Schema:
+    """
+    Schema of the rows of the event `abi`: `LOG_COLUMNS`, then its arguments.
+    """
+    return pa.schema(
+        LOG_COLUMNS + [(i["name"], arrow_type(i["type"])) for i in abi["inputs"]]
+    )
+
+
+class ColumnStore:
+    """
+    Decoded logs under the directory `path`, one table per event.
+
+    Each table is split in partitions, one file per indexed block range
+    (`<event>/<from_block>-<to_block>.<format>`) with its rows in log order, so
+    new blocks are appended without rewriting anything. Only `rollback` rewrites
+    the partitions it cuts through.
+
+    The checkpoint is kept next to them, both are replaced atomically.
+    """
+
+    def __init__(self, path: str, format: str = "parquet"):
+        assert format in FORMATS, f"Unknown format '{format}'"
+        self.path = path
+        self.format = format
+        os.makedirs(path, exist_ok=True)
+
+    def _replace(self, path: str, write):
+        # NOTE: Readers (and a crash half way) never see a partial file
+        tmp = f"{path}.tmp"
+        write(tmp)
+        os.replace(tmp, path)
+
+    def _write_table(self, path: str, table: pa.Table):
+        if self.format == "parquet":
+            self._replace(path, lambda tmp: pq.write_table(table, tmp))
+        else:
+
+            def write(tmp):
+                with ipc.new_file(tmp, table.schema) as writer:
+                    writer.write_table(table)
+
+            self._replace(path, write)
+
+    def _read_table(self, path: str) -> pa.Table:
+        if self.format == "parquet":
+            return pq.read_table(path)
+        with ipc.open_file(path) as reader:
+            return reader.read_all()
+
+    @property
+    def events(self) -> List[str]:
+        return sorted(
+            name
+            for name in os.listdir(self.path)
+            if os.path.isdir(os.path.join(self.path, name))
+        )
+
+    def partitions(self, event: str) -> List[Tuple[int, int, str]]:
+        """
+        `(from_block, to_block, path)` of every partition of `event`, in order.
+        """
+        directory = os.path.join(self.path, event)
+        if not os.path.isdir(directory):
+            return []
+        partitions = []
+        for name in sorted(os.listdir(directory)):
+            stem, ext = os.path.splitext(name)
+            if ext != FORMATS[self.format]:
+                continue  # Leftover `.tmp` file
+            from_block, to_block = map(int, stem.split("-"))
+            partitions.append((from_block, to_block, os.path.join(directory, name)))
+        return partitions
+
+    def _partition_path(self, event: str, from_block: int, to_block: int) -> str:
+        return os.path.join(
+            self.path,
+            event,
+            f"{from_block:012d}-{to_block:012d}{FORMATS[self.format]}",
+        )
+
+    def write(
+        self,
+        event: str,
+        schema: pa.Schema,
+        rows: List[Dict],
+        from_block: int,
+        to_block: int,
+    ):
+        """
+        Adds the partition of `event` for the blocks `from_block` to `to_block`
+        (included). An empty partition isn't written.
+        """
+        if len(rows) == 0:
+            return
+        rows = sorted(rows, key=lambda row: (row["block_number"], row["log_index"]))
+        table = pa.Table.from_pylist(rows, schema=schema)
+        os.makedirs(os.path.join(self.path, event), exist_ok=True)
+        path = self._partition_path(event, from_block, to_block)
+        if os.path.exists(path):
+            # NOTE: Only after a rollback cut another partition down to this range
+            table = _sorted(pa.concat_tables([self._read_table(path), table]))
+        self._write_table(path, table)
+
+    def read(
+        self, event: str, from_block: int = 0, to_block: Optional[int] = None
+    ) -> Optional[pa.Table]:
+        """
+        Rows of `event` logged from `from_block` to `to_block` (included), in
+        log order. `None` if nothing was indexed for `event` yet.
+        """
+        tables = [
+            self._read_table(path)
+            for start, end, path in self.partitions(event)
+            if end >= from_block and (to_block is None or start <= to_block)
+        ]
+        if len(tables) == 0:
+            return None
+        table = pa.concat_tables(tables)
+        mask = pc.greater_equal(table["block_number"], from_block)
+        if to_block is not None:
+            mask = pc.and_(mask, pc.less_equal(table["block_number"], to_block))
+        # NOTE: Partitions of backfilled Vaults overlap the ones before them
+        return _sorted(table.filter(mask))
+
+    def scan(
+        self, events: Iterable[str], from_block: int = 0
+    ) -> Iterator[Tuple[str, Dict]]:
+        """
+        `(event, row)` for the rows of all of `events`, merged in log order, so a
+        single pass sees the logs in the order they were emitted.
+        """
+
+        def rows(event):
+            table = self.read(event, from_block)
+            if table is None:
+                return
+            for batch in table.to_batches():
+                for row in batch.to_pylist():
+                    yield event, row
+
+        return heapq.merge(
+            *[rows(event) for event in events],
+            key=lambda item: (item[1]["block_number"], item[1]["log_index"]),
+        )
+
+    def rollback(self, block_number: int):
+        """
+        Drops every row logged at `block_number` or after.
+        """
+        for event in self.events:
+            for start, end, path in self.partitions(event):
+                if end < block_number:
+                    continue
+                if start < block_number:
+                    table = self._read_table(path)
+                    table = table.filter(pc.less(table["block_number"], block_number))
+                    if len(table) > 0:
+                        cut = self._partition_path(event, start, block_number - 1)
+                        if os.path.exists(cut):
+                            table = _sorted(
+                                pa.concat_tables([self._read_table(cut), table])
+                            )
+                        self._write_table(cut, table)
+                os.remove(path)
+
+    def discard(self, block_number: int):
+        """
+        Drops every partition that ends after `block_number`, whole.
+        """
+        # NOTE: Partitions are only written up to the block of the next checkpoint, so
+        #       these are all from a run that stopped before it, even their rows from
+        #       before `block_number` (e.g. a backfilled Vault's)
+        for event in self.events:
+            for start, end, path in self.partitions(event):
+                if end > block_number:
+                    os.remove(path)
+
+    def load_checkpoint(self) -> Dict:
+        path = os.path.join(self.path, CHECKPOINT)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def save_checkpoint(self, checkpoint: Dict):
+        def write(tmp):
+            with open(tmp, "w") as f:
+                json.dump(checkpoint, f)
+
+        self._replace(os.path.join(self.path, CHECKPOINT), write)
@@ -1,14 +1,30 @@
-from brownie import accounts, network, interface, Vault, Token
-from brownie.network.gas.strategies import GasNowScalingStrategy
+import asyncio
+from brownie import accounts, network, project, KeeperRouter, Registry, Wei
 from decimal import Decimal
 from eth_utils import is_checksum_address
+import json
+import os
 import requests
-from time import sleep
+from time import sleep, time
 
+from scripts.keeper.backoff import CircuitBreaker, classify
+from scripts.keeper.cache import GasEstimateCache
+from scripts.keeper.discovery import RegistryIndex, StrategyIndex
+from scripts.keeper.engine import GAS_BUFFER, Keeper
+from scripts.keeper.events import BlockWatcher
+from scripts.keeper.fees import BaseFeeGate, FeeHistoryScalingStrategy
+from scripts.keeper.metrics import load_metrics
+from scripts.keeper.multicall import load_multicall
+from scripts.keeper.router import Router
+from scripts.keeper.scheduler import GasBudget, Scheduler
+from scripts.keeper.shards import Coordinator, ShardedRegistryIndex
+from scripts.keeper.simulation import Simulator
+from scripts.keeper.state import load_state
+from scripts.keeper.transactions import TransactionPipeline
 
-GAS_BUFFER = 1.2
 
-gas_strategy = GasNowScalingStrategy()
+# NOTE: Priced from `eth_feeHistory` on the connected node
+gas_strategy = FeeHistoryScalingStrategy()
 
 
 def get_address(msg: str) -> str:
@@ -19,48 +35,318 @@ def get_address(msg: str) -> str:
         print(f"I'm sorry, but '{addr}' is not a checksummed address")
 
 
-def main():
+def setup():
     print(f"You are using the '{network.show_active()}' network")
     bot = accounts.load("bot")
     print(f"You are using: 'bot' [{bot.address}]")
-    # TODO: Allow adding/removing strategies during operation
-    strategies = [interface.StrategyAPI(get_address("Strategy to farm: "))]
-    while input("Add another strategy? (y/[N]): ").lower() == "y":
-        strategies.append(interface.StrategyAPI(get_address("Strategy to farm: ")))
-
-    vault = Vault.at(strategies[0].vault())
-    want = Token.at(vault.token())
-
-    for strategy in strategies:
-        assert (
-            strategy.keeper() == bot.address
-        ), "Bot is not set as keeper! [{strategy.address}]"
-        assert (
-            strategy.vault() == vault.address
-        ), f"Vault mismatch! [{strategy.address}]"
+    return bot
+
+
+def load_index(bot) -> StrategyIndex:
+    index = StrategyIndex(bot.address)
+    while True:
+        strategy = get_address("Strategy to farm: ")
+        assert index.add(strategy), f"Bot is not set as keeper! [{strategy}]"
+        if input("Add another strategy? (y/[N]): ").lower() != "y":
+            return index
+
+
+def load_registry_index(bot, state=None, keeper=None) -> RegistryIndex:
+    # NOTE: `keeper` is who strategies must have as keeper, the bot by default
+    registry = Registry.at(get_address("Vault Registry: "))
+    index = RegistryIndex(keeper or bot.address, registry)
+    last_block = state.get("index_last_block") if state else None
+    if last_block is not None:
+        # NOTE: Only the logs since the last run are read, by the first `refresh`
+        index.restore(state.load_entries())
+        index.last_block = last_block
+        print(f"Resumed {len(index)} strategies in {len(index.vaults)} Vaults")
+        return index
+
+    index.load()
+    if state:
+        state.save_index(index, list(index))
+    print(f"Found {len(index)} strategies in {len(index.vaults)} Vaults")
+    return index
+
+
+def load_prices():
+    # NOTE: JSON object of `want` address => price in ETH of one whole token
+    path = input("Token prices file (empty for none): ")
+    if not path:
+        return {}
+    with open(path) as f:
+        return {token: Wei(f"{price} ether") for token, price in json.load(f).items()}
+
+
+def load_scheduler(multicall, state=None) -> Scheduler:
+    def ether(msg: str):
+        amount = input(msg)
+        return Wei(f"{amount} ether") if amount else None
+
+    budget = GasBudget(
+        per_block=ether("Gas budget per block in ETH (empty for none): "),
+        per_hour=ether("Gas budget per hour in ETH (empty for none): "),
+    )
+    if state:
+        budget.restore(state.gas_spent_since(time() - 3600))
+    return Scheduler(budget=budget, prices=load_prices(), multicall=multicall)
+
+
+def load_keeper(
+    bot,
+    index,
+    multicall=None,
+    state=None,
+    router=None,
+    gas_cache: bool = False,
+    base_fee_gate: bool = False,
+    pipeline: bool = False,
+    scheduler: bool = False,
+    simulator: bool = False,
+    stats=None,
+    worker_id=None,
+) -> Keeper:
+    # NOTE: Every mode only differs by the features it turns on, the rest (the
+    #       circuit breaker, metrics and the state they persist to) is the same
+    # NOTE: A worker of `main_sharded` shares `state` with the others, and the
+    #       coordinator owns the index, so only what is keyed by strategy or
+    #       account is saved to it
+    worker = worker_id is not None
+    return Keeper(
+        bot,
+        index,
+        gas_strategy,
+        multicall=multicall,
+        gas_cache=GasEstimateCache(store=state) if gas_cache else None,
+        pipeline=(
+            TransactionPipeline(bot, gas_strategy, store=state) if pipeline else None
+        ),
+        scheduler=load_scheduler(multicall, state) if scheduler else None,
+        simulator=Simulator(bot.address, prices=load_prices()) if simulator else None,
+        router=router,
+        base_fee_gate=(
+            BaseFeeGate(gas_strategy.history, multicall=multicall)
+            if base_fee_gate
+            else None
+        ),
+        breaker=CircuitBreaker(store=state),
+        stats=stats,
+        # NOTE: The coordinator doesn't serve metrics, so workers start at +1
+        metrics=load_metrics(port_offset=worker_id + 1 if worker else 0),
+        state=None if worker else state,
+    )
+
+
+def main_async():
+    # NOTE: Same decision logic as `main`, but every strategy is evaluated
+    #       concurrently, use `brownie run keep main_async`
+    bot = setup()
+    keeper = load_keeper(bot, load_index(bot))
+    asyncio.run(keeper.run())
+
+
+def main_multicall():
+    # NOTE: Like `main_async`, but all view calls for every strategy are batched
+    #       into one `eth_call` per pass, use `brownie run keep main_multicall`
+    bot = setup()
+    index = load_index(bot)
+    multicall = load_multicall(deployer=bot)
+    print(f"You are using Multicall [{multicall.address}]")
+    keeper = load_keeper(bot, index, multicall)
+    asyncio.run(keeper.run())
+
+
+def main_blocks():
+    # NOTE: Wakes up on new blocks instead of sleeping a fixed 60 seconds, and only
+    #       re-evaluates strategies whose Vault logged a StrategyReported, Deposit
+    #       or Withdraw event (or which are stale), use `brownie run keep main_blocks`
+    # NOTE: Gas estimates are cached until the strategy's state changes
+    # NOTE: `harvestTrigger` isn't called when the strategy's `BaseFeeOracle` would
+    #       reject the current base fee anyway
+    # NOTE: With `KEEPER_STATE` set, a restart resumes from the last run's state
+    bot = setup()
+    state = load_state()
+    index = load_index(bot)
+    multicall = load_multicall(deployer=bot)
+    keeper = load_keeper(
+        bot, index, multicall, state, gas_cache=True, base_fee_gate=True
+    )
+    asyncio.run(keeper.run_on_blocks(BlockWatcher(store=state)))
+
+
+def main_registry():
+    # NOTE: Like `main_blocks`, but strategies are discovered from every endorsed
+    #       Vault in the Registry, and added/dropped live as Vaults and strategies
+    #       come and go, use `brownie run keep main_registry`
+    bot = setup()
+    state = load_state()
+    index = load_registry_index(bot, state)
+    multicall = load_multicall(deployer=bot)
+    keeper = load_keeper(
+        bot, index, multicall, state, gas_cache=True, base_fee_gate=True
+    )
+    asyncio.run(keeper.run_on_blocks(BlockWatcher(store=state)))
+
+
+def main_pipeline():
+    # NOTE: Like `main_registry`, but calls are submitted without waiting for them
+    #       to be mined, so many `harvest`/`tend` calls can be in flight at once
+    #       (stuck ones are sped up), use `brownie run keep main_pipeline`
+    bot = setup()
+    state = load_state()
+    index = load_registry_index(bot, state)
+    multicall = load_multicall(deployer=bot)
+    keeper = load_keeper(
+        bot,
+        index,
+        multicall,
+        state,
+        gas_cache=True,
+        base_fee_gate=True,
+        pipeline=True,
+    )
+    asyncio.run(keeper.run_on_blocks(BlockWatcher(store=state)))
+
+
+def main_scheduled():
+    # NOTE: Like `main_pipeline`, but calls are made by expected benefit per wei
+    #       of gas (best first), and only as long as they fit in the gas budget,
+    #       use `brownie run keep main_scheduled`
+    bot = setup()
+    state = load_state()
+    index = load_registry_index(bot, state)
+    multicall = load_multicall(deployer=bot)
+    keeper = load_keeper(
+        bot,
+        index,
+        multicall,
+        state,
+        gas_cache=True,
+        base_fee_gate=True,
+        pipeline=True,
+        scheduler=True,
+    )
+    asyncio.run(keeper.run_on_blocks(BlockWatcher(store=state)))
+
+
+def main_simulated():
+    # NOTE: Like `main_pipeline`, but every `harvest` is dry-run against the
+    #       pending block first, and only submitted if it wouldn't revert (e.g.
+    #       on `!healthcheck`) and its profit is worth the gas,
+    #       use `brownie run keep main_simulated`
+    bot = setup()
+    state = load_state()
+    index = load_registry_index(bot, state)
+    multicall = load_multicall(deployer=bot)
+    keeper = load_keeper(
+        bot,
+        index,
+        multicall,
+        state,
+        gas_cache=True,
+        base_fee_gate=True,
+        pipeline=True,
+        simulator=True,
+    )
+    asyncio.run(keeper.run_on_blocks(BlockWatcher(store=state)))
+
+
+def main_router():
+    # NOTE: Like `main_scheduled`, but the due calls are packed into as few
+    #       `KeeperRouter` transactions as fit in its gas limit, so the base cost
+    #       is paid once per batch and each Vault's storage stays warm across its
+    #       strategies. The router must be the keeper of every strategy, and the
+    #       bot authorized on it, use `brownie run keep main_router`
+    bot = setup()
+    router = Router(KeeperRouter.at(get_address("Keeper router: ")))
+    assert router.contract.authorizedAddresses(bot) or (
+        router.contract.governance() == bot.address
+    ), f"Bot is not authorized on the router! [{router.address}]"
+    state = load_state()
+    index = load_registry_index(bot, state, keeper=router.address)
+    multicall = load_multicall(deployer=bot)
+    keeper = load_keeper(
+        bot,
+        index,
+        multicall,
+        state,
+        router=router,
+        gas_cache=True,
+        base_fee_gate=True,
+        scheduler=True,
+    )
+    asyncio.run(keeper.run_on_blocks(BlockWatcher(store=state)))
+
+
+def main_sharded():
+    # NOTE: Splits the strategies of the Registry across several keeper accounts,
+    #       each one run by its own worker process (like `main_pipeline`), and
+    #       rebalances them by gas spent and calls made, use
+    #       `brownie run keep main_sharded`
+    print(f"You are using the '{network.show_active()}' network")
+    ids = input("Keeper accounts (comma separated, default 'bot'): ") or "bot"
+    bots = [accounts.load(id.strip()) for id in ids.split(",")]
+    for bot in bots:
+        print(f"You are using: [{bot.address}]")
+
+    registry = Registry.at(get_address("Vault Registry: "))
+    index = ShardedRegistryIndex([bot.address for bot in bots], registry)
+    index.load()
+    print(f"Found {len(index)} strategies in {len(index.vaults)} Vaults")
+
+    # NOTE: Workers inherit the environment, so they all share this Multicall
+    os.environ["MULTICALL_ADDRESS"] = load_multicall(deployer=bots[0]).address
+    coordinator = Coordinator(
+        index,
+        bots,
+        network.show_active(),
+        str(project.get_loaded_projects()[0]._path),
+    )
+    coordinator.run()
+
+
+def main():
+    bot = setup()
+    index = load_index(bot)
+    # NOTE: Strategies that keep failing are left alone for a while
+    breaker = CircuitBreaker(store=load_state())
+
+    def failed(strategy, exc):
+        failure = classify(str(exc))
+        health = breaker.record_failure(strategy.address, failure, str(exc))
+        delay = health.retry_at - time()
+        print(
+            f"[{strategy.address}] Failed ({failure.value}), on hold for {delay:.0f}s"
+        )
 
     while True:
         starting_balance = bot.balance()
+        # NOTE: Read even if every strategy is on hold, for the balance check
+        starting_gas_price = next(gas_strategy.get_gas_price())
 
         calls_made = 0
         total_gas_estimate = 0
-        for strategy in strategies:
+        for entry in index:
+            strategy, vault = entry.strategy, entry.vault
+            if not breaker.allowed(strategy.address):
+                continue
             # Display some relevant statistics
-            symbol = want.symbol()
-            credit = vault.creditAvailable(strategy) / 10 ** vault.decimals()
+            symbol = entry.symbol
+            credit = vault.creditAvailable(strategy) / 10**entry.decimals
             print(f"[{strategy.address}] Credit Available: {credit:0.3f} {symbol}")
-            debt = vault.debtOutstanding(strategy) / 10 ** vault.decimals()
+            debt = vault.debtOutstanding(strategy) / 10**entry.decimals
             print(f"[{strategy.address}] Debt Outstanding: {debt:0.3f} {symbol}")
 
-            starting_gas_price = next(gas_strategy.get_gas_price())
-
+            estimate_error = None
             try:
                 tend_gas_estimate = int(
                     GAS_BUFFER * strategy.tend.estimate_gas({"from": bot})
                 )
                 total_gas_estimate += tend_gas_estimate
-            except ValueError:
+            except ValueError as exc:
                 print(f"[{strategy.address}] `tend` estimate fails")
+                estimate_error = exc
                 tend_gas_estimate = None
 
             try:
@@ -68,18 +354,26 @@ def main():
                     GAS_BUFFER * strategy.harvest.estimate_gas({"from": bot})
                 )
                 total_gas_estimate += harvest_gas_estimate
-            except ValueError:
+            except ValueError as exc:
                 print(f"[{strategy.address}] `harvest` estimate fails")
+                estimate_error = estimate_error or exc
                 harvest_gas_estimate = None
 
+            # NOTE: A single failure per pass, and no call once it's on hold
+            if estimate_error:
+                failed(strategy, estimate_error)
+                continue
+
             if harvest_gas_estimate and strategy.harvestTrigger(
                 harvest_gas_estimate * starting_gas_price
             ):
                 try:
                     strategy.harvest({"from": bot, "gas_price": gas_strategy})
                     calls_made += 1
-                except:
+                    breaker.record_success(strategy.address)
+                except Exception as exc:
                     print(f"[{strategy.address}] `harvest` call fails")
+                    failed(strategy, exc)
 
             elif tend_gas_estimate and strategy.tendTrigger(
                 tend_gas_estimate * starting_gas_price
@@ -87,8 +381,10 @@ def main():
                 try:
                     strategy.tend({"from": bot, "gas_price": gas_strategy})
                     calls_made += 1
-                except:
+                    breaker.record_success(strategy.address)
+                except Exception as exc:
                     print(f"[{strategy.address}] `tend` call fails")
+                    failed(strategy, exc)
 
         # Check running 10 `tend`s & `harvest`s per strategy at estimated gas price
         # would empty the balance of the bot account
@@ -0,0 +1,152 @@
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, Optional
+
+
+class Failure(Enum):
+    HEALTHCHECK = "healthcheck"  # `!healthcheck`, profit or loss out of bounds
+    BASE_FEE = "base_fee"  # Priced under the base fee, not the strategy's fault
+    KEEPER_AUTH = "keeper_auth"  # We aren't allowed to call it (anymore)
+    VAULT_SHUTDOWN = "vault_shutdown"  # Its Vault is in emergency shutdown
+    REVERT = "revert"  # Any other revert
+    ERROR = "error"  # Didn't even get to run, e.g. the node is down
+
+
+@dataclass(frozen=True)
+class Policy:
+    base_delay: float  # seconds before the first retry, doubled on every failure
+    max_delay: float  # seconds
+    trip_after: Optional[int]  # Failures in a row that open the circuit, if ever
+
+
+POLICIES = {
+    # NOTE: Clears by itself once the profit/loss settles, or needs governance
+    Failure.HEALTHCHECK: Policy(600, 6 * 3600, 3),
+    Failure.BASE_FEE: Policy(60, 60, None),
+    # NOTE: Nothing changes until governance or the strategist step in
+    Failure.KEEPER_AUTH: Policy(3600, 24 * 3600, 1),
+    Failure.VAULT_SHUTDOWN: Policy(3600, 24 * 3600, 1),
+    Failure.REVERT: Policy(60, 24 * 3600, 5),
+    Failure.ERROR: Policy(15, 600, None),
+}
+OPEN_DURATION = 6 * 3600  # seconds the circuit stays open the first time
+MAX_OPEN_DURATION = 7 * 24 * 3600
+
+REASONS = {
+    Failure.HEALTHCHECK: ("!healthcheck",),
+    Failure.BASE_FEE: (
+        "base fee",
+        "basefee",
+        "fee cap less than block base fee",
+        "underpriced",
+    ),
+    Failure.KEEPER_AUTH: ("!authorized", "!keeper", "!keepers"),
+    Failure.VAULT_SHUTDOWN: ("shutdown",),
+}
+
+
+def classify(message: Optional[str]) -> Failure:
+    """
+    Classifies a failed call (or gas estimate) from its error message, which
+    carries the revert reason if there is one.
+
+    NOTE: `onlyKeepers` and most of `Vault.report` revert without a reason, so
+          those are a plain `REVERT` here (see `Keeper._record_failure`).
+    """
+    text = (message or "").lower()
+    for failure, reasons in REASONS.items():
+        if any(reason in text for reason in reasons):
+            return failure
+    if "revert" in text:
+        return Failure.REVERT
+    return Failure.ERROR
+
+
+@dataclass
+class StrategyHealth:
+    failures: int = 0  # In a row
+    failure: Optional[Failure] = None  # The last one
+    reason: Optional[str] = None
+    retry_at: float = 0  # unix timestamp
+    circuit_open: bool = False
+    trips: int = 0  # Times the circuit opened in a row
+
+
+class CircuitBreaker:
+    """
+    Keeps the keeper away from strategies that keep failing.
+
+    Every failed call or gas estimate of a strategy puts it on hold for an
+    exponentially growing delay, depending on why it failed (see `POLICIES`).
+    After `Policy.trip_after` failures in a row the circuit opens, and the
+    strategy is left alone for `open_duration` (doubled every time it opens
+    again). Once the delay is over, the strategy is tried again, and a single
+    failure puts it right back on hold. A mined call closes the circuit.
+
+    Strategies on hold aren't evaluated at all, so they cost no RPC calls and no
+    gas. If `store` is given, all of it survives a restart (see `StateStore`).
+    """
+
+    def __init__(
+        self,
+        policies: Optional[Dict[Failure, Policy]] = None,
+        open_duration: float = OPEN_DURATION,
+        max_open_duration: float = MAX_OPEN_DURATION,
+        store=None,
+    ):
+        self.policies = {**POLICIES, **(policies or {})}
+        self.open_duration = open_duration
+        self.max_open_duration = max_open_duration
+        self.store = store
+        self.health: Dict[str, StrategyHealth] = {}
+        self._lock = threading.Lock()
+        if store:
+            self.health = store.load_health()
+
+    def allowed(self, strategy: str, now: Optional[float] = None) -> bool:
+        health = self.health.get(strategy)
+        now = time.time() if now is None else now
+        return health is None or now >= health.retry_at
+
+    def record_failure(
+        self,
+        strategy: str,
+        failure: Failure,
+        reason: Optional[str] = None,
+        now: Optional[float] = None,
+    ) -> StrategyHealth:
+        now = time.time() if now is None else now
+        policy = self.policies[failure]
+        with self._lock:
+            health = self.health.setdefault(strategy, StrategyHealth())
+            if not health.circuit_open and now >= health.retry_at + policy.max_delay:
+                # NOTE: Healthy for long enough, the old failures don't count
+                health.failures = 0
+            health.failures += 1
+            health.failure = failure
+            health.reason = reason
+
+            if policy.trip_after is not None and health.failures >= policy.trip_after:
+                health.circuit_open = True
+                health.trips += 1
+                delay = min(
+                    self.open_duration * 2 ** (health.trips - 1),
+                    self.max_open_duration,
+                )
+            else:
+                delay = min(
+                    policy.base_delay * 2 ** (health.failures - 1), policy.max_delay
+                )
+            health.retry_at = now + delay
+
+        if self.store:
+            self.store.save_health(strategy, health)
+        return health
+
+    def record_success(self, strategy: str):
+        with self._lock:
+            health = self.health.pop(strategy, None)
+        if health and self.store:
+            self.store.delete_health(strategy)
@@ -0,0 +1,83 @@
+import time
+from typing import Dict, Optional, Tuple
+
+
+DEFAULT_TTL = 10 * 60  # seconds, estimates barely move between blocks
+FAILURE_TTL = 60  # seconds, failed estimates are retried sooner
+MISSING = object()  # Sentinel for a cache miss (`None` is a cached failure)
+
+
+def debt_bucket(debt_outstanding: int) -> int:
+    # NOTE: Bucket by order of magnitude (in bits), the amount of debt to pay back
+    #       only changes the gas cost of `harvest` when it crosses into a different
+    #       code path, not when it moves by a few wei
+    return debt_outstanding.bit_length()
+
+
+class GasEstimateCache:
+    """
+    Caches `estimate_gas` results per strategy.
+
+    Entries are keyed on the strategy state that changes the gas cost of `tend`
+    and `harvest` (`totalDebt`, `emergencyExit` and the `debtOutstanding` bucket),
+    so any change to those is a miss. Entries also expire after `ttl` seconds, and
+    all entries of a strategy are dropped with `invalidate` when it reports.
+
+    If `store` is given, entries are saved to it and the ones that haven't
+    expired yet are loaded back on startup (see `StateStore`).
+    """
+
+    def __init__(
+        self, ttl: float = DEFAULT_TTL, failure_ttl: float = FAILURE_TTL, store=None
+    ):
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self.store = store
+        # NOTE: Only the latest state matters (older keys can never hit again), so
+        #       just one entry is kept per strategy and method
+        self._entries: Dict[str, Dict[str, Tuple[Tuple, Optional[int], float]]] = {}
+        self.hits = 0
+        self.misses = 0
+        if store:
+            self._restore()
+
+    def _restore(self):
+        # NOTE: Expiry is kept in wall clock time on disk, `time.monotonic` has
+        #       no meaning across restarts
+        offset = time.monotonic() - time.time()
+        for strategy, key, gas_estimate, expires_at in self.store.load_gas_estimates():
+            self._entries.setdefault(strategy, {})[key[0]] = (
+                key,
+                gas_estimate,
+                expires_at + offset,
+            )
+
+    @staticmethod
+    def key(
+        method_name: str, total_debt: int, emergency_exit: bool, debt_outstanding: int
+    ) -> Tuple:
+        return (method_name, total_debt, emergency_exit, debt_bucket(debt_outstanding))
+
+    def get(self, strategy: str, key: Tuple):
+        entry = self._entries.get(strategy, {}).get(key[0])
+        if entry is None or entry[0] != key or entry[2] < time.monotonic():
+            self.misses += 1
+            return MISSING
+
+        self.hits += 1
+        return entry[1]
+
+    def put(self, strategy: str, key: Tuple, gas_estimate: Optional[int]):
+        ttl = self.ttl if gas_estimate is not None else self.failure_ttl
+        self._entries.setdefault(strategy, {})[key[0]] = (
+            key,
+            gas_estimate,
+            time.monotonic() + ttl,
+        )
+        if self.store:
+            self.store.save_gas_estimate(strategy, key, gas_estimate, time.time() + ttl)
+
+    def invalidate(self, strategy: str):
+        self._entries.pop(strategy, None)
+        if self.store:
+            self.store.delete_gas_estimates(strategy)
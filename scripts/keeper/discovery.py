@@ -0,0 +1,241 @@
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from brownie import Contract, Registry, Token, Vault, ZERO_ADDRESS, interface, web3
+from eth_utils import to_checksum_address
+from hexbytes import HexBytes
+
+
+MAXIMUM_STRATEGIES = 20  # See `Vault.MAXIMUM_STRATEGIES`
+MAX_BLOCK_RANGE = 10_000  # Largest `eth_getLogs` range most providers allow
+
+# NOTE: `BaseStrategy` getters the keeper reads on top of `StrategyAPI`, kept out
+#       of `StrategyAPI` since no contract needs them
+KEEPER_VIEWS = [
+    {
+        "name": name,
+        "type": "function",
+        "stateMutability": "view",
+        "inputs": [],
+        "outputs": [{"name": "", "type": type_}],
+    }
+    for name, type_ in (("emergencyExit", "bool"), ("baseFeeOracle", "address"))
+]
+
+
+def strategy_at(address: str):
+    return Contract.from_abi(
+        "Strategy", address, interface.StrategyAPI.abi + KEEPER_VIEWS
+    )
+
+
+@dataclass
+class StrategyEntry:
+    strategy: object
+    vault: object
+    want: object
+    symbol: str
+    decimals: int
+    retiring: bool = False  # Revoked, but still has debt to pay back
+
+    @property
+    def address(self) -> str:
+        return self.strategy.address
+
+
+class StrategyIndex:
+    """
+    The set of strategies the keeper works on, along with the Vault and `want`
+    token each of them belongs to. Strategies may span many Vaults and tokens.
+
+    Only strategies that have `keeper` set as their keeper are ever added, since
+    nobody else can call `harvest`/`tend` on them.
+    """
+
+    def __init__(self, keeper: str):
+        self.keeper = keeper
+        self.entries: Dict[str, StrategyEntry] = {}
+        self._vaults: Dict[str, Tuple] = {}  # Vault => (vault, want, symbol, decimals)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[StrategyEntry]:
+        return iter(list(self.entries.values()))
+
+    def __contains__(self, strategy: str) -> bool:
+        return strategy in self.entries
+
+    def __getitem__(self, strategy: str) -> StrategyEntry:
+        return self.entries[strategy]
+
+    @property
+    def vaults(self) -> List:
+        return [vault for vault, *_ in self._vaults.values()]
+
+    def _load_vault(self, address: str) -> Tuple:
+        if address not in self._vaults:
+            vault = Vault.at(address)
+            want = Token.at(vault.token())
+            self._vaults[address] = (vault, want, want.symbol(), vault.decimals())
+        return self._vaults[address]
+
+    def add(self, address: str) -> Optional[StrategyEntry]:
+        if address in self.entries:
+            return self.entries[address]
+
+        strategy = strategy_at(address)
+        vault, want, symbol, decimals = self._load_vault(strategy.vault())
+        if not self._is_authorized(strategy, vault):
+            print(f"[{address}] Bot is not set as keeper, skipping")
+            return None
+
+        entry = StrategyEntry(strategy, vault, want, symbol, decimals)
+        self.entries[address] = entry
+        print(f"[{address}] Added strategy for {symbol} Vault [{vault.address}]")
+        return entry
+
+    def _is_authorized(self, strategy, vault) -> bool:
+        return strategy.keeper() == self.keeper
+
+    def is_authorized(self, entry: StrategyEntry) -> bool:
+        """
+        Whether `entry` may still be called, as read from the chain now (e.g. to
+        tell why a call reverted without a reason).
+        """
+        return self._is_authorized(entry.strategy, entry.vault)
+
+    def restore(self, rows: List[Tuple]) -> List[StrategyEntry]:
+        """
+        Adds back the entries saved by a previous run (see `StateStore`), without
+        reading anything but the contracts' code from the chain.
+
+        NOTE: Nothing is checked again, a strategy whose keeper changed meanwhile
+              only fails its gas estimates until it is removed.
+        """
+        restored = []
+        for address, vault, want, symbol, decimals, retiring in rows:
+            if vault not in self._vaults:
+                self._vaults[vault] = (
+                    Vault.at(vault),
+                    Token.at(want),
+                    symbol,
+                    decimals,
+                )
+            vault, want, symbol, decimals = self._vaults[vault]
+            entry = StrategyEntry(
+                strategy_at(address), vault, want, symbol, decimals, retiring
+            )
+            self.entries[address] = entry
+            restored.append(entry)
+        return restored
+
+    def remove(self, address: str) -> Optional[StrategyEntry]:
+        entry = self.entries.pop(address, None)
+        if entry:
+            print(f"[{address}] Removed strategy")
+        return entry
+
+    def refresh(self) -> Tuple[List[StrategyEntry], List[StrategyEntry]]:
+        # NOTE: A fixed set of strategies never changes
+        return [], []
+
+
+class RegistryIndex(StrategyIndex):
+    """
+    Discovers every strategy of every endorsed Vault in `registry`, and keeps up
+    with new Vaults and strategies while running.
+
+    `load` does the one-time scan (`Registry.tokens`/`vaults` and each Vault's
+    `withdrawalQueue`). After that, `refresh` only reads the logs emitted since
+    the last call (`NewVault` from the Registry, `StrategyAdded`,
+    `StrategyMigrated` and `StrategyRevoked` from the Vaults), so each refresh
+    costs O(new events) instead of a rescan.
+    """
+
+    def __init__(self, keeper: str, registry, max_block_range: int = MAX_BLOCK_RANGE):
+        super().__init__(keeper)
+        self.registry = registry
+        self.max_block_range = max_block_range
+        self.last_block = 0
+        self._topics = {
+            Registry.topics["NewVault"]: self._on_new_vault,
+            Vault.topics["StrategyAdded"]: self._on_strategy_added,
+            Vault.topics["StrategyMigrated"]: self._on_strategy_migrated,
+            Vault.topics["StrategyRevoked"]: self._on_strategy_revoked,
+        }
+
+    def _add_vault(self, address: str) -> List[StrategyEntry]:
+        vault, *_ = self._load_vault(address)
+        added = []
+        for idx in range(MAXIMUM_STRATEGIES):
+            strategy = vault.withdrawalQueue(idx)
+            if strategy == ZERO_ADDRESS:
+                break
+            entry = self.add(strategy)
+            if entry:
+                added.append(entry)
+        return added
+
+    def load(self) -> List[StrategyEntry]:
+        # NOTE: Anything that happens from this block on is picked up by `refresh`
+        self.last_block = web3.eth.block_number
+        added = []
+        for token_idx in range(self.registry.numTokens()):
+            token = self.registry.tokens(token_idx)
+            for vault_idx in range(self.registry.numVaults(token)):
+                added.extend(self._add_vault(self.registry.vaults(token, vault_idx)))
+        return added
+
+    def _on_new_vault(self, log, added, removed):
+        # NOTE: `vault` is the first non-indexed argument
+        added.extend(self._add_vault(to_checksum_address(HexBytes(log["data"])[12:32])))
+
+    def _on_strategy_added(self, log, added, removed):
+        entry = self.add(to_checksum_address(log["topics"][1][-20:]))
+        if entry:
+            added.append(entry)
+
+    def _on_strategy_migrated(self, log, added, removed):
+        entry = self.remove(to_checksum_address(log["topics"][1][-20:]))
+        if entry:
+            removed.append(entry)
+        entry = self.add(to_checksum_address(log["topics"][2][-20:]))
+        if entry:
+            added.append(entry)
+
+    def _on_strategy_revoked(self, log, added, removed):
+        address = to_checksum_address(log["topics"][1][-20:])
+        if address in self.entries:
+            # NOTE: A revoked strategy still needs to be harvested to pay back its
+            #       debt, so it is only dropped once that is done (see `refresh`)
+            self.entries[address].retiring = True
+
+    def refresh(self) -> Tuple[List[StrategyEntry], List[StrategyEntry]]:
+        added: List[StrategyEntry] = []
+        removed: List[StrategyEntry] = []
+        head = web3.eth.block_number
+        while self.last_block < head:
+            to_block = min(head, self.last_block + self.max_block_range)
+            logs = web3.eth.get_logs(
+                {
+                    "address": [self.registry.address] + list(self._vaults),
+                    "fromBlock": self.last_block + 1,
+                    "toBlock": to_block,
+                    "topics": [list(self._topics)],
+                }
+            )
+            # NOTE: A Vault added in this range is fully scanned by `_add_vault`,
+            #       so it doesn't matter that its own logs aren't part of this query
+            for log in logs:
+                self._topics[log["topics"][0].hex()](log, added, removed)
+            self.last_block = to_block
+
+        for entry in self:
+            if (
+                entry.retiring
+                and entry.vault.strategies(entry.strategy).dict()["totalDebt"] == 0
+            ):
+                removed.append(self.remove(entry.address))
+
+        return added, removed
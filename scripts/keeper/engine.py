@@ -0,0 +1,693 @@
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from brownie import accounts
+from brownie.network.transaction import Status
+
+from scripts.keeper.backoff import Failure, classify
+from scripts.keeper.cache import MISSING
+from scripts.keeper.discovery import StrategyEntry
+from scripts.keeper.metrics import call_label
+from scripts.keeper.multicall import GasInputs, fetch_gas_inputs, fetch_snapshots
+from scripts.keeper.simulation import revert_reason
+
+GAS_BUFFER = 1.2
+MAX_WORKERS = 32  # Upper bound on RPC requests in flight at once
+
+
+@dataclass
+class Evaluation:
+    entry: StrategyEntry
+    credit: int
+    debt: int
+    tend_gas_estimate: Optional[int] = None
+    harvest_gas_estimate: Optional[int] = None
+    action: Optional[str] = None  # "harvest", "tend", or `None` if nothing to do
+    evaluated_at: float = field(default_factory=time.time)
+    simulation: Optional[object] = None  # Dry-run of the harvest (see `Simulator`)
+
+    @property
+    def strategy(self):
+        return self.entry.strategy
+
+    @property
+    def gas_estimate(self) -> int:
+        # NOTE: Same accounting as the serial loop, both estimates count towards
+        #       the balance check even though at most one call is made
+        return (self.tend_gas_estimate or 0) + (self.harvest_gas_estimate or 0)
+
+    @property
+    def action_gas_estimate(self) -> Optional[int]:
+        if self.action == "harvest":
+            return self.harvest_gas_estimate
+        elif self.action == "tend":
+            return self.tend_gas_estimate
+        return None
+
+
+def decide(
+    harvest_gas_estimate: Optional[int],
+    harvest_triggered: bool,
+    tend_gas_estimate: Optional[int],
+    tend_triggered: bool,
+) -> Optional[str]:
+    # NOTE: `harvest` always takes precedence over `tend`, and a call is only
+    #       considered if its gas estimate succeeded
+    if harvest_gas_estimate and harvest_triggered:
+        return "harvest"
+    elif tend_gas_estimate and tend_triggered:
+        return "tend"
+    return None
+
+
+class Keeper:
+    """
+    Evaluates every strategy in `index` concurrently on a single event loop.
+
+    The brownie/web3 stack is synchronous, so each RPC round-trip is pushed to a
+    thread pool and awaited. All strategies are evaluated at once, so a full pass
+    costs roughly the latency of the slowest strategy instead of the sum of all.
+
+    If `multicall` is given, all view calls (credit, debt and the triggers) for
+    every strategy are batched into a single `eth_call` per pass instead.
+
+    If `gas_cache` is given, gas estimates are only recomputed when the strategy
+    state they depend on changes (see `GasEstimateCache`).
+
+    Strategies may belong to any number of Vaults, and `index` may add or drop
+    strategies while running (see `RegistryIndex`).
+
+    If `base_fee_gate` is given, `harvestTrigger` isn't called for strategies whose
+    `BaseFeeOracle` rejects the current base fee anyway (see `BaseFeeGate`).
+
+    If `simulator` is given, the harvests the triggers ask for are dry-run first,
+    and only made if they wouldn't revert and are worth it (see `Simulator`).
+
+    If `scheduler` is given, the calls the triggers ask for are made best first,
+    and only as long as they fit in its gas budget (see `Scheduler`).
+
+    If `pipeline` is given, calls are submitted without waiting for them to be
+    mined (see `TransactionPipeline`), and strategies with a call in flight are
+    skipped until it is.
+
+    If `router` is given, the calls are batched into as few `KeeperRouter`
+    transactions as fit in its gas limit (see `Router`). Those are made one at a
+    time and waited for, so it can't be used along with `pipeline`.
+
+    If `breaker` is given, strategies whose calls or gas estimates keep failing
+    are put on hold, and not even evaluated until then (see `CircuitBreaker`).
+
+    If `stats` is given, the gas paid for every mined call is recorded per
+    strategy (see `ShardStats`).
+
+    If `metrics` is given, every RPC round-trip, pass phase and call is measured
+    (see `Metrics`).
+
+    If `state` is given, changes to `index` and every call made are saved to it
+    (see `StateStore`).
+    """
+
+    def __init__(
+        self,
+        bot,
+        index,
+        gas_strategy,
+        multicall=None,
+        gas_cache=None,
+        pipeline=None,
+        scheduler=None,
+        simulator=None,
+        router=None,
+        base_fee_gate=None,
+        breaker=None,
+        stats=None,
+        metrics=None,
+        state=None,
+    ):
+        self.bot = bot
+        self.index = index
+        self.gas_strategy = gas_strategy
+        self.multicall = multicall
+        self.gas_cache = gas_cache
+        self.pipeline = pipeline
+        self.scheduler = scheduler
+        self.simulator = simulator
+        if router and pipeline:
+            raise ValueError("`router` can't be used along with `pipeline`")
+        self.router = router
+        # NOTE: Only the router may call the strategies, so estimate as the router
+        self._caller = accounts.at(router.address, force=True) if router else bot
+        self.base_fee_gate = base_fee_gate
+        self.breaker = breaker
+        self.stats = stats
+        self.metrics = metrics
+        self.state = state
+        self._triggered_at: Dict[str, float] = {}  # Strategy => when it triggered
+        # NOTE: (Strategy, method) => why its gas estimate failed, in this pass
+        self._estimate_errors: Dict[Tuple[str, str], str] = {}
+        self._executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+
+    async def _call(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        call = functools.partial(fn, *args, **kwargs)
+        if self.metrics:
+            # NOTE: Timed in the worker thread, so waiting for one isn't counted
+            call = self.metrics.timed(call, call_label(fn))
+        return await loop.run_in_executor(self._executor, call)
+
+    async def _estimate(self, strategy, method_name: str) -> Optional[int]:
+        method = getattr(strategy, method_name)
+        try:
+            gas = await self._call(method.estimate_gas, {"from": self._caller})
+        except ValueError as exc:
+            print(f"[{strategy.address}] `{method_name}` estimate fails")
+            self._estimate_errors[(strategy.address, method_name)] = str(exc)
+            return None
+        return int(GAS_BUFFER * gas)
+
+    async def _estimate_cached(
+        self, strategy, method_name: str, inputs
+    ) -> Optional[int]:
+        key = self.gas_cache.key(
+            method_name,
+            inputs.total_debt,
+            inputs.emergency_exit,
+            inputs.debt_outstanding,
+        )
+        gas_estimate = self.gas_cache.get(strategy.address, key)
+        if gas_estimate is MISSING:
+            gas_estimate = await self._estimate(strategy, method_name)
+            self.gas_cache.put(strategy.address, key, gas_estimate)
+        return gas_estimate
+
+    async def _estimate_actions(
+        self, entry: StrategyEntry, inputs: Optional[GasInputs] = None
+    ) -> List[Optional[int]]:
+        # NOTE: `tend` then `harvest`, through `gas_cache` if given (with `inputs`)
+        if self.gas_cache:
+            return await asyncio.gather(
+                self._estimate_cached(entry.strategy, "tend", inputs),
+                self._estimate_cached(entry.strategy, "harvest", inputs),
+            )
+        return await asyncio.gather(
+            self._estimate(entry.strategy, "tend"),
+            self._estimate(entry.strategy, "harvest"),
+        )
+
+    async def _estimates(self, entries: List[StrategyEntry]) -> List:
+        gas_inputs = {}
+        if self.gas_cache:
+            gas_inputs = await self._call(fetch_gas_inputs, self.multicall, entries)
+        return await asyncio.gather(
+            *(
+                self._estimate_actions(entry, gas_inputs.get(entry.address))
+                for entry in entries
+            )
+        )
+
+    async def _trigger(self, strategy, method_name: str, gas_estimate, gas_price):
+        if not gas_estimate:
+            return False
+        return await self._call(
+            getattr(strategy, method_name), gas_estimate * gas_price
+        )
+
+    async def evaluate(
+        self, entry: StrategyEntry, gas_price: int, harvest_allowed: bool = True
+    ) -> Evaluation:
+        strategy = entry.strategy
+        if self.gas_cache:
+            credit, debt, params, emergency_exit = await asyncio.gather(
+                self._call(entry.vault.creditAvailable, strategy),
+                self._call(entry.vault.debtOutstanding, strategy),
+                # NOTE: The rest of what `fetch_gas_inputs` reads
+                self._call(entry.vault.strategies, strategy),
+                self._call(strategy.emergencyExit),
+            )
+            inputs = GasInputs(
+                total_debt=params.dict()["totalDebt"],
+                emergency_exit=bool(emergency_exit),
+                debt_outstanding=debt,
+            )
+            estimates = await self._estimate_actions(entry, inputs)
+        else:
+            credit, debt, estimates = await asyncio.gather(
+                self._call(entry.vault.creditAvailable, strategy),
+                self._call(entry.vault.debtOutstanding, strategy),
+                self._estimate_actions(entry),
+            )
+        tend_gas_estimate, harvest_gas_estimate = estimates
+        harvest_triggered, tend_triggered = await asyncio.gather(
+            self._trigger(
+                strategy,
+                "harvestTrigger",
+                harvest_gas_estimate if harvest_allowed else None,
+                gas_price,
+            ),
+            self._trigger(strategy, "tendTrigger", tend_gas_estimate, gas_price),
+        )
+        return Evaluation(
+            entry=entry,
+            credit=credit,
+            debt=debt,
+            tend_gas_estimate=tend_gas_estimate,
+            harvest_gas_estimate=harvest_gas_estimate,
+            action=decide(
+                harvest_gas_estimate,
+                harvest_triggered,
+                tend_gas_estimate,
+                tend_triggered,
+            ),
+        )
+
+    async def evaluate_all(self, gas_price: int, entries=None) -> List[Evaluation]:
+        if entries is None:
+            entries = list(self.index)
+
+        rejected = set()
+        if self.base_fee_gate:
+            rejected = await self._call(self.base_fee_gate.rejected, entries)
+
+        if self.multicall:
+            return await self._evaluate_batched(gas_price, entries, rejected)
+
+        return await asyncio.gather(
+            *(
+                self.evaluate(entry, gas_price, entry.address not in rejected)
+                for entry in entries
+            )
+        )
+
+    async def _evaluate_batched(
+        self, gas_price: int, entries: List[StrategyEntry], rejected=frozenset()
+    ) -> List[Evaluation]:
+        # NOTE: `estimate_gas` can't go through multicall, so those still run
+        #       concurrently (unless cached), everything else is a single
+        #       aggregated `eth_call`
+        estimates = await self._estimates(entries)
+        harvest_call_costs = {
+            entry.address: harvest_gas_estimate * gas_price
+            for entry, (_, harvest_gas_estimate) in zip(entries, estimates)
+            if harvest_gas_estimate and entry.address not in rejected
+        }
+        tend_call_costs = {
+            entry.address: tend_gas_estimate * gas_price
+            for entry, (tend_gas_estimate, _) in zip(entries, estimates)
+            if tend_gas_estimate
+        }
+        snapshots = await self._call(
+            fetch_snapshots,
+            self.multicall,
+            entries,
+            harvest_call_costs,
+            tend_call_costs,
+        )
+
+        return [
+            Evaluation(
+                entry=entry,
+                credit=snapshot.credit,
+                debt=snapshot.debt,
+                tend_gas_estimate=tend_gas_estimate,
+                harvest_gas_estimate=harvest_gas_estimate,
+                action=decide(
+                    harvest_gas_estimate,
+                    snapshot.harvest_triggered,
+                    tend_gas_estimate,
+                    snapshot.tend_triggered,
+                ),
+            )
+            for entry, snapshot, (tend_gas_estimate, harvest_gas_estimate) in zip(
+                entries, snapshots, estimates
+            )
+        ]
+
+    async def execute(self, evaluation: Evaluation) -> bool:
+        strategy = evaluation.strategy
+        method = getattr(strategy, evaluation.action)
+        try:
+            if self.pipeline:
+                await self._call(
+                    self.pipeline.submit,
+                    method,
+                    target=strategy.address,
+                    label=evaluation.action,
+                )
+                self._triggered_at[strategy.address] = evaluation.evaluated_at
+                self._record_call(strategy.address, evaluation.action, "submitted")
+            else:
+                tx = await self._call(
+                    method, {"from": self.bot, "gas_price": self.gas_strategy}
+                )
+                if self.breaker:
+                    if tx.status == Status.Confirmed:
+                        self.breaker.record_success(strategy.address)
+                    else:
+                        await self._call(
+                            self._record_failure, evaluation.entry, "reverted"
+                        )
+                gas_cost = tx.gas_used * tx.gas_price
+                if self.stats:
+                    self.stats.record(strategy.address, gas_cost)
+                self._record_call(
+                    strategy.address,
+                    evaluation.action,
+                    "mined" if tx.status == Status.Confirmed else "reverted",
+                    gas_cost=gas_cost,
+                    triggered_at=evaluation.evaluated_at,
+                )
+        except Exception as exc:
+            print(f"[{strategy.address}] `{evaluation.action}` call fails")
+            self._record_call(strategy.address, evaluation.action, "failed")
+            if self.breaker:
+                await self._call(self._record_failure, evaluation.entry, str(exc))
+            return False
+        return True
+
+    async def execute_batch(self, batch: List[Evaluation]) -> List[Evaluation]:
+        """
+        Makes all calls of `batch` in one `KeeperRouter` transaction, and returns
+        the ones that went through.
+        """
+        try:
+            tx = await self._call(
+                self.router.contract.work,
+                self.router.calls(batch),
+                {
+                    "from": self.bot,
+                    "gas_price": self.gas_strategy,
+                    "gas_limit": self.router.gas_limit_for(batch),
+                },
+            )
+        except Exception as exc:
+            print(f"Router call for {len(batch)} strategies fails")
+            for evaluation in batch:
+                self._record_call(evaluation.entry.address, evaluation.action, "failed")
+                if self.breaker:
+                    await self._call(self._record_failure, evaluation.entry, str(exc))
+            return []
+
+        results = {
+            event["strategy"]: event
+            for event in (tx.events["StrategyCalled"] if tx.status else [])
+        }
+        # NOTE: What isn't spent inside one of the calls is split evenly
+        overhead = tx.gas_used - sum(event["gasUsed"] for event in results.values())
+
+        made = []
+        for evaluation in batch:
+            strategy = evaluation.entry.address
+            event = results.get(strategy)
+            if event is None or not event["success"]:
+                reason = revert_reason(event["reason"]) if event else None
+                print(f"[{strategy}] `{evaluation.action}` call reverted ({reason})")
+                self._record_call(strategy, evaluation.action, "reverted")
+                if self.breaker:
+                    await self._call(
+                        self._record_failure, evaluation.entry, reason or "reverted"
+                    )
+                continue
+
+            gas_cost = (event["gasUsed"] + overhead // len(batch)) * tx.gas_price
+            if self.stats:
+                self.stats.record(strategy, gas_cost)
+            if self.breaker:
+                self.breaker.record_success(strategy)
+            self._record_call(
+                strategy,
+                evaluation.action,
+                "mined",
+                gas_cost=gas_cost,
+                triggered_at=evaluation.evaluated_at,
+            )
+            made.append(evaluation)
+        return made
+
+    def _record_failure(self, entry: StrategyEntry, message: Optional[str]):
+        failure = classify(message)
+        if failure == Failure.REVERT:
+            # NOTE: `onlyKeepers` and a Vault in shutdown revert without a reason,
+            #       so check for them directly
+            if entry.vault.emergencyShutdown():
+                failure = Failure.VAULT_SHUTDOWN
+            elif not self.index.is_authorized(entry):
+                failure = Failure.KEEPER_AUTH
+
+        health = self.breaker.record_failure(entry.address, failure, message)
+        delay = health.retry_at - time.time()
+        status = "circuit open" if health.circuit_open else "backing off"
+        print(f"[{entry.address}] Failed ({failure.value}), {status} for {delay:.0f}s")
+        if self.metrics:
+            self.metrics.log(
+                "failure",
+                strategy=entry.address,
+                failure=failure.value,
+                reason=message,
+                failures=health.failures,
+                circuit_open=health.circuit_open,
+                retry_at=health.retry_at,
+            )
+
+    def _record_call(
+        self,
+        strategy: str,
+        action: str,
+        outcome: str,
+        gas_cost: Optional[int] = None,
+        triggered_at: Optional[float] = None,
+    ):
+        if self.state:
+            self.state.record_call(strategy, action, outcome, gas_cost=gas_cost)
+        if not self.metrics:
+            return
+        self.metrics.calls.inc(strategy=strategy, action=action, outcome=outcome)
+        fields = {}
+        if gas_cost is not None:
+            self.metrics.gas_spent.inc(gas_cost, strategy=strategy, action=action)
+            fields["gas_cost"] = gas_cost
+        if triggered_at is not None:
+            latency = time.time() - triggered_at
+            self.metrics.trigger_to_mined.observe(latency, action=action)
+            fields["trigger_to_mined"] = latency
+        self.metrics.log(
+            "call", strategy=strategy, action=action, outcome=outcome, **fields
+        )
+
+    def report(self, evaluation: Evaluation):
+        # Display some relevant statistics
+        entry = evaluation.entry
+        credit = evaluation.credit / 10**entry.decimals
+        print(f"[{entry.address}] Credit Available: {credit:0.3f} {entry.symbol}")
+        debt = evaluation.debt / 10**entry.decimals
+        print(f"[{entry.address}] Debt Outstanding: {debt:0.3f} {entry.symbol}")
+
+    def report_mined(self, pending):
+        if self.stats and pending.status != Status.Dropped and not pending.cancelled:
+            self.stats.record(pending.target, pending.gas_cost)
+        if self.breaker and not pending.cancelled:
+            if pending.status == Status.Confirmed:
+                self.breaker.record_success(pending.target)
+            elif pending.status == Status.Reverted and pending.target in self.index:
+                self._record_failure(self.index[pending.target], "reverted")
+
+        triggered_at = self._triggered_at.pop(pending.target, None)
+        if pending.status == Status.Dropped:
+            self._record_call(pending.target, pending.label, "dropped")
+        else:
+            self._record_call(
+                pending.target,
+                pending.label,
+                {
+                    Status.Confirmed: "cancelled" if pending.cancelled else "mined",
+                    Status.Reverted: "reverted",
+                }[pending.status],
+                gas_cost=pending.gas_cost,
+                triggered_at=None if pending.cancelled else triggered_at,
+            )
+
+        if pending.status == Status.Confirmed:
+            outcome = "cancelled" if pending.cancelled else "mined"
+            block = pending.block_number
+            print(f"[{pending.target}] `{pending.label}` {outcome} in block {block}")
+        elif pending.status == Status.Reverted:
+            print(f"[{pending.target}] `{pending.label}` call reverted")
+        else:
+            print(f"[{pending.target}] `{pending.label}` call was dropped")
+
+    def _record_phase(self, phase: str, start: float) -> float:
+        now = time.perf_counter()
+        if self.metrics:
+            self.metrics.pass_seconds.observe(now - start, phase=phase)
+        return now
+
+    async def _pass(self, entries: List[StrategyEntry]) -> int:
+        pass_start = phase_start = time.perf_counter()
+        if self.pipeline:
+            for pending in await self._call(self.pipeline.poll):
+                self.report_mined(pending)
+            # NOTE: Their state doesn't change until the call in flight is mined
+            entries = [
+                entry
+                for entry in entries
+                if not self.pipeline.is_pending(entry.address)
+            ]
+
+        if self.breaker:
+            entries = [
+                entry for entry in entries if self.breaker.allowed(entry.address)
+            ]
+        self._estimate_errors.clear()
+
+        starting_balance = self.bot.balance()
+        gas_price = next(self.gas_strategy.get_gas_price())
+
+        phase_start = self._record_phase("prepare", phase_start)
+
+        evaluations = await self.evaluate_all(gas_price, entries)
+        phase_start = self._record_phase("evaluate", phase_start)
+        calls_made = 0
+        total_gas_estimate = 0
+        for evaluation in evaluations:
+            self.report(evaluation)
+            total_gas_estimate += evaluation.gas_estimate
+            if self.metrics:
+                self.metrics.evaluations.inc(strategy=evaluation.entry.address)
+
+        if self.breaker:
+            # NOTE: A single failure per pass, and no call once it's on hold
+            for evaluation in evaluations:
+                for method_name in ("tend", "harvest"):
+                    key = (evaluation.entry.address, method_name)
+                    if key in self._estimate_errors:
+                        await self._call(
+                            self._record_failure,
+                            evaluation.entry,
+                            self._estimate_errors[key],
+                        )
+                        evaluation.action = None
+                        break
+
+        due = [evaluation for evaluation in evaluations if evaluation.action]
+        if self.simulator:
+            simulated = due
+            due = await self._call(self.simulator.filter, due, gas_price)
+            phase_start = self._record_phase("simulate", phase_start)
+            if self.breaker:
+                for evaluation in simulated:
+                    simulation = evaluation.simulation
+                    if simulation and not simulation.success:
+                        await self._call(
+                            self._record_failure,
+                            evaluation.entry,
+                            simulation.revert_reason or "reverted",
+                        )
+        if self.scheduler:
+            due = await self._call(self.scheduler.plan, due, gas_price)
+            phase_start = self._record_phase("plan", phase_start)
+        if self.router:
+            for batch in self.router.pack(due):
+                made = await self.execute_batch(batch)
+                calls_made += len(made)
+                if self.scheduler:
+                    for evaluation in made:
+                        self.scheduler.record(evaluation, gas_price)
+        else:
+            for evaluation in due:
+                if await self.execute(evaluation):
+                    calls_made += 1
+                    if self.scheduler:
+                        self.scheduler.record(evaluation, gas_price)
+        self._record_phase("execute", phase_start)
+
+        # Check running 10 `tend`s & `harvest`s per strategy at estimated gas price
+        # would empty the balance of the bot account
+        if self.bot.balance() < 10 * total_gas_estimate * gas_price:
+            print(f"Need more ether please! {self.bot.address}")
+
+        if calls_made > 0 and self.pipeline:
+            # NOTE: Nothing is paid until the calls are mined
+            print(f"Submitted {calls_made} calls, {len(self.pipeline)} in flight.")
+
+        elif calls_made > 0:
+            gas_cost = (starting_balance - self.bot.balance()) / 10**18
+            num_harvests = self.bot.balance() // (starting_balance - self.bot.balance())
+            print(f"Made {calls_made} calls, spent {gas_cost} ETH on gas.")
+            print(
+                f"At this rate, it'll take {num_harvests} harvests to run out of gas."
+            )
+
+        if self.metrics:
+            self._record_phase("total", pass_start)
+            balance = self.bot.balance()
+            self.metrics.balance.set(balance)
+            if self.pipeline:
+                self.metrics.in_flight.set(len(self.pipeline))
+            self.metrics.log(
+                "pass",
+                seconds=time.perf_counter() - pass_start,
+                evaluated=len(evaluations),
+                due=len(due),
+                calls=calls_made,
+                gas_price=gas_price,
+                balance=balance,
+            )
+
+        return calls_made
+
+    def _apply_index_changes(self, added, removed, watcher=None):
+        if self.state:
+            self.state.save_index(self.index, added, removed)
+        for entry in removed:
+            if self.gas_cache:
+                self.gas_cache.invalidate(entry.address)
+        if watcher:
+            for entry in added:
+                watcher.add_vault(entry.vault)
+
+    async def run(self, sleep_time: int = 60):
+        while True:
+            added, removed = await self._call(self.index.refresh)
+            self._apply_index_changes(added, removed)
+
+            # Wait a minute if we didn't make any calls
+            if await self._pass(list(self.index)) == 0:
+                print(f"Sleeping for {sleep_time} seconds...")
+                await asyncio.sleep(sleep_time)
+
+    async def run_on_blocks(self, watcher, poll_interval: float = 2):
+        """
+        Event-driven loop, wakes up on every new block and only re-evaluates the
+        strategies `watcher` reports as due (see `BlockWatcher`).
+        """
+        for vault in self.index.vaults:
+            watcher.add_vault(vault)
+
+        while True:
+            changes = await self._call(watcher.poll)
+            if changes is None:
+                await asyncio.sleep(poll_interval)
+                continue
+
+            # NOTE: Strategies new to the index have never been evaluated, so
+            #       they are always due
+            added, removed = await self._call(self.index.refresh)
+            self._apply_index_changes(added, removed, watcher)
+
+            if self.gas_cache:
+                # NOTE: A report changes `totalDebt`/`lastReport`, so re-estimate
+                for address in changes.reported:
+                    self.gas_cache.invalidate(address)
+
+            due = watcher.due(
+                {entry.address: entry.vault.address for entry in self.index}, changes
+            )
+            if len(due) == 0:
+                continue
+
+            print(f"Block {changes.block_number}: evaluating {len(due)} strategies")
+            await self._pass([self.index[address] for address in due])
+            watcher.mark_evaluated(due, changes.block_number)
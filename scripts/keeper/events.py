@@ -0,0 +1,108 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+from brownie import Vault, web3
+from eth_utils import to_checksum_address
+
+
+# Vault events that change the inputs of `creditAvailable`/`debtOutstanding`
+# (and therefore the triggers) for the strategies of that Vault
+WATCHED_EVENTS = ("StrategyReported", "Deposit", "Withdraw")
+MAX_STALE_BLOCKS = 25  # ~5 minutes, triggers also depend on `block.timestamp`
+
+
+@dataclass
+class BlockChanges:
+    block_number: int
+    vaults: Set[str] = field(default_factory=set)  # Vaults with watched events
+    reported: Set[str] = field(default_factory=set)  # Strategies that reported
+
+
+class BlockWatcher:
+    """
+    Wakes the keeper on new blocks, and tells it which strategies need to be
+    re-evaluated.
+
+    A strategy is due if one of `WATCHED_EVENTS` was logged by its Vault since
+    the last poll, or if it hasn't been evaluated for `max_stale_blocks` (time
+    based conditions like `maxReportDelay` never emit a log).
+
+    If `store` is given, the last block polled and when each strategy was last
+    evaluated are saved to it, so after a restart only the strategies that are
+    actually due get evaluated instead of all of them (see `StateStore`).
+    """
+
+    def __init__(
+        self,
+        vaults: Iterable = (),
+        max_stale_blocks: int = MAX_STALE_BLOCKS,
+        store=None,
+    ):
+        self.vaults = {vault.address: vault for vault in vaults}
+        self.max_stale_blocks = max_stale_blocks
+        self.store = store
+        self.last_block = web3.eth.block_number
+        self.last_evaluated: Dict[str, int] = {}
+        if store:
+            self.last_evaluated = store.load_evaluated()
+            # NOTE: Every strategy is stale anyway past `max_stale_blocks`, so
+            #       there is no need to read logs older than that
+            head = self.last_block
+            self.last_block = max(
+                min(store.get("watcher_last_block", head), head),
+                head - max_stale_blocks,
+            )
+        self._topics = [Vault.topics[event] for event in WATCHED_EVENTS]
+        self._reported_topic = Vault.topics["StrategyReported"]
+
+    def add_vault(self, vault):
+        self.vaults[vault.address] = vault
+
+    def poll(self) -> Optional[BlockChanges]:
+        head = web3.eth.block_number
+        if head <= self.last_block:
+            return None  # No new block yet
+
+        if len(self.vaults) == 0:
+            self.last_block = head
+            return BlockChanges(block_number=head)
+
+        changes = BlockChanges(block_number=head)
+        logs = web3.eth.get_logs(
+            {
+                "address": list(self.vaults),
+                "fromBlock": self.last_block + 1,
+                "toBlock": head,
+                "topics": [self._topics],
+            }
+        )
+        for log in logs:
+            changes.vaults.add(to_checksum_address(log["address"]))
+            if log["topics"][0].hex() == self._reported_topic:
+                # NOTE: `strategy` is the first indexed argument
+                changes.reported.add(to_checksum_address(log["topics"][1][-20:]))
+
+        self.last_block = head
+        if self.store:
+            self.store.set("watcher_last_block", head)
+        return changes
+
+    def due(self, strategies: Dict[str, str], changes: BlockChanges) -> List[str]:
+        """
+        Returns the strategies (out of a `strategy => vault` mapping) that need
+        to be evaluated for `changes`.
+        """
+        return [
+            strategy
+            for strategy, vault in strategies.items()
+            if vault in changes.vaults
+            or strategy in changes.reported
+            or changes.block_number - self.last_evaluated.get(strategy, 0)
+            >= self.max_stale_blocks
+        ]
+
+    def mark_evaluated(self, strategies: Iterable[str], block_number: int):
+        for strategy in strategies:
+            self.last_evaluated[strategy] = block_number
+        if self.store:
+            self.store.save_evaluated(strategies, block_number)
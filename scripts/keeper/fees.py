@@ -0,0 +1,259 @@
+import time
+from collections import deque
+from dataclasses import dataclass
+from statistics import mean, median
+from typing import Deque, Dict, Generator, List, Optional, Set
+
+from brownie import BaseFeeOracle, Wei, ZERO_ADDRESS, web3
+from brownie.network.gas.bases import BlockGasStrategy
+
+from scripts.keeper.multicall import Batch
+
+FEE_HISTORY_BLOCKS = 20
+MAX_FEE_HISTORY_BLOCKS = 1024  # Largest `eth_feeHistory` range most nodes allow
+PRIORITY_FEE_PERCENTILE = 50
+ORACLE_TTL = 300  # seconds before `BaseFeeOracle` settings are read again
+
+# See EIP-1559
+BASE_FEE_MAX_CHANGE_DENOMINATOR = 8
+ELASTICITY_MULTIPLIER = 2
+
+
+def next_base_fee(base_fee: int, gas_used_ratio: float) -> int:
+    """
+    Base fee of the block after one with `base_fee` that used `gas_used_ratio`
+    of its gas limit (EIP-1559).
+    """
+    target = 1 / ELASTICITY_MULTIPLIER
+    if gas_used_ratio > target:
+        delta = int(base_fee * (gas_used_ratio - target) / target)
+        return base_fee + max(delta // BASE_FEE_MAX_CHANGE_DENOMINATOR, 1)
+    elif gas_used_ratio < target:
+        delta = int(base_fee * (target - gas_used_ratio) / target)
+        return base_fee - delta // BASE_FEE_MAX_CHANGE_DENOMINATOR
+    return base_fee
+
+
+class FeeHistory:
+    """
+    Base fees, gas usage and priority fees of the last `blocks` blocks, read
+    with `eth_feeHistory`.
+
+    `update` only asks the node for the blocks mined since the previous call, so
+    keeping the window current costs one small request per new block.
+    """
+
+    def __init__(
+        self,
+        blocks: int = FEE_HISTORY_BLOCKS,
+        percentile: float = PRIORITY_FEE_PERCENTILE,
+    ):
+        self.blocks = blocks
+        self.percentile = percentile
+        self.reset()
+
+    def reset(self):
+        self.head: Optional[int] = None
+        self.base_fees: Deque[int] = deque(maxlen=self.blocks)
+        self.gas_used_ratios: Deque[float] = deque(maxlen=self.blocks)
+        self.priority_fees: Deque[int] = deque(maxlen=self.blocks)
+        self.pending_base_fee = 0  # Base fee of block `head + 1`
+
+    def update(self) -> int:
+        head = web3.eth.block_number
+        if self.head is not None and head < self.head:
+            self.reset()  # NOTE: Chain was rewound (e.g. a reorg or a test revert)
+        if self.head == head:
+            return head
+
+        count = self.blocks if self.head is None else head - self.head
+        count = min(count, self.blocks, MAX_FEE_HISTORY_BLOCKS, head + 1)
+        history = web3.eth.fee_history(count, head, [self.percentile])
+
+        # NOTE: `baseFeePerGas` has one more entry than the others, the base fee
+        #       of the next block, which the node already knows exactly
+        rewards = history.get("reward") or [[0]] * len(history["gasUsedRatio"])
+        for base_fee, gas_used_ratio, reward in zip(
+            history["baseFeePerGas"], history["gasUsedRatio"], rewards
+        ):
+            self.base_fees.append(base_fee)
+            self.gas_used_ratios.append(gas_used_ratio)
+            self.priority_fees.append(reward[0])
+        self.pending_base_fee = history["baseFeePerGas"][-1]
+        self.head = head
+        return head
+
+    @property
+    def latest_base_fee(self) -> int:
+        return self.base_fees[-1]
+
+    def priority_fee(self) -> int:
+        return int(median(self.priority_fees))
+
+    def predict_base_fee(self, blocks_ahead: int = 1) -> int:
+        """
+        Base fee `blocks_ahead` blocks after `head`. The next block is exact,
+        later ones assume the average gas usage of the window.
+        """
+        base_fee = self.pending_base_fee
+        gas_used_ratio = mean(self.gas_used_ratios)
+        for _ in range(blocks_ahead - 1):
+            base_fee = next_base_fee(base_fee, gas_used_ratio)
+        return base_fee
+
+
+class FeeHistoryScalingStrategy(BlockGasStrategy):
+    """
+    Block based scaling gas strategy priced from a local `FeeHistory`, with the
+    same scaling rules as `GasNowScalingStrategy`.
+
+    The initial gas price is the base fee predicted `blocks_ahead` blocks from
+    now plus the median priority fee paid recently. Every `block_duration`
+    blocks the price is raised to the current initial price or `increment` times
+    the last one, whichever is higher, but never above `max_gas_price`.
+    """
+
+    def __init__(
+        self,
+        history: Optional[FeeHistory] = None,
+        blocks_ahead: int = 2,
+        increment: float = 1.125,
+        block_duration: int = 2,
+        max_gas_price: Wei = None,
+    ):
+        super().__init__(block_duration)
+        self.history = history or FeeHistory()
+        self.blocks_ahead = blocks_ahead
+        self.increment = increment
+        self.max_gas_price = Wei(max_gas_price) or 2**256 - 1
+
+    def _initial_gas_price(self) -> int:
+        self.history.update()
+        return (
+            self.history.predict_base_fee(self.blocks_ahead)
+            + self.history.priority_fee()
+        )
+
+    def get_gas_price(self) -> Generator[int, None, None]:
+        last_gas_price = min(self._initial_gas_price(), self.max_gas_price)
+        yield last_gas_price
+
+        while True:
+            initial_gas_price = self._initial_gas_price()
+            incremented_gas_price = int(last_gas_price * self.increment)
+            new_gas_price = max(initial_gas_price, incremented_gas_price)
+            last_gas_price = min(new_gas_price, self.max_gas_price)
+            yield last_gas_price
+
+
+@dataclass
+class OracleSettings:
+    base_fee_provider: str
+    max_acceptable_base_fee: int
+    manual_base_fee_bool: bool
+
+    def is_acceptable(self, base_fee: int) -> bool:
+        # NOTE: Same logic as `BaseFeeOracle.isCurrentBaseFeeAcceptable`, assuming
+        #       the provider reports the base fee of the current block
+        if self.base_fee_provider == ZERO_ADDRESS:
+            return self.manual_base_fee_bool
+        return base_fee <= self.max_acceptable_base_fee
+
+
+class BaseFeeGate:
+    """
+    Tells which strategies would have `harvestTrigger` return `False` because
+    their `BaseFeeOracle` rejects the current base fee, so the keeper can skip
+    that `eth_call`.
+
+    The oracle settings (and which oracle each strategy uses) are read at most
+    every `ttl` seconds, and checked against the latest base fee in `history`.
+    Strategies whose oracle can't be read are never skipped.
+    """
+
+    def __init__(self, history: FeeHistory, multicall=None, ttl: float = ORACLE_TTL):
+        self.history = history
+        self.multicall = multicall
+        self.ttl = ttl
+        self.expiry = 0.0
+        self.oracles: Dict[str, Optional[str]] = {}  # Strategy => oracle
+        self.settings: Dict[str, OracleSettings] = {}  # Oracle => settings
+
+    def _load_oracles(self, entries: List) -> Dict[str, Optional[str]]:
+        if self.multicall:
+            batch = Batch(self.multicall)
+            indices = {
+                entry.address: batch.add(entry.strategy.baseFeeOracle)
+                for entry in entries
+            }
+            _, results = batch.execute()
+            return {address: results[idx] for address, idx in indices.items()}
+
+        oracles = {}
+        for entry in entries:
+            try:
+                oracles[entry.address] = entry.strategy.baseFeeOracle()
+            except ValueError:
+                oracles[entry.address] = None  # e.g. an older `apiVersion`
+        return oracles
+
+    def _load_settings(self, oracles: Set[str]) -> Dict[str, OracleSettings]:
+        contracts = {oracle: BaseFeeOracle.at(oracle) for oracle in oracles}
+        if self.multicall:
+            batch = Batch(self.multicall)
+            indices = {
+                oracle: (
+                    batch.add(contract.baseFeeProvider),
+                    batch.add(contract.maxAcceptableBaseFee),
+                    batch.add(contract.manualBaseFeeBool),
+                )
+                for oracle, contract in contracts.items()
+            }
+            _, results = batch.execute()
+            values = {
+                oracle: [results[idx] for idx in idxs]
+                for oracle, idxs in indices.items()
+            }
+        else:
+            values = {
+                oracle: [
+                    contract.baseFeeProvider(),
+                    contract.maxAcceptableBaseFee(),
+                    contract.manualBaseFeeBool(),
+                ]
+                for oracle, contract in contracts.items()
+            }
+
+        return {
+            oracle: OracleSettings(provider, max_base_fee, manual)
+            for oracle, (provider, max_base_fee, manual) in values.items()
+            if provider is not None and max_base_fee is not None and manual is not None
+        }
+
+    def refresh(self, entries: List):
+        unknown = [entry for entry in entries if entry.address not in self.oracles]
+        if time.time() >= self.expiry:
+            unknown = entries
+            self.expiry = time.time() + self.ttl
+            self.settings = {}
+        if len(unknown) > 0:
+            self.oracles.update(self._load_oracles(unknown))
+
+        oracles = {
+            oracle
+            for oracle in self.oracles.values()
+            if oracle and oracle != ZERO_ADDRESS and oracle not in self.settings
+        }
+        if len(oracles) > 0:
+            self.settings.update(self._load_settings(oracles))
+
+    def rejected(self, entries: List) -> Set[str]:
+        self.history.update()
+        self.refresh(entries)
+        base_fee = self.history.latest_base_fee
+        return {
+            entry.address
+            for entry in entries
+            if self.oracles.get(entry.address) in self.settings
+            and not self.settings[self.oracles[entry.address]].is_acceptable(base_fee)
+        }
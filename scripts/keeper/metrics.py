@@ -0,0 +1,266 @@
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+# NOTE: From a single cached read up to a stuck transaction
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+    120,
+    300,
+    600,
+    1800,
+)
+
+
+def call_label(fn) -> str:
+    """
+    Name of what `fn` calls, e.g. `Vault.creditAvailable` for a contract method
+    or `StrategyAPI.harvest.estimate_gas` for a bound method of one.
+    """
+    name = getattr(fn, "_name", None)
+    if name:
+        return name
+    owner = getattr(fn, "__self__", None)
+    if owner is not None:
+        return f"{getattr(owner, '_name', type(owner).__name__)}.{fn.__name__}"
+    return getattr(fn, "__qualname__", type(fn).__name__)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if len(pairs) > 0 else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            for key, value in sorted(self.values.items()):
+                yield f"{self.name}{_format_labels(self.labels, key)} {value}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            self.values[key] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # labels => (count per bucket, sum, count)
+        self.values: Dict[Tuple, Tuple[list, float, int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            counts, total, count = self.values.get(
+                key, ([0] * len(self.buckets), 0.0, 0)
+            )
+            idx = bisect.bisect_left(self.buckets, value)
+            if idx < len(self.buckets):
+                counts[idx] += 1
+            self.values[key] = (counts, total + value, count + 1)
+
+    def samples(self):
+        with self._lock:
+            for key, (counts, total, count) in sorted(self.values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labels, key, f'le="{bound}"')
+                    yield f"{self.name}_bucket{labels} {cumulative}"
+                labels = _format_labels(self.labels, key, 'le="+Inf"')
+                yield f"{self.name}_bucket{labels} {count}"
+                yield f"{self.name}_sum{_format_labels(self.labels, key)} {total}"
+                yield f"{self.name}_count{_format_labels(self.labels, key)} {count}"
+
+
+class Metrics:
+    """
+    Counters and histograms for everything the keeper does, exposed in the
+    Prometheus text format (see `serve`) and, event by event, as JSON lines
+    written to `log_file` (if given).
+    """
+
+    def __init__(self, log_file=None):
+        self.log_file = log_file
+        self._log_lock = threading.Lock()
+        self.metrics = []
+
+        self.rpc_seconds = self.histogram(
+            "keeper_rpc_seconds", "Wall time of RPC round-trips", ("method",)
+        )
+        self.rpc_errors = self.counter(
+            "keeper_rpc_errors_total", "RPC round-trips that raised", ("method",)
+        )
+        self.pass_seconds = self.histogram(
+            "keeper_pass_seconds", "Wall time of each phase of a pass", ("phase",)
+        )
+        self.evaluations = self.counter(
+            "keeper_evaluations_total", "Strategies evaluated", ("strategy",)
+        )
+        self.calls = self.counter(
+            "keeper_calls_total",
+            "harvest/tend calls by outcome",
+            ("strategy", "action", "outcome"),
+        )
+        self.gas_spent = self.counter(
+            "keeper_gas_spent_wei_total",
+            "Gas paid for mined calls",
+            ("strategy", "action"),
+        )
+        self.trigger_to_mined = self.histogram(
+            "keeper_trigger_to_mined_seconds",
+            "Time from a trigger returning true to the call being mined",
+            ("action",),
+        )
+        self.in_flight = self.gauge(
+            "keeper_in_flight", "Transactions submitted but not mined yet"
+        )
+        self.balance = self.gauge("keeper_balance_wei", "Balance of the keeper")
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        metric = Gauge(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(
+        self, name: str, help: str, labels: Tuple[str, ...] = ()
+    ) -> Histogram:
+        metric = Histogram(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def timed(self, fn, label: str):
+        """
+        Wraps `fn` so every call of it is timed under `label`.
+        """
+
+        def call():
+            start = time.perf_counter()
+            try:
+                return fn()
+            except Exception:
+                self.rpc_errors.inc(method=label)
+                raise
+            finally:
+                self.rpc_seconds.observe(time.perf_counter() - start, method=label)
+
+        return call
+
+    def log(self, event: str, **fields):
+        if self.log_file is None:
+            return
+        line = json.dumps({"time": time.time(), "event": event, **fields})
+        with self._log_lock:
+            self.log_file.write(line + "\n")
+            self.log_file.flush()
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """
+        Serves `render` at `http://{host}:{port}/metrics` from a daemon thread.
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # NOTE: Scrapes would flood the keeper's output
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def load_metrics(port_offset: int = 0) -> Optional[Metrics]:
+    """
+    Metrics served on `KEEPER_METRICS_PORT` (plus `port_offset`, for workers
+    sharing one host) and logged to `KEEPER_METRICS_LOG` (`-` for stdout), or
+    `None` if neither is set.
+    """
+    port = os.environ.get("KEEPER_METRICS_PORT")
+    log_path = os.environ.get("KEEPER_METRICS_LOG")
+    if not port and not log_path:
+        return None
+
+    log_file = None
+    if log_path == "-":
+        log_file = sys.stdout
+    elif log_path:
+        log_file = open(log_path, "a")
+    metrics = Metrics(log_file=log_file)
+    if port:
+        metrics.serve(int(port) + port_offset)
+        print(f"Serving metrics at http://127.0.0.1:{int(port) + port_offset}/metrics")
+    return metrics
@@ -0,0 +1,211 @@
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from brownie import Contract, Multicall, chain, network
+
+
+# NOTE: Canonical Multicall2 deployments, same ABI as `contracts/test/Multicall.sol`
+MULTICALL2 = {
+    1: "0x5BA1e12693Dc8F9c48aAD8770482f4739bEeD696",
+}
+
+
+def load_multicall(deployer=None):
+    address = os.environ.get("MULTICALL_ADDRESS", MULTICALL2.get(chain.id))
+    if address:
+        return Contract.from_abi("Multicall", address, Multicall.abi)
+
+    # NOTE: Only deploy our own copy on local/forked networks
+    if deployer and network.show_active().startswith("development"):
+        return Multicall.deploy({"from": deployer})
+
+    raise ValueError(
+        f"No Multicall known for chain {chain.id}, please set `MULTICALL_ADDRESS`"
+    )
+
+
+class Batch:
+    """
+    Collects view calls and executes all of them in a single `eth_call`.
+
+    Calls are added as brownie contract methods plus arguments, and the results
+    are decoded with the same method's ABI. Reverting calls decode to `None`
+    instead of failing the whole batch.
+    """
+
+    def __init__(self, multicall):
+        self.multicall = multicall
+        self._calls: List[Tuple] = []
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def add(self, method, *args) -> int:
+        self._calls.append((method, args))
+        return len(self._calls) - 1
+
+    def execute(self, block_identifier=None) -> Tuple[int, List]:
+        calls = [
+            (method._address, method.encode_input(*args))
+            for method, args in self._calls
+        ]
+        block_number, _, results = self.multicall.tryBlockAndAggregate.call(
+            False, calls, block_identifier=block_identifier
+        )
+
+        decoded = []
+        for (method, _), (success, return_data) in zip(self._calls, results):
+            if success and len(return_data) > 0:
+                decoded.append(method.decode_output(return_data))
+            else:
+                decoded.append(None)
+
+        return block_number, decoded
+
+
+@dataclass
+class StrategySnapshot:
+    strategy: object
+    block_number: int
+    credit: int
+    debt: int
+    harvest_triggered: bool
+    tend_triggered: bool
+
+
+def fetch_snapshots(
+    multicall,
+    entries: List,
+    harvest_call_costs: Dict[str, int],
+    tend_call_costs: Dict[str, int],
+) -> List[StrategySnapshot]:
+    """
+    Fetches every view call the keeper needs for `entries` (see `StrategyIndex`)
+    in one `eth_call`, across any number of Vaults.
+
+    `*_call_costs` map each strategy address to the cost in wei of calling it,
+    a strategy without a cost (e.g. its gas estimate failed) skips that trigger.
+    """
+    batch = Batch(multicall)
+
+    indices = []
+    for entry in entries:
+        strategy, vault = entry.strategy, entry.vault
+        credit = batch.add(vault.creditAvailable["address"], strategy)
+        debt = batch.add(vault.debtOutstanding["address"], strategy)
+        harvest_trigger = tend_trigger = None
+        if strategy.address in harvest_call_costs:
+            harvest_trigger = batch.add(
+                strategy.harvestTrigger, harvest_call_costs[strategy.address]
+            )
+        if strategy.address in tend_call_costs:
+            tend_trigger = batch.add(
+                strategy.tendTrigger, tend_call_costs[strategy.address]
+            )
+        indices.append((strategy, credit, debt, harvest_trigger, tend_trigger))
+
+    block_number, results = batch.execute()
+
+    return [
+        StrategySnapshot(
+            strategy=strategy,
+            block_number=block_number,
+            credit=results[credit] or 0,
+            debt=results[debt] or 0,
+            # NOTE: A trigger that reverts or wasn't requested is never acted on
+            harvest_triggered=bool(
+                harvest_trigger is not None and results[harvest_trigger]
+            ),
+            tend_triggered=bool(tend_trigger is not None and results[tend_trigger]),
+        )
+        for strategy, credit, debt, harvest_trigger, tend_trigger in indices
+    ]
+
+
+@dataclass
+class GasInputs:
+    total_debt: int
+    emergency_exit: bool
+    debt_outstanding: int
+
+
+def fetch_gas_inputs(multicall, entries: List) -> Dict[str, GasInputs]:
+    """
+    Fetches the strategy state that the gas cost of `tend`/`harvest` depends on,
+    for every entry in one `eth_call` (see `GasEstimateCache`).
+    """
+    batch = Batch(multicall)
+    indices = [
+        (
+            entry.strategy,
+            batch.add(entry.vault.strategies, entry.strategy),
+            batch.add(entry.strategy.emergencyExit),
+            batch.add(entry.vault.debtOutstanding["address"], entry.strategy),
+        )
+        for entry in entries
+    ]
+    _, results = batch.execute()
+
+    return {
+        strategy.address: GasInputs(
+            total_debt=results[params].dict()["totalDebt"] if results[params] else 0,
+            emergency_exit=bool(results[emergency_exit]),
+            debt_outstanding=results[debt] or 0,
+        )
+        for strategy, params, emergency_exit, debt in indices
+    }
+
+
+@dataclass
+class LockedProfit:
+    locked_profit: int
+    last_report: int
+    degradation: int
+
+
+@dataclass
+class ProfitInputs:
+    timestamp: int
+    expected_returns: Dict[str, int]  # Strategy => `Vault.expectedReturn`
+    locked_profits: Dict[str, LockedProfit]  # Vault => locked profit state
+
+
+def fetch_profit_inputs(multicall, entries: List) -> ProfitInputs:
+    """
+    Fetches what the harvest `Scheduler` scores calls with, for every entry in
+    one `eth_call`.
+    """
+    batch = Batch(multicall)
+    timestamp = batch.add(multicall.getCurrentBlockTimestamp)
+    expected_returns = {
+        entry.address: batch.add(entry.vault.expectedReturn["address"], entry.strategy)
+        for entry in entries
+    }
+    vaults = {entry.vault.address: entry.vault for entry in entries}
+    locked_profits = {
+        address: (
+            batch.add(vault.lockedProfit),
+            batch.add(vault.lastReport),
+            batch.add(vault.lockedProfitDegradation),
+        )
+        for address, vault in vaults.items()
+    }
+    _, results = batch.execute()
+
+    return ProfitInputs(
+        timestamp=results[timestamp],
+        expected_returns={
+            address: results[idx] or 0 for address, idx in expected_returns.items()
+        },
+        locked_profits={
+            address: LockedProfit(
+                locked_profit=results[locked_profit] or 0,
+                last_report=results[last_report] or 0,
+                degradation=results[degradation] or 0,
+            )
+            for address, (locked_profit, last_report, degradation) in (
+                locked_profits.items()
+            )
+        },
+    )
@@ -0,0 +1,63 @@
+from typing import List
+
+TX_BASE_GAS = 21_000  # Paid once per transaction, whatever it does
+ROUTER_CALL_GAS = 10_000  # Loop, try/catch and `StrategyCalled` log per strategy
+ROUTER_GAS_LIMIT = 5_000_000  # Per router transaction
+ACTIONS = {"harvest": 0, "tend": 1}  # See `KeeperRouter.Action`
+
+
+def call_gas(evaluation) -> int:
+    """
+    Gas a call takes inside a router transaction: its own estimate, minus the
+    base cost that the transaction pays only once.
+    """
+    return evaluation.action_gas_estimate - TX_BASE_GAS + ROUTER_CALL_GAS
+
+
+def pack(evaluations: List, gas_limit: int) -> List[List]:
+    """
+    Splits `evaluations` into batches that each fit in `gas_limit`, keeping the
+    strategies of a Vault next to each other so they share its warm storage. A
+    call that doesn't fit in `gas_limit` by itself goes in a batch of its own.
+    """
+    batches: List[List] = []
+    batch: List = []
+    gas = TX_BASE_GAS
+    for evaluation in sorted(
+        evaluations, key=lambda e: (e.entry.vault.address, e.entry.address)
+    ):
+        if len(batch) > 0 and gas + call_gas(evaluation) > gas_limit:
+            batches.append(batch)
+            batch, gas = [], TX_BASE_GAS
+        batch.append(evaluation)
+        gas += call_gas(evaluation)
+    if len(batch) > 0:
+        batches.append(batch)
+    return batches
+
+
+class Router:
+    """
+    Makes the keeper's calls through `contract` (a `KeeperRouter`), as many per
+    transaction as fit in `gas_limit` (see `pack`).
+
+    The router, not the bot, must be the keeper of every strategy, and the bot
+    must be authorized on the router.
+    """
+
+    def __init__(self, contract, gas_limit: int = ROUTER_GAS_LIMIT):
+        self.contract = contract
+        self.gas_limit = gas_limit
+
+    @property
+    def address(self) -> str:
+        return self.contract.address
+
+    def pack(self, evaluations: List) -> List[List]:
+        return pack(evaluations, self.gas_limit)
+
+    def calls(self, batch: List) -> List:
+        return [(e.entry.address, ACTIONS[e.action]) for e in batch]
+
+    def gas_limit_for(self, batch: List) -> int:
+        return TX_BASE_GAS + sum(call_gas(evaluation) for evaluation in batch)
@@ -0,0 +1,249 @@
+import heapq
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple
+
+from brownie import chain
+
+from scripts.keeper.multicall import (
+    LockedProfit,
+    ProfitInputs,
+    fetch_profit_inputs,
+)
+
+DEGRADATION_COEFFICIENT = 10**18  # See `Vault.DEGRADATION_COEFFICIENT`
+
+# NOTE: Moving funds isn't a profit by itself, these are the share of `credit`
+#       (resp. `debt`) that moving it in one harvest is counted as worth
+CREDIT_WEIGHT = 0.001  # Idle funds not earning until deployed
+DEBT_WEIGHT = 0.01  # Funds the Vault wants back (e.g. revoked strategies)
+
+
+def locked_profit_at(state: LockedProfit, timestamp: int) -> int:
+    # NOTE: Same integer math as `Vault._calculateLockedProfit`
+    ratio = (timestamp - state.last_report) * state.degradation
+    if ratio < DEGRADATION_COEFFICIENT:
+        return (
+            state.locked_profit - ratio * state.locked_profit // DEGRADATION_COEFFICIENT
+        )
+    return 0
+
+
+def deferred_profit(state: LockedProfit, timestamp: int) -> int:
+    """
+    Profit that a report at `timestamp` pushes back.
+
+    A report restarts the unlock schedule of whatever profit is still locked, so
+    harvesting shortly before it is fully unlocked delays it the most. On average
+    the remaining locked profit is released half the elapsed time later.
+    """
+    remaining = locked_profit_at(state, timestamp)
+    elapsed = min(
+        (timestamp - state.last_report) * state.degradation, DEGRADATION_COEFFICIENT
+    )
+    return remaining * elapsed // (2 * DEGRADATION_COEFFICIENT)
+
+
+class GasBudget:
+    """
+    Caps what (in wei) the keeper spends on calls per block and/or over any
+    rolling hour. Limits left as `None` are unbounded.
+    """
+
+    def __init__(self, per_block: Optional[int] = None, per_hour: Optional[int] = None):
+        self.per_block = per_block
+        self.per_hour = per_hour
+        self._block: Tuple[int, int] = (0, 0)  # (block number, spent)
+        self._hour: Deque[Tuple[float, int]] = deque()  # (timestamp, spent)
+
+    def restore(self, spent: List[Tuple[float, int]]):
+        """
+        Counts what was spent (as `(timestamp, wei)`) before a restart towards the
+        hourly limit (see `StateStore.gas_spent_since`).
+        """
+        self._hour.extend(sorted(spent))
+
+    def _prune(self, now: float):
+        while len(self._hour) > 0 and now - self._hour[0][0] >= 3600:
+            self._hour.popleft()
+
+    def available(
+        self, block_number: Optional[int] = None, now: Optional[float] = None
+    ) -> Optional[int]:
+        block_number = chain.height if block_number is None else block_number
+        now = time.time() if now is None else now
+        limits = []
+        if self.per_block is not None:
+            spent = self._block[1] if self._block[0] == block_number else 0
+            limits.append(self.per_block - spent)
+        if self.per_hour is not None:
+            self._prune(now)
+            limits.append(self.per_hour - sum(spent for _, spent in self._hour))
+        return max(min(limits), 0) if len(limits) > 0 else None
+
+    def spend(
+        self,
+        amount: int,
+        block_number: Optional[int] = None,
+        now: Optional[float] = None,
+    ):
+        block_number = chain.height if block_number is None else block_number
+        now = time.time() if now is None else now
+        if self._block[0] == block_number:
+            self._block = (block_number, self._block[1] + amount)
+        else:
+            self._block = (block_number, amount)
+        self._hour.append((now, amount))
+
+
+@dataclass
+class Candidate:
+    evaluation: object
+    call_cost: int  # wei
+    value: int  # wei
+
+    @property
+    def score(self) -> float:
+        return self.value / self.call_cost if self.call_cost > 0 else float("inf")
+
+
+class Scheduler:
+    """
+    Ranks the calls the triggers asked for by expected benefit per wei of gas,
+    and picks the best ones that fit in `budget`.
+
+    The benefit of a `harvest` is the profit it reports (`expectedReturn`, or
+    the gain of its dry-run if it was simulated, see `Simulator`), plus
+    a share of the `credit` it deploys and the `debt` it pays back, minus the
+    locked profit of the Vault whose unlock it pushes back (see
+    `deferred_profit`). It is priced in wei using `prices` (`want` address => wei
+    per whole token). A call without a price, and every `tend`, is counted as
+    worth exactly its gas cost (its trigger already said it is).
+
+    Calls scoring below `min_score` are never made.
+    """
+
+    def __init__(
+        self,
+        budget: Optional[GasBudget] = None,
+        prices: Optional[Dict[str, int]] = None,
+        multicall=None,
+        credit_weight: float = CREDIT_WEIGHT,
+        debt_weight: float = DEBT_WEIGHT,
+        min_score: float = 0,
+    ):
+        self.budget = budget
+        self.prices = prices or {}
+        self.multicall = multicall
+        self.credit_weight = credit_weight
+        self.debt_weight = debt_weight
+        self.min_score = min_score
+
+    def _fetch_inputs(self, entries: List) -> ProfitInputs:
+        if self.multicall:
+            return fetch_profit_inputs(self.multicall, entries)
+
+        vaults = {entry.vault.address: entry.vault for entry in entries}
+        return ProfitInputs(
+            timestamp=chain[-1].timestamp,
+            expected_returns={
+                entry.address: entry.vault.expectedReturn(entry.strategy)
+                for entry in entries
+            },
+            locked_profits={
+                address: LockedProfit(
+                    locked_profit=vault.lockedProfit(),
+                    last_report=vault.lastReport(),
+                    degradation=vault.lockedProfitDegradation(),
+                )
+                for address, vault in vaults.items()
+            },
+        )
+
+    def harvest_value(
+        self,
+        expected_return: int,
+        credit: int,
+        debt: int,
+        deferred: int,
+    ) -> int:
+        # NOTE: In units of `want`
+        return max(
+            int(
+                expected_return
+                + self.credit_weight * credit
+                + self.debt_weight * debt
+                - deferred
+            ),
+            0,
+        )
+
+    def candidates(self, evaluations: List, gas_price: int) -> List[Candidate]:
+        # NOTE: Only what can be priced needs the profit inputs
+        harvests = [
+            evaluation.entry
+            for evaluation in evaluations
+            if evaluation.action == "harvest"
+            and self.prices.get(evaluation.entry.want.address)
+        ]
+        inputs = self._fetch_inputs(harvests) if len(harvests) > 0 else None
+
+        candidates = []
+        for evaluation in evaluations:
+            entry = evaluation.entry
+            call_cost = evaluation.action_gas_estimate * gas_price
+
+            price = self.prices.get(entry.want.address)
+            if evaluation.action == "harvest" and price:
+                expected_return = inputs.expected_returns[entry.address]
+                if evaluation.simulation:
+                    expected_return = evaluation.simulation.gain
+                value = self.harvest_value(
+                    expected_return,
+                    evaluation.credit,
+                    evaluation.debt,
+                    deferred_profit(
+                        inputs.locked_profits[entry.vault.address], inputs.timestamp
+                    ),
+                )
+                value = value * price // 10**entry.decimals
+            else:
+                value = call_cost
+
+            candidates.append(Candidate(evaluation, call_cost, value))
+        return candidates
+
+    def plan(self, evaluations: List, gas_price: int) -> List:
+        """
+        Returns the evaluations (with an action) to execute, best score first,
+        leaving out what scores below `min_score` or doesn't fit in the budget.
+        """
+        evaluations = [e for e in evaluations if e.action]
+        queue = [
+            (-candidate.score, idx, candidate)
+            for idx, candidate in enumerate(self.candidates(evaluations, gas_price))
+        ]
+        heapq.heapify(queue)
+        available = self.budget.available() if self.budget else None
+
+        planned = []
+        while len(queue) > 0:
+            _, _, candidate = heapq.heappop(queue)
+            entry = candidate.evaluation.entry
+            action = candidate.evaluation.action
+            if candidate.score < self.min_score:
+                print(f"[{entry.address}] `{action}` isn't worth its gas, skipping")
+                continue
+            if available is not None:
+                if candidate.call_cost > available:
+                    # NOTE: A cheaper call further down may still fit
+                    print(f"[{entry.address}] `{action}` is over the gas budget")
+                    continue
+                available -= candidate.call_cost
+            planned.append(candidate.evaluation)
+        return planned
+
+    def record(self, evaluation, gas_price: int):
+        if self.budget:
+            self.budget.spend(evaluation.action_gas_estimate * gas_price)
@@ -0,0 +1,276 @@
+import multiprocessing
+import queue
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from scripts.keeper.discovery import RegistryIndex, StrategyIndex
+from scripts.keeper.worker import run_worker
+
+REBALANCE_INTERVAL = 600  # seconds between load checks
+IMBALANCE_THRESHOLD = 1.25  # Busiest shard vs. average before strategies move
+STATS_DECAY = 0.5  # Weight kept by older stats at every rebalance
+
+
+@dataclass
+class StrategyStats:
+    calls: float = 0
+    gas_spent: float = 0  # wei
+
+
+class ShardStats:
+    """
+    Calls made and gas spent per strategy by one worker, reported to the
+    coordinator (and reset) on every `flush`.
+    """
+
+    def __init__(self):
+        self.strategies: Dict[str, StrategyStats] = defaultdict(StrategyStats)
+
+    def record(self, strategy: str, gas_cost: int):
+        self.strategies[strategy].calls += 1
+        self.strategies[strategy].gas_spent += gas_cost
+
+    def flush(self) -> Dict[str, Tuple[float, float]]:
+        stats = {
+            strategy: (stat.calls, stat.gas_spent)
+            for strategy, stat in self.strategies.items()
+        }
+        self.strategies.clear()
+        return stats
+
+
+def strategy_loads(
+    strategies: List[str], stats: Dict[str, StrategyStats]
+) -> Dict[str, float]:
+    """
+    Share of the total work each strategy stands for. Every strategy costs the
+    same to evaluate, calls and gas come on top in proportion to what was seen.
+    """
+    total_calls = sum(stat.calls for stat in stats.values()) or 1
+    total_gas = sum(stat.gas_spent for stat in stats.values()) or 1
+    loads = {}
+    for strategy in strategies:
+        stat = stats.get(strategy, StrategyStats())
+        loads[strategy] = (
+            1 / len(strategies) + stat.calls / total_calls + stat.gas_spent / total_gas
+        )
+    return loads
+
+
+def partition(
+    loads: Dict[str, float], eligible: Dict[str, Set[int]], num_shards: int
+) -> List[Set[str]]:
+    """
+    Splits the strategies into `num_shards` shards of about the same load,
+    heaviest first onto the least loaded shard it is eligible for.
+    """
+    shards: List[Set[str]] = [set() for _ in range(num_shards)]
+    totals = [0.0] * num_shards
+    for strategy in sorted(loads, key=lambda s: (-loads[s], s)):
+        candidates = [(totals[idx], idx) for idx in eligible[strategy]]
+        if len(candidates) == 0:
+            continue
+        _, idx = min(candidates)
+        shards[idx].add(strategy)
+        totals[idx] += loads[strategy]
+    return shards
+
+
+def imbalance(shards: List[Set[str]], loads: Dict[str, float]) -> float:
+    totals = [sum(loads.get(s, 0) for s in shard) for shard in shards]
+    average = sum(totals) / len(totals)
+    return max(totals) / average if average > 0 else 1.0
+
+
+class ShardIndex(StrategyIndex):
+    """
+    The strategies of one worker, as assigned by the `Coordinator`.
+
+    On every `refresh`, the calls and gas recorded in `stats` since the last one
+    are sent back through `outbox`, and the latest assignment waiting in `inbox`
+    (if any) is applied.
+    """
+
+    def __init__(self, keeper: str, inbox, outbox, stats: ShardStats):
+        super().__init__(keeper)
+        self.inbox = inbox
+        self.outbox = outbox
+        self.stats = stats
+
+    def _is_authorized(self, strategy, vault) -> bool:
+        return True  # NOTE: The coordinator only assigns what we can call
+
+    def refresh(self) -> Tuple[List, List]:
+        stats = self.stats.flush()
+        if len(stats) > 0:
+            self.outbox.put((self.keeper, stats))
+
+        assignment = None
+        while True:
+            try:
+                assignment = self.inbox.get_nowait()
+            except queue.Empty:
+                break
+        if assignment is None:
+            return [], []
+
+        removed = [self.remove(address) for address in set(self.entries) - assignment]
+        added = [self.add(address) for address in assignment - set(self.entries)]
+        return [entry for entry in added if entry], removed
+
+
+class ShardedRegistryIndex(RegistryIndex):
+    """
+    Every strategy in `registry` that at least one of `keepers` may call, along
+    with which of them may.
+
+    `harvest`/`tend` accept the strategy's keeper, and the governance, management
+    and guardian of its Vault.
+    """
+
+    def __init__(self, keepers: List[str], registry, **kwargs):
+        super().__init__(None, registry, **kwargs)
+        self.keepers = keepers
+        self.eligible: Dict[str, Set[int]] = {}  # Strategy => indices in `keepers`
+        self._vault_roles: Dict[str, Set[str]] = {}
+
+    def _is_authorized(self, strategy, vault) -> bool:
+        if vault.address not in self._vault_roles:
+            self._vault_roles[vault.address] = {
+                vault.governance(),
+                vault.management(),
+                vault.guardian(),
+            }
+        callers = self._vault_roles[vault.address] | {strategy.keeper()}
+        self.eligible[strategy.address] = {
+            idx for idx, keeper in enumerate(self.keepers) if keeper in callers
+        }
+        return len(self.eligible[strategy.address]) > 0
+
+
+class Coordinator:
+    """
+    Shards the strategies of `index` across one worker process per account in
+    `bots`, each with its own strategy set and nonce stream.
+
+    Workers report the calls they made and the gas they spent per strategy.
+    Every `rebalance_interval` seconds, if the busiest shard carries more than
+    `threshold` times the average load, the strategies are partitioned again
+    (see `strategy_loads` and `partition`). New strategies are assigned as soon
+    as `index` finds them.
+
+    NOTE: A strategy only ever moves to an account allowed to call it, and while
+          moving, a call the previous worker still has in flight is unknown to
+          the new one.
+    """
+
+    def __init__(
+        self,
+        index: ShardedRegistryIndex,
+        bots: List,
+        network_name: str,
+        project_path: str,
+        rebalance_interval: float = REBALANCE_INTERVAL,
+        threshold: float = IMBALANCE_THRESHOLD,
+    ):
+        self.index = index
+        self.bots = bots
+        self.network_name = network_name
+        self.project_path = project_path
+        self.rebalance_interval = rebalance_interval
+        self.threshold = threshold
+        self.stats: Dict[str, StrategyStats] = defaultdict(StrategyStats)
+        self.shards: List[Set[str]] = [set() for _ in bots]
+        self.workers: List[Optional[multiprocessing.Process]] = [None] * len(bots)
+        self._context = multiprocessing.get_context("spawn")
+        self._inboxes = [self._context.Queue() for _ in bots]
+        self._outbox = self._context.Queue()
+
+    def _start_worker(self, idx: int):
+        bot = self.bots[idx]
+        worker = self._context.Process(
+            target=run_worker,
+            args=(
+                self.project_path,
+                self.network_name,
+                bot.private_key,
+                self._inboxes[idx],
+                self._outbox,
+                idx,
+            ),
+            name=f"keeper-{bot.address}",
+            daemon=True,
+        )
+        worker.start()
+        self.workers[idx] = worker
+        # NOTE: A restarted worker starts from an empty index
+        self._inboxes[idx].put(set(self.shards[idx]))
+
+    def collect(self):
+        while True:
+            try:
+                _, stats = self._outbox.get_nowait()
+            except queue.Empty:
+                return
+            for strategy, (calls, gas_spent) in stats.items():
+                self.stats[strategy].calls += calls
+                self.stats[strategy].gas_spent += gas_spent
+
+    def assign(self, shards: List[Set[str]]):
+        for idx, shard in enumerate(shards):
+            if shard != self.shards[idx]:
+                print(f"[{self.bots[idx].address}] Assigned {len(shard)} strategies")
+                self._inboxes[idx].put(set(shard))
+        self.shards = shards
+
+    def rebalance(self, force: bool = False):
+        strategies = [entry.address for entry in self.index]
+        if len(strategies) == 0:
+            return
+        loads = strategy_loads(strategies, self.stats)
+
+        if not force and imbalance(self.shards, loads) <= self.threshold:
+            return
+
+        self.assign(partition(loads, self.index.eligible, len(self.bots)))
+        # NOTE: Recent activity counts more than older activity
+        for stat in self.stats.values():
+            stat.calls *= STATS_DECAY
+            stat.gas_spent *= STATS_DECAY
+
+    def _place(self, added: List, removed: List):
+        # NOTE: Cheap incremental update, a full `rebalance` comes later if needed
+        shards = [set(shard) for shard in self.shards]
+        for entry in removed:
+            for shard in shards:
+                shard.discard(entry.address)
+        for entry in added:
+            eligible = self.index.eligible[entry.address]
+            idx = min(eligible, key=lambda idx: (len(shards[idx]), idx))
+            shards[idx].add(entry.address)
+        self.assign(shards)
+
+    def run(self, poll_interval: float = 15):
+        self.rebalance(force=True)
+        for idx in range(len(self.bots)):
+            self._start_worker(idx)
+
+        last_rebalance = time.time()
+        while True:
+            for idx, worker in enumerate(self.workers):
+                if not worker.is_alive():
+                    print(f"[{self.bots[idx].address}] Worker died, restarting")
+                    self._start_worker(idx)
+
+            added, removed = self.index.refresh()
+            if len(added) > 0 or len(removed) > 0:
+                self._place(added, removed)
+
+            self.collect()
+            if time.time() - last_rebalance >= self.rebalance_interval:
+                self.rebalance()
+                last_rebalance = time.time()
+
+            time.sleep(poll_interval)
@@ -0,0 +1,149 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from brownie import HarvestSimulator, web3
+from eth_abi import decode, encode
+from hexbytes import HexBytes
+
+
+BATCH_SIZE = 20  # `harvest()`s per `eth_call`, they all share the node's gas cap
+MIN_PROFIT_FACTOR = 1.0  # Profit a harvest must report, in multiples of its cost
+ERROR_SELECTOR = HexBytes("0x08c379a0")  # `Error(string)`
+RESULTS_TYPE = "(bool,bytes,uint256,uint256,uint256,uint256,uint256)[]"
+
+
+def revert_reason(revert_data: bytes) -> Optional[str]:
+    """
+    The message of a `require`/`revert` with a reason string, if any.
+    """
+    if revert_data[:4] != ERROR_SELECTOR:
+        return None
+    try:
+        return decode(["string"], bytes(revert_data[4:]))[0]
+    except Exception:
+        return None
+
+
+@dataclass
+class Simulation:
+    """
+    What `harvest()` on `strategy` would do if it were mined right now, as seen
+    by the Vault (see `contracts/test/HarvestSimulator.sol`).
+    """
+
+    strategy: str
+    success: bool
+    revert_data: bytes
+    gain: int
+    loss: int
+    debt_before: int
+    debt_after: int
+    gas_used: int
+
+    @property
+    def revert_reason(self) -> Optional[str]:
+        return revert_reason(self.revert_data)
+
+    @property
+    def moves_funds(self) -> bool:
+        return self.loss > 0 or self.debt_after != self.debt_before
+
+
+class Simulator:
+    """
+    Dry-runs every `harvest` the triggers asked for against the pending block
+    before it is submitted, and drops the ones not worth paying for:
+
+    - the ones that would revert (e.g. on `!healthcheck`), and
+    - the ones that only report a profit, and a negligible one: worth less than
+      `min_profit_factor` times the call cost if `want` has a price in `prices`
+      (wei per whole token), nothing at all otherwise.
+
+    A harvest that reports a loss or moves debt in or out of the strategy is
+    always kept, its trigger knows why it is due.
+
+    All harvests are simulated in one `eth_call` (per `batch_size`), with the
+    code of `keeper` overridden by `HarvestSimulator` so each `harvest()` is
+    called by the keeper itself. Every simulation starts from the same state.
+    """
+
+    def __init__(
+        self,
+        keeper: str,
+        prices: Optional[Dict[str, int]] = None,
+        min_profit_factor: float = MIN_PROFIT_FACTOR,
+        batch_size: int = BATCH_SIZE,
+        block_identifier="pending",
+    ):
+        self.keeper = keeper
+        self.prices = prices or {}
+        self.min_profit_factor = min_profit_factor
+        self.batch_size = batch_size
+        self.block_identifier = block_identifier
+        # NOTE: Encoded by hand, a brownie `Contract` at the keeper's address would
+        #       make brownie take it for a contract from then on
+        self._selector = HexBytes(HarvestSimulator.signatures["simulate"])
+        self._override = {
+            keeper: {"code": HexBytes(HarvestSimulator._build["deployedBytecode"])}
+        }
+
+    def simulate(self, entries: List) -> Dict[str, Simulation]:
+        addresses = [entry.address for entry in entries]
+        simulations = {}
+        for start in range(0, len(addresses), self.batch_size):
+            batch = addresses[start : start + self.batch_size]
+            return_data = web3.eth.call(
+                {
+                    "from": self.keeper,
+                    "to": self.keeper,
+                    "data": self._selector + encode(["address[]"], [batch]),
+                },
+                self.block_identifier,
+                self._override,
+            )
+            (results,) = decode([RESULTS_TYPE], bytes(return_data))
+            for address, result in zip(batch, results):
+                success, revert_data, *amounts = result
+                simulations[address] = Simulation(
+                    address, success, HexBytes(revert_data), *amounts
+                )
+        return simulations
+
+    def is_negligible(self, simulation: Simulation, entry, call_cost: int) -> bool:
+        if simulation.moves_funds:
+            return False
+        price = self.prices.get(entry.want.address)
+        if not price:
+            return simulation.gain == 0
+        value = simulation.gain * price // 10**entry.decimals
+        return value < self.min_profit_factor * call_cost
+
+    def filter(self, evaluations: List, gas_price: int) -> List:
+        """
+        Returns `evaluations` without the harvests not worth making. Every
+        harvest gets its `simulation` set, the ones left out included.
+        """
+        harvests = [e.entry for e in evaluations if e.action == "harvest"]
+        if len(harvests) == 0:
+            return evaluations
+        simulations = self.simulate(harvests)
+
+        kept = []
+        for evaluation in evaluations:
+            if evaluation.action != "harvest":
+                kept.append(evaluation)
+                continue
+
+            entry = evaluation.entry
+            simulation = simulations[entry.address]
+            evaluation.simulation = simulation
+            if not simulation.success:
+                reason = simulation.revert_reason or "no reason"
+                print(f"[{entry.address}] `harvest` would revert ({reason}), skipping")
+            elif self.is_negligible(
+                simulation, entry, evaluation.harvest_gas_estimate * gas_price
+            ):
+                print(f"[{entry.address}] `harvest` profit is negligible, skipping")
+            else:
+                kept.append(evaluation)
+        return kept
@@ -0,0 +1,336 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from scripts.keeper.backoff import Failure, StrategyHealth
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS strategies (
+    address TEXT PRIMARY KEY,
+    vault TEXT NOT NULL,
+    want TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    decimals INTEGER NOT NULL,
+    retiring INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS evaluated (
+    strategy TEXT PRIMARY KEY,
+    block_number INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS gas_estimates (
+    strategy TEXT NOT NULL,
+    method TEXT NOT NULL,
+    key TEXT NOT NULL,
+    gas_estimate INTEGER,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (strategy, method)
+);
+CREATE TABLE IF NOT EXISTS pending (
+    account TEXT NOT NULL,
+    nonce INTEGER NOT NULL,
+    target TEXT NOT NULL,
+    label TEXT NOT NULL,
+    gas_price TEXT NOT NULL,
+    submitted_at REAL NOT NULL,
+    txids TEXT NOT NULL,
+    cancelled INTEGER NOT NULL,
+    PRIMARY KEY (account, nonce)
+);
+CREATE TABLE IF NOT EXISTS calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    strategy TEXT NOT NULL,
+    action TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    gas_cost TEXT,
+    at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS health (
+    strategy TEXT PRIMARY KEY,
+    failures INTEGER NOT NULL,
+    failure TEXT,
+    reason TEXT,
+    retry_at REAL NOT NULL,
+    circuit_open INTEGER NOT NULL,
+    trips INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calls_by_time ON calls (at);
+"""
+
+
+class StateStore:
+    """
+    Everything the keeper learns while running, kept in a SQLite database at
+    `path` so a restarted keeper picks up where it left off instead of
+    re-deriving it all through RPC:
+
+    - the strategy index, and the last block its logs were read up to
+    - the block each strategy was last evaluated at (see `BlockWatcher`)
+    - gas estimates, failed ones included (see `GasEstimateCache`)
+    - transactions in flight (see `TransactionPipeline`)
+    - every call made, with its outcome and the gas paid for it
+    - the strategies that keep failing, and until when (see `CircuitBreaker`)
+
+    Every write is its own transaction, committed before the method returns, so
+    the database is consistent whenever the process dies.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # NOTE: Shared by the thread pool of the keeper, hence the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            # NOTE: WAL survives a crash mid-write, and lets the workers of
+            #       `main_sharded` share one database
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=FULL")
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _write(self, sql: str, params: Iterable = ()):
+        with self._lock, self._conn:
+            self._conn.execute(sql, params)
+
+    def _write_many(self, statements: List[Tuple[str, Iterable]]):
+        # NOTE: All or nothing
+        with self._lock, self._conn:
+            for sql, params in statements:
+                self._conn.execute(sql, params)
+
+    def _read(self, sql: str, params: Iterable = ()) -> List[Tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def get(self, key: str, default=None):
+        rows = self._read("SELECT value FROM meta WHERE key = ?", (key,))
+        return json.loads(rows[0][0]) if len(rows) > 0 else default
+
+    def set(self, key: str, value):
+        self._write(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (key, json.dumps(value)),
+        )
+
+    def load_entries(self) -> List[Tuple[str, str, str, str, int, bool]]:
+        """
+        `(strategy, vault, want, symbol, decimals, retiring)` for every strategy
+        of the saved index (see `StrategyIndex.restore`).
+        """
+        return [
+            (address, vault, want, symbol, decimals, bool(retiring))
+            for address, vault, want, symbol, decimals, retiring in self._read(
+                "SELECT address, vault, want, symbol, decimals, retiring "
+                "FROM strategies ORDER BY address"
+            )
+        ]
+
+    def save_index(self, index, added: List = (), removed: List = ()):
+        """
+        Saves what changed in `index` since the last save: the entries `added`
+        and `removed`, the ones now retiring, and how far its logs were read.
+        """
+        statements = [
+            ("DELETE FROM strategies WHERE address = ?", (entry.address,))
+            for entry in removed
+        ]
+        statements.extend(
+            (
+                "INSERT OR REPLACE INTO strategies "
+                "(address, vault, want, symbol, decimals, retiring) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    entry.address,
+                    entry.vault.address,
+                    entry.want.address,
+                    entry.symbol,
+                    entry.decimals,
+                    int(entry.retiring),
+                ),
+            )
+            # NOTE: Retiring only ever happens to entries already saved
+            for entry in list(added) + [entry for entry in index if entry.retiring]
+        )
+        if hasattr(index, "last_block"):
+            statements.append(
+                (
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    ("index_last_block", json.dumps(index.last_block)),
+                )
+            )
+        self._write_many(statements)
+
+    def load_evaluated(self) -> Dict[str, int]:
+        return dict(self._read("SELECT strategy, block_number FROM evaluated"))
+
+    def save_evaluated(self, strategies: Iterable[str], block_number: int):
+        self._write_many(
+            [
+                (
+                    "INSERT OR REPLACE INTO evaluated (strategy, block_number) "
+                    "VALUES (?, ?)",
+                    (strategy, block_number),
+                )
+                for strategy in strategies
+            ]
+        )
+
+    def load_gas_estimates(self) -> List[Tuple[str, Tuple, Optional[int], float]]:
+        """
+        `(strategy, key, gas_estimate, expires_at)` for every gas estimate that
+        hasn't expired yet, `expires_at` being a unix timestamp.
+        """
+        return [
+            (strategy, tuple(json.loads(key)), gas_estimate, expires_at)
+            for strategy, key, gas_estimate, expires_at in self._read(
+                "SELECT strategy, key, gas_estimate, expires_at FROM gas_estimates "
+                "WHERE expires_at > ?",
+                (time.time(),),
+            )
+        ]
+
+    def save_gas_estimate(
+        self, strategy: str, key: Tuple, gas_estimate: Optional[int], expires_at: float
+    ):
+        self._write(
+            "INSERT OR REPLACE INTO gas_estimates "
+            "(strategy, method, key, gas_estimate, expires_at) VALUES (?, ?, ?, ?, ?)",
+            (strategy, key[0], json.dumps(key), gas_estimate, expires_at),
+        )
+
+    def delete_gas_estimates(self, strategy: str):
+        self._write("DELETE FROM gas_estimates WHERE strategy = ?", (strategy,))
+
+    def load_pending(self, account: str) -> List[Tuple]:
+        """
+        `(nonce, target, label, gas_price, submitted_at, txids, cancelled)` for
+        every transaction of `account` that was in flight, lowest nonce first.
+        """
+        return [
+            (
+                nonce,
+                target,
+                label,
+                int(gas_price),
+                submitted_at,
+                json.loads(txids),
+                bool(cancelled),
+            )
+            for nonce, target, label, gas_price, submitted_at, txids, cancelled in (
+                self._read(
+                    "SELECT nonce, target, label, gas_price, submitted_at, txids, "
+                    "cancelled FROM pending WHERE account = ? ORDER BY nonce",
+                    (account,),
+                )
+            )
+        ]
+
+    def save_pending(self, account: str, pending):
+        self._write(
+            "INSERT OR REPLACE INTO pending (account, nonce, target, label, gas_price, "
+            "submitted_at, txids, cancelled) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                account,
+                pending.nonce,
+                pending.target,
+                pending.label,
+                str(pending.gas_price),
+                pending.submitted_at,
+                json.dumps([tx.txid for tx in pending.txs]),
+                int(pending.cancelled),
+            ),
+        )
+
+    def delete_pending(self, account: str, nonce: int):
+        self._write(
+            "DELETE FROM pending WHERE account = ? AND nonce = ?", (account, nonce)
+        )
+
+    def record_call(
+        self,
+        strategy: str,
+        action: str,
+        outcome: str,
+        gas_cost: Optional[int] = None,
+        at: Optional[float] = None,
+    ):
+        self._write(
+            "INSERT INTO calls (strategy, action, outcome, gas_cost, at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                strategy,
+                action,
+                outcome,
+                None if gas_cost is None else str(gas_cost),
+                time.time() if at is None else at,
+            ),
+        )
+
+    def gas_spent_since(self, since: float) -> List[Tuple[float, int]]:
+        """
+        `(at, gas_cost)` of every paid call since the unix timestamp `since`.
+        """
+        return [
+            (at, int(gas_cost))
+            for at, gas_cost in self._read(
+                "SELECT at, gas_cost FROM calls WHERE at >= ? AND gas_cost IS NOT NULL "
+                "ORDER BY at",
+                (since,),
+            )
+        ]
+
+    def load_health(self) -> Dict[str, StrategyHealth]:
+        return {
+            strategy: StrategyHealth(
+                failures,
+                Failure(failure) if failure else None,
+                reason,
+                retry_at,
+                bool(circuit_open),
+                trips,
+            )
+            for strategy, failures, failure, reason, retry_at, circuit_open, trips in (
+                self._read(
+                    "SELECT strategy, failures, failure, reason, retry_at, "
+                    "circuit_open, trips FROM health"
+                )
+            )
+        }
+
+    def save_health(self, strategy: str, health: StrategyHealth):
+        self._write(
+            "INSERT OR REPLACE INTO health (strategy, failures, failure, reason, "
+            "retry_at, circuit_open, trips) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                strategy,
+                health.failures,
+                health.failure.value if health.failure else None,
+                health.reason,
+                health.retry_at,
+                int(health.circuit_open),
+                health.trips,
+            ),
+        )
+
+    def delete_health(self, strategy: str):
+        self._write("DELETE FROM health WHERE strategy = ?", (strategy,))
+
+
+def load_state() -> Optional[StateStore]:
+    """
+    State kept in the SQLite database at `KEEPER_STATE`, or `None` if unset.
+    """
+    path = os.environ.get("KEEPER_STATE")
+    if not path:
+        return None
+    print(f"You are using the keeper state at '{path}'")
+    return StateStore(path)
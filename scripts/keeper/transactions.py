@@ -0,0 +1,333 @@
+import heapq
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from brownie import Wei, web3
+from brownie.network.transaction import Status, TransactionReceipt
+from hexbytes import HexBytes
+from web3.exceptions import TransactionNotFound
+
+
+REPLACE_AFTER = 120  # seconds a transaction may stay pending before a speed-up
+GAS_PRICE_BUMP = 1.125  # Nodes reject replacements that don't pay >= 10% more
+MAX_REPLACEMENTS = 5
+
+
+class NonceManager:
+    """
+    Hands out nonces for `account` locally, so any number of transactions can be
+    signed and broadcast without waiting for the previous one to be mined.
+
+    The counter starts from the node's pending transaction count. A nonce that
+    was allocated but never broadcast must be given back with `release`,
+    otherwise every later transaction is stuck behind the gap.
+    """
+
+    def __init__(self, account):
+        self.account = account
+        self._lock = threading.Lock()
+        self._released: List[int] = []
+        self._next = 0
+        self.sync()
+
+    def sync(self):
+        # NOTE: Only safe when nothing is in flight, e.g. on startup
+        with self._lock:
+            self._next = web3.eth.get_transaction_count(self.account.address, "pending")
+            self._released = []
+
+    def allocate(self) -> int:
+        with self._lock:
+            if len(self._released) > 0:
+                # NOTE: Fill gaps first, lowest nonce first
+                return heapq.heappop(self._released)
+            nonce = self._next
+            self._next += 1
+            return nonce
+
+    def release(self, nonce: int):
+        with self._lock:
+            heapq.heappush(self._released, nonce)
+            # NOTE: Shrink the counter back instead of keeping a trailing gap
+            while self._next - 1 in self._released:
+                self._released.remove(self._next - 1)
+                self._next -= 1
+            heapq.heapify(self._released)
+
+
+@dataclass
+class PendingTransaction:
+    nonce: int
+    target: str  # Address the call is for (e.g. the strategy)
+    label: str  # e.g. "harvest" or "tend"
+    gas_price: int
+    submitted_at: float
+    # Every transaction broadcast with `nonce`, the original one first. Any of
+    # them may be the one that ends up mined.
+    txs: List = field(default_factory=list)
+    cancelled: bool = False
+    status: Status = Status.Pending
+    receipt: Optional[object] = None  # The transaction that was mined
+    block_number: Optional[int] = None  # Where it was mined
+    gas_cost: int = 0  # wei paid for the transaction that was mined
+
+    @property
+    def tx(self):
+        return self.txs[-1]
+
+    @property
+    def replacements(self) -> int:
+        return len(self.txs) - 1
+
+
+class TransactionPipeline:
+    """
+    Submits transactions from `account` without waiting for them to be mined.
+
+    Each transaction gets a nonce from `nonces` and is broadcast with
+    `required_confs=0`, so a slow transaction never holds up the next one. The
+    pipeline keeps track of everything in flight (at most one transaction per
+    `target`), and `poll` collects the ones that were mined, speeding up the ones
+    that have been pending for longer than `replace_after` seconds by
+    re-broadcasting them with the same nonce and `gas_price_bump` times the gas
+    price (up to `max_gas_price`).
+
+    `gas_strategy` is only used to pick the gas price at submission time, since
+    the pipeline (and not brownie) is in charge of replacing transactions.
+
+    If `store` is given, everything in flight is saved to it and tracked again
+    after a restart (see `StateStore`), so a call isn't made twice just because
+    the keeper went down while it was pending. A nonce is saved before anything
+    is broadcast with it, so even a crash right in between leaves no trace of a
+    transaction behind.
+    """
+
+    def __init__(
+        self,
+        account,
+        gas_strategy,
+        nonces: Optional[NonceManager] = None,
+        replace_after: float = REPLACE_AFTER,
+        gas_price_bump: float = GAS_PRICE_BUMP,
+        max_gas_price: Optional[int] = None,
+        max_replacements: int = MAX_REPLACEMENTS,
+        store=None,
+    ):
+        self.account = account
+        self.gas_strategy = gas_strategy
+        self.nonces = nonces or NonceManager(account)
+        self.replace_after = replace_after
+        self.gas_price_bump = gas_price_bump
+        self.max_gas_price = Wei(max_gas_price) if max_gas_price else None
+        self.max_replacements = max_replacements
+        self.in_flight: Dict[int, PendingTransaction] = {}  # nonce => transaction
+        self._lock = threading.Lock()
+        self.store = store
+        if store:
+            self._restore()
+
+    def _restore(self):
+        # NOTE: Right after `sync`, so this is the node's pending transaction count
+        pending_count = self.nonces._next
+        for (
+            nonce,
+            target,
+            label,
+            gas_price,
+            submitted_at,
+            txids,
+            cancelled,
+        ) in self.store.load_pending(self.account.address):
+            if len(txids) == 0 and nonce >= pending_count:
+                # NOTE: Went down before broadcasting it
+                self.store.delete_pending(self.account.address, nonce)
+                continue
+            # NOTE: Without a hash, it is only tracked until its nonce is used up
+            self.in_flight[nonce] = PendingTransaction(
+                nonce=nonce,
+                target=target,
+                label=label,
+                gas_price=gas_price,
+                submitted_at=submitted_at,
+                txs=[
+                    TransactionReceipt(
+                        txid,
+                        sender=self.account,
+                        silent=True,
+                        required_confs=0,
+                        is_blocking=False,
+                    )
+                    for txid in txids
+                ],
+                cancelled=cancelled,
+            )
+            # NOTE: The node may have forgotten about it, but the nonce is ours
+            self.nonces._next = max(self.nonces._next, nonce + 1)
+
+        if len(self.in_flight) > 0:
+            print(f"Resumed {len(self.in_flight)} transactions in flight")
+
+    def _save(self, pending: PendingTransaction):
+        if self.store:
+            self.store.save_pending(self.account.address, pending)
+
+    def __len__(self) -> int:
+        return len(self.in_flight)
+
+    def _gas_price(self) -> int:
+        if hasattr(self.gas_strategy, "get_gas_price"):
+            return Wei(next(self.gas_strategy.get_gas_price()))
+        return Wei(self.gas_strategy)
+
+    def _bumped(self, pending: PendingTransaction) -> Optional[int]:
+        gas_price = Wei(pending.gas_price * self.gas_price_bump)
+        if self.max_gas_price and gas_price > self.max_gas_price:
+            return None
+        return gas_price
+
+    def is_pending(self, target: str) -> bool:
+        with self._lock:
+            return any(pending.target == target for pending in self.in_flight.values())
+
+    def submit(self, method, *args, target: str, label: str) -> PendingTransaction:
+        gas_price = self._gas_price()
+        nonce = self.nonces.allocate()
+        pending = PendingTransaction(
+            nonce=nonce,
+            target=target,
+            label=label,
+            gas_price=gas_price,
+            submitted_at=time.time(),
+        )
+        self._save(pending)
+        try:
+            tx = method(
+                *args,
+                {
+                    "from": self.account,
+                    "nonce": nonce,
+                    "gas_price": gas_price,
+                    "required_confs": 0,
+                },
+            )
+        except Exception:
+            # NOTE: Reverted during gas estimation (or failed to broadcast), so the
+            #       nonce was never used
+            self.nonces.release(nonce)
+            if self.store:
+                self.store.delete_pending(self.account.address, nonce)
+            raise
+
+        pending.txs.append(tx)
+        self._save(pending)
+        with self._lock:
+            self.in_flight[nonce] = pending
+        return pending
+
+    def speed_up(self, pending: PendingTransaction, gas_price: Optional[int] = None):
+        gas_price = Wei(gas_price) if gas_price else self._bumped(pending)
+        if gas_price is None:
+            print(f"[{pending.target}] `{pending.label}` is at the max gas price")
+            return
+
+        try:
+            tx = pending.tx.replace(gas_price=gas_price)
+        except ValueError:
+            return  # Already mined, picked up by the next `poll`
+
+        pending.txs.append(tx)
+        pending.gas_price = gas_price
+        pending.submitted_at = time.time()
+        self._save(pending)
+
+    def cancel(self, pending: PendingTransaction):
+        """
+        Replaces `pending` with an empty transfer to ourselves using the same
+        nonce, so whatever it was doing doesn't happen (if it isn't mined first).
+        """
+        gas_price = Wei(pending.gas_price * self.gas_price_bump)
+        try:
+            tx = self.account.transfer(
+                self.account,
+                0,
+                nonce=pending.nonce,
+                gas_price=gas_price,
+                required_confs=0,
+            )
+        except ValueError:
+            return  # Already mined, picked up by the next `poll`
+
+        pending.txs.append(tx)
+        pending.gas_price = gas_price
+        pending.submitted_at = time.time()
+        pending.cancelled = True
+        self._save(pending)
+
+    def _mined(self, pending: PendingTransaction) -> Optional[object]:
+        for tx in reversed(pending.txs):
+            try:
+                receipt = web3.eth.get_transaction_receipt(HexBytes(tx.txid))
+            except TransactionNotFound:
+                continue
+            if receipt is not None and receipt["blockHash"] is not None:
+                pending.status = Status(receipt["status"])
+                pending.block_number = receipt["blockNumber"]
+                pending.gas_cost = receipt["gasUsed"] * receipt.get(
+                    "effectiveGasPrice", tx.gas_price
+                )
+                return tx
+        return None
+
+    def poll(self) -> List[PendingTransaction]:
+        """
+        Returns (and stops tracking) every transaction whose nonce was used up
+        since the last poll, and speeds up the ones that are stuck.
+        """
+        # NOTE: One request tells which nonces were mined, the receipt is only
+        #       looked up for those
+        mined_count = web3.eth.get_transaction_count(self.account.address)
+        with self._lock:
+            in_flight = list(self.in_flight.values())
+
+        finished = []
+        now = time.time()
+        for pending in sorted(in_flight, key=lambda p: p.nonce):
+            if pending.nonce < mined_count:
+                pending.receipt = self._mined(pending)
+                if pending.receipt is None:
+                    # NOTE: Someone else used the nonce (e.g. the same account
+                    #       running somewhere else), or it was broadcast right
+                    #       before going down and its hash was never saved
+                    pending.status = Status.Dropped
+                finished.append(pending)
+
+            elif (
+                len(pending.txs) > 0
+                and now - pending.submitted_at >= self.replace_after
+                and pending.replacements < self.max_replacements
+            ):
+                print(f"[{pending.target}] `{pending.label}` is stuck, speeding up")
+                self.speed_up(pending)
+
+        with self._lock:
+            for pending in finished:
+                del self.in_flight[pending.nonce]
+        if self.store:
+            for pending in finished:
+                self.store.delete_pending(self.account.address, pending.nonce)
+        return finished
+
+    def drain(self, timeout: float = 600, poll_interval: float = 1):
+        """
+        Waits until everything in flight is mined (or `timeout` seconds pass), and
+        returns all of it.
+        """
+        finished = []
+        deadline = time.time() + timeout
+        while len(self.in_flight) > 0 and time.time() < deadline:
+            finished.extend(self.poll())
+            if len(self.in_flight) > 0:
+                time.sleep(poll_interval)
+        return finished
@@ -0,0 +1,42 @@
+import asyncio
+
+
+def run_worker(
+    project_path: str, network_name: str, private_key, inbox, outbox, worker_id: int
+):
+    """
+    Entry point of a keeper worker process (see `Coordinator`).
+
+    It runs in a freshly spawned interpreter, so it loads the project and
+    connects to the same node itself before anything that needs the contract
+    containers is imported.
+    """
+    from brownie import accounts, network, project
+
+    active = project.load(project_path)
+    active.load_config()
+    # NOTE: Like `brownie run` does, so the containers can be imported from brownie
+    active._add_to_main_namespace()
+    # NOTE: Never launch another local node, the coordinator's one is used
+    network.connect(network_name, launch_rpc=False)
+
+    from scripts.keep import load_keeper
+    from scripts.keeper.events import BlockWatcher
+    from scripts.keeper.multicall import load_multicall
+    from scripts.keeper.shards import ShardIndex, ShardStats
+    from scripts.keeper.state import load_state
+
+    bot = accounts.add(private_key)
+    stats = ShardStats()
+    keeper = load_keeper(
+        bot,
+        ShardIndex(bot.address, inbox, outbox, stats),
+        load_multicall(),
+        state=load_state(),
+        gas_cache=True,
+        base_fee_gate=True,
+        pipeline=True,
+        stats=stats,
+        worker_id=worker_id,
+    )
+    asyncio.run(keeper.run_on_blocks(BlockWatcher()))
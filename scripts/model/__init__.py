@@ -0,0 +1,3 @@
+"""
+Off-chain models of the contracts, exact to the wei.
+"""
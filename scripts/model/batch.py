@@ -0,0 +1,441 @@
+from dataclasses import dataclass, fields
+from typing import List, Tuple
+
+import numpy as np
+
+from scripts.model.vault import (
+    DEGRADATION_COEFFICIENT,
+    MAX_BPS,
+    MAX_UINT256,
+    SECS_PER_YEAR,
+    Revert,
+    VaultModel,
+)
+
+
+def uints(values, size: int = None) -> np.ndarray:
+    """
+    `values` as an array of Python ints, so math on it is exact (and floors)
+    however big the numbers get. A single value is repeated `size` times.
+    """
+    if size is not None and np.ndim(values) == 0:
+        values = [values] * size
+    return np.array([int(value) for value in values], dtype=object)
+
+
+class _Checks:
+    """
+    The `uint256` checks of Vyper, per lane: a lane fails as soon as one of
+    its operations would revert, and what it computes after that is ignored.
+    """
+
+    def __init__(self, size: int):
+        self.ok = np.ones(size, dtype=bool)
+
+    def _fail(self, failed, where=None):
+        failed = np.asarray(failed, dtype=bool)
+        if where is not None:
+            failed = failed & np.asarray(where, dtype=bool)
+        self.ok &= ~failed
+
+    def check(self, condition, where=None):
+        self._fail(~np.asarray(condition, dtype=bool), where)
+
+    def add(self, a, b, where=None):
+        result = a + b
+        self._fail(result > MAX_UINT256, where)
+        return result
+
+    def sub(self, a, b, where=None):
+        self._fail(b > a, where)
+        return a - b
+
+    def mul(self, a, b, where=None):
+        result = a * b
+        self._fail(result > MAX_UINT256, where)
+        return result
+
+    def div(self, a, b, where=None):
+        zero = np.asarray(b == 0, dtype=bool)
+        self._fail(zero, where)
+        return a // np.where(zero, 1, b)
+
+
+# NOTE: These take the state as a mapping of arrays (`vars(batch)`, or a copy
+#       of it being updated), so a transition can call them halfway through
+def _locked_profit(checks: _Checks, s) -> np.ndarray:
+    locked_funds_ratio = checks.mul(
+        checks.sub(s["timestamp"], s["last_report"]), s["locked_profit_degradation"]
+    )
+    unlocking = locked_funds_ratio < DEGRADATION_COEFFICIENT
+    return np.where(
+        unlocking,
+        checks.sub(
+            s["locked_profit"],
+            checks.mul(locked_funds_ratio, s["locked_profit"], where=unlocking)
+            // DEGRADATION_COEFFICIENT,
+            where=unlocking,
+        ),
+        0,
+    )
+
+
+def _free_funds(checks: _Checks, s) -> np.ndarray:
+    return checks.sub(
+        checks.add(s["total_idle"], s["total_debt"]), _locked_profit(checks, s)
+    )
+
+
+def _share_value(checks: _Checks, s, shares) -> np.ndarray:
+    empty = s["total_supply"] == 0
+    return np.where(
+        empty,
+        shares,
+        checks.div(
+            checks.mul(shares, _free_funds(checks, s), where=~empty),
+            s["total_supply"],
+            where=~empty,
+        ),
+    )
+
+
+def _shares_for_amount(checks: _Checks, s, amount) -> np.ndarray:
+    free_funds = _free_funds(checks, s)
+    funded = free_funds > 0
+    return np.where(
+        funded,
+        checks.mul(amount, s["total_supply"], where=funded)
+        // np.where(funded, free_funds, 1),
+        0,
+    )
+
+
+def _issue_shares(checks: _Checks, s, amount, where) -> np.ndarray:
+    # NOTE: Adding them to the supply is left to the caller
+    minted = s["total_supply"] > 0
+    shares = np.where(
+        minted,
+        checks.div(
+            checks.mul(amount, s["total_supply"], where=where & minted),
+            _free_funds(checks, s),
+            where=where & minted,
+        ),
+        amount,
+    )
+    checks.check(shares != 0, where=where)
+    return shares
+
+
+@dataclass
+class VaultBatch:
+    """
+    Many Vaults with one strategy each, in arrays with a lane per Vault, that
+    move through `report`, `deposit` and `withdraw` all at once.
+
+    The math is the one of `VaultModel` (and so of `Vault.vy`), on arrays of
+    Python ints: exact to the wei, but thousands of Vaults at the cost of one
+    Python call. A lane that would revert is left as it was, and flagged in
+    the mask every transition returns.
+
+    Only the shares of the rewards address and of the strategy are tracked, the
+    rest of `total_supply` belongs to the depositors as a whole.
+    """
+
+    timestamp: np.ndarray
+    total_supply: np.ndarray
+    total_idle: np.ndarray
+    total_debt: np.ndarray
+    debt_ratio: np.ndarray
+    last_report: np.ndarray
+    locked_profit: np.ndarray
+    locked_profit_degradation: np.ndarray
+    deposit_limit: np.ndarray
+    management_fee: np.ndarray
+    performance_fee: np.ndarray
+    decimals: np.ndarray
+    rewards_shares: np.ndarray  # `balanceOf(rewards)`
+    strategy_shares: np.ndarray  # `balanceOf(strategy)`
+    # See `StrategyParams`
+    strategy_performance_fee: np.ndarray
+    strategy_activation: np.ndarray
+    strategy_debt_ratio: np.ndarray
+    strategy_min_debt_per_harvest: np.ndarray
+    strategy_max_debt_per_harvest: np.ndarray
+    strategy_last_report: np.ndarray
+    strategy_total_debt: np.ndarray
+    strategy_total_gain: np.ndarray
+    strategy_total_loss: np.ndarray
+    emergency_shutdown: np.ndarray  # bool
+
+    @classmethod
+    def from_models(cls, models: List[VaultModel]) -> "VaultBatch":
+        """
+        One lane per model, each with exactly one strategy.
+        """
+        columns = {field.name: [] for field in fields(cls)}
+        for model in models:
+            if len(model.strategies) != 1:
+                raise ValueError("Every Vault must have exactly one strategy")
+            ((strategy, params),) = model.strategies.items()
+            for name in columns:
+                if name == "rewards_shares":
+                    value = model.balance_of(model.rewards)
+                elif name == "strategy_shares":
+                    value = model.balance_of(strategy)
+                elif name.startswith("strategy_"):
+                    value = getattr(params, name[len("strategy_") :])
+                else:
+                    value = getattr(model, name)
+                columns[name].append(value)
+        return cls(
+            **{
+                name: np.array(values, dtype=bool)
+                if name == "emergency_shutdown"
+                else uints(values)
+                for name, values in columns.items()
+            }
+        )
+
+    def __len__(self) -> int:
+        return len(self.total_supply)
+
+    def sleep(self, seconds):
+        self.timestamp = self.timestamp + uints(seconds, len(self))
+
+    def _update(self, ok: np.ndarray, **values):
+        for name, value in values.items():
+            setattr(self, name, np.where(ok, value, getattr(self, name)))
+
+    def _view(self, compute, *args):
+        checks = _Checks(len(self))
+        result = compute(checks, vars(self), *args)
+        if not checks.ok.all():
+            raise Revert(f"Reverts for lanes {np.flatnonzero(~checks.ok).tolist()}")
+        return result
+
+    def calculate_locked_profit(self) -> np.ndarray:
+        return self._view(_locked_profit)
+
+    def free_funds(self) -> np.ndarray:
+        return self._view(_free_funds)
+
+    def share_value(self, shares) -> np.ndarray:
+        return self._view(_share_value, uints(shares, len(self)))
+
+    def shares_for_amount(self, amount) -> np.ndarray:
+        return self._view(_shares_for_amount, uints(amount, len(self)))
+
+    def price_per_share(self) -> np.ndarray:
+        return self.share_value(10**self.decimals)
+
+    def deposit(self, amount) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Deposits `amount` in every Vault, and returns the shares issued and
+        which lanes went through.
+        """
+        amount = uints(amount, len(self))
+        checks = _Checks(len(self))
+        s = dict(vars(self))
+        checks.check(~s["emergency_shutdown"])
+        checks.check(
+            checks.add(checks.add(s["total_idle"], s["total_debt"]), amount)
+            <= s["deposit_limit"]
+        )
+        checks.check(amount > 0)
+        shares = _issue_shares(checks, s, amount, checks.ok.copy())
+        s["total_supply"] = checks.add(s["total_supply"], shares)
+        s["total_idle"] = checks.add(s["total_idle"], amount)
+
+        self._update(checks.ok, **s)
+        return np.where(checks.ok, shares, 0), checks.ok
+
+    def withdraw(self, shares, max_loss=1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Redeems `shares` of the depositors in every Vault, and returns the
+        amount withdrawn and which lanes went through.
+
+        The strategy frees what is asked of it in full (see `withdraw_in_full`),
+        so there is never a loss to cover.
+        """
+        shares = uints(shares, len(self))
+        max_loss = uints(max_loss, len(self))
+        checks = _Checks(len(self))
+        s = dict(vars(self))
+        checks.check(max_loss <= MAX_BPS)
+        depositors = s["total_supply"] - s["rewards_shares"] - s["strategy_shares"]
+        checks.check(shares <= depositors)
+        checks.check(shares > 0)
+
+        value = _share_value(checks, s, shares)
+        short = value > s["total_idle"]
+        withdrawn = np.where(
+            short,
+            np.minimum(
+                np.where(short, value - s["total_idle"], 0), s["strategy_total_debt"]
+            ),
+            0,
+        )
+        s["total_idle"] = s["total_idle"] + withdrawn
+        s["strategy_total_debt"] = checks.sub(s["strategy_total_debt"], withdrawn)
+        s["total_debt"] = checks.sub(s["total_debt"], withdrawn)
+        # NOTE: Even all of the strategy's debt doesn't cover it
+        drained = value > s["total_idle"]
+        value = np.where(drained, s["total_idle"], value)
+        shares = np.where(drained, _shares_for_amount(checks, s, value), shares)
+
+        s["total_supply"] = checks.sub(s["total_supply"], shares)
+        s["total_idle"] = checks.sub(s["total_idle"], value)
+
+        self._update(checks.ok, **s)
+        return np.where(checks.ok, value, 0), checks.ok
+
+    def report(
+        self, gain, loss, debt_payment, delegated_assets=0
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The strategy of every Vault reports, and the outstanding debt it should
+        pay back next is returned along with which lanes went through (see
+        `VaultModel.report`).
+        """
+        size = len(self)
+        gain = uints(gain, size)
+        loss = uints(loss, size)
+        debt_payment = uints(debt_payment, size)
+        delegated_assets = uints(delegated_assets, size)
+        checks = _Checks(size)
+        s = dict(vars(self))
+
+        # `_reportLoss`
+        reporting_loss = loss > 0
+        checks.check(s["strategy_total_debt"] >= loss, where=reporting_loss)
+        adjusting = reporting_loss & (s["debt_ratio"] != 0)
+        ratio_change = np.where(
+            adjusting,
+            np.minimum(
+                checks.div(
+                    checks.mul(loss, s["debt_ratio"], where=adjusting),
+                    s["total_debt"],
+                    where=adjusting,
+                ),
+                s["strategy_debt_ratio"],
+            ),
+            0,
+        )
+        s["strategy_debt_ratio"] = checks.sub(s["strategy_debt_ratio"], ratio_change)
+        s["debt_ratio"] = checks.sub(s["debt_ratio"], ratio_change)
+        s["strategy_total_loss"] = checks.add(s["strategy_total_loss"], loss)
+        s["strategy_total_debt"] = checks.sub(s["strategy_total_debt"], loss)
+        s["total_debt"] = checks.sub(s["total_debt"], loss)
+
+        # `_assessFees`
+        just_added = s["strategy_activation"] == s["timestamp"]
+        duration = checks.sub(
+            s["timestamp"], s["strategy_last_report"], where=~just_added
+        )
+        checks.check(duration != 0, where=~just_added)
+        assessing = ~just_added & (gain != 0)
+        management_fee = (
+            checks.mul(
+                checks.mul(
+                    checks.sub(
+                        s["strategy_total_debt"], delegated_assets, where=assessing
+                    ),
+                    duration,
+                    where=assessing,
+                ),
+                s["management_fee"],
+                where=assessing,
+            )
+            // MAX_BPS
+            // SECS_PER_YEAR
+        )
+        strategist_fee = (
+            checks.mul(gain, s["strategy_performance_fee"], where=assessing) // MAX_BPS
+        )
+        performance_fee = (
+            checks.mul(gain, s["performance_fee"], where=assessing) // MAX_BPS
+        )
+        total_fee = checks.add(
+            checks.add(performance_fee, strategist_fee, where=assessing),
+            management_fee,
+            where=assessing,
+        )
+        total_fee = np.where(assessing, np.minimum(total_fee, gain), 0)
+        minting = total_fee > 0
+        reward = np.where(minting, _issue_shares(checks, s, total_fee, minting), 0)
+        s["total_supply"] = checks.add(s["total_supply"], reward)
+        strategist_reward = np.where(
+            minting & (strategist_fee > 0),
+            checks.mul(strategist_fee, reward, where=minting)
+            // np.where(minting, total_fee, 1),
+            0,
+        )
+        s["strategy_shares"] = checks.add(s["strategy_shares"], strategist_reward)
+        s["rewards_shares"] = checks.add(
+            s["rewards_shares"], reward - strategist_reward
+        )
+
+        s["strategy_total_gain"] = checks.add(s["strategy_total_gain"], gain)
+
+        # `_creditAvailable`
+        total_assets = checks.add(s["total_idle"], s["total_debt"])
+        vault_debt_limit = checks.mul(s["debt_ratio"], total_assets) // MAX_BPS
+        strategy_debt_limit = (
+            checks.mul(s["strategy_debt_ratio"], total_assets) // MAX_BPS
+        )
+        exhausted = (
+            s["emergency_shutdown"]
+            | (strategy_debt_limit <= s["strategy_total_debt"])
+            | (vault_debt_limit <= s["total_debt"])
+        )
+        available = np.minimum(
+            np.minimum(
+                strategy_debt_limit - s["strategy_total_debt"],
+                vault_debt_limit - s["total_debt"],
+            ),
+            s["total_idle"],
+        )
+        credit = np.where(
+            exhausted | (available < s["strategy_min_debt_per_harvest"]),
+            0,
+            np.minimum(available, s["strategy_max_debt_per_harvest"]),
+        )
+
+        # `_debtOutstanding`
+        debt = np.where(
+            (s["debt_ratio"] == 0) | s["emergency_shutdown"],
+            s["strategy_total_debt"],
+            np.where(
+                s["strategy_total_debt"] <= strategy_debt_limit,
+                0,
+                s["strategy_total_debt"] - strategy_debt_limit,
+            ),
+        )
+        debt_payment = np.minimum(debt_payment, debt)
+        s["strategy_total_debt"] = checks.sub(s["strategy_total_debt"], debt_payment)
+        s["total_debt"] = checks.sub(s["total_debt"], debt_payment)
+        debt = debt - debt_payment
+
+        s["strategy_total_debt"] = checks.add(s["strategy_total_debt"], credit)
+        s["total_debt"] = checks.add(s["total_debt"], credit)
+
+        total_avail = checks.add(gain, debt_payment)
+        lending = total_avail < credit
+        s["total_idle"] = np.where(
+            lending,
+            checks.sub(s["total_idle"], credit - total_avail, where=lending),
+            checks.add(s["total_idle"], total_avail - credit, where=~lending),
+        )
+
+        locked_profit_before_loss = checks.sub(
+            checks.add(_locked_profit(checks, s), gain), total_fee
+        )
+        s["locked_profit"] = np.where(
+            locked_profit_before_loss > loss, locked_profit_before_loss - loss, 0
+        )
+
+        s["strategy_last_report"] = s["timestamp"]
+        s["last_report"] = s["timestamp"]
+
+        self._update(checks.ok, **s)
+        return np.where(checks.ok, debt, 0), checks.ok
@@ -0,0 +1,148 @@
+from dataclasses import dataclass, fields
+from typing import List, Optional
+
+import numpy as np
+
+from scripts.keeper.multicall import Batch
+from scripts.model.batch import _Checks, _locked_profit, _share_value
+from scripts.model.vault import DEGRADATION_COEFFICIENT, Revert
+
+
+@dataclass
+class VaultState:
+    """
+    Everything `pricePerShare()` depends on, as of `block_number`.
+    """
+
+    address: str
+    block_number: int
+    timestamp: int  # Of `block_number`
+    total_idle: int
+    total_debt: int
+    total_supply: int
+    locked_profit: int
+    last_report: int
+    locked_profit_degradation: int
+    decimals: int
+
+    @property
+    def unlocked_at(self) -> Optional[int]:
+        """
+        When all of the locked profit is released, if ever (until the next
+        report locks more).
+        """
+        if self.locked_profit_degradation == 0:
+            return None if self.locked_profit > 0 else self.last_report
+        # NOTE: Released once `elapsed * degradation >= DEGRADATION_COEFFICIENT`
+        return self.last_report + -(
+            -DEGRADATION_COEFFICIENT // self.locked_profit_degradation
+        )
+
+
+def fetch_states(multicall, vaults: List, block_identifier=None) -> List[VaultState]:
+    """
+    Reads the state of every Vault of `vaults` in one `eth_call`.
+    """
+    batch = Batch(multicall)
+    timestamp = batch.add(multicall.getCurrentBlockTimestamp)
+    indices = [
+        (
+            vault,
+            [
+                batch.add(getattr(vault, name))
+                for name in (
+                    "totalIdle",
+                    "totalDebt",
+                    "totalSupply",
+                    "lockedProfit",
+                    "lastReport",
+                    "lockedProfitDegradation",
+                    "decimals",
+                )
+            ],
+        )
+        for vault in vaults
+    ]
+    block_number, results = batch.execute(block_identifier=block_identifier)
+
+    return [
+        VaultState(
+            vault.address,
+            block_number,
+            results[timestamp],
+            *[results[i] for i in calls]
+        )
+        for vault, calls in indices
+    ]
+
+
+def fetch_states_from_lens(
+    lens, vaults: List, block_identifier=None
+) -> List[VaultState]:
+    """
+    Same as `fetch_states`, from the snapshots of a `VaultLens`.
+    """
+    snapshots = lens.snapshots(
+        [vault.address for vault in vaults], block_identifier=block_identifier
+    )
+    return [
+        VaultState(
+            snapshot["vault"],
+            snapshot["blockNumber"],
+            snapshot["timestamp"],
+            snapshot["totalIdle"],
+            snapshot["totalDebt"],
+            snapshot["totalSupply"],
+            snapshot["lockedProfit"],
+            snapshot["lastReport"],
+            snapshot["lockedProfitDegradation"],
+            snapshot["decimals"],
+        )
+        for snapshot in snapshots
+    ]
+
+
+def _columns(states: List[VaultState], timestamps):
+    timestamps = np.array(timestamps, dtype=object)
+    if timestamps.ndim == 1:
+        timestamps = timestamps.reshape(1, -1)
+
+    # NOTE: Every field is a column, so it broadcasts against the timestamps
+    s = {
+        field.name: np.array(
+            [int(getattr(state, field.name)) for state in states], dtype=object
+        ).reshape(-1, 1)
+        for field in fields(VaultState)
+        if field.name not in ("address", "block_number")
+    }
+    s["timestamp"] = np.vectorize(int, otypes=[object])(timestamps)
+    return s, _Checks(np.broadcast_shapes((len(states), 1), timestamps.shape))
+
+
+def forecast(states: List[VaultState], timestamps) -> np.ndarray:
+    """
+    `pricePerShare()` of every Vault of `states` at every one of `timestamps`,
+    assuming nothing happens to them in between: a row per Vault, a column per
+    timestamp. `timestamps` is either the same for every Vault, or a row of its
+    own per Vault.
+
+    The math is the Vault's (see `VaultBatch`), so it matches `pricePerShare()`
+    to the wei. Timestamps before a Vault's last report raise `Revert`, as that
+    is a past the Vault no longer knows.
+    """
+    s, checks = _columns(states, timestamps)
+    pps = _share_value(checks, s, 10 ** s["decimals"])
+    if not checks.ok.all():
+        raise Revert("Can't forecast before the last report")
+    return np.broadcast_to(pps, checks.ok.shape)
+
+
+def locked_profit_curve(states: List[VaultState], timestamps) -> np.ndarray:
+    """
+    Same as `forecast`, for the profit still locked.
+    """
+    s, checks = _columns(states, timestamps)
+    locked_profit = _locked_profit(checks, s)
+    if not checks.ok.all():
+        raise Revert("Can't forecast before the last report")
+    return np.broadcast_to(locked_profit, checks.ok.shape)
@@ -0,0 +1,442 @@
+import copy
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from brownie.exceptions import VirtualMachineError
+
+from scripts.model.vault import (
+    MAX_BPS,
+    MAX_UINT256,
+    MAXIMUM_STRATEGIES,
+    ZERO_ADDRESS,
+    Revert,
+    VaultModel,
+)
+
+ACTIONS = {
+    # action: weight
+    "deposit": 4,
+    "withdraw": 3,
+    "report": 4,
+    "add_strategy": 1,
+    "update_strategy_debt_ratio": 1,
+    "remove_strategy_from_queue": 1,
+    "add_strategy_to_queue": 1,
+    "sleep": 2,
+}
+SLEEPS = (1, 60, 3600, 6 * 3600, 24 * 3600, 30 * 24 * 3600)  # seconds
+
+
+@dataclass(frozen=True)
+class Step:
+    """
+    One call of a fuzzed sequence, with users and strategies by their index so
+    the same sequence runs against any deployment:
+
+    - `deposit`: `(user, amount)`
+    - `withdraw`: `(user, shares, max_loss)`
+    - `report`: `(strategy, gain, loss)`, the strategy earns `gain`, loses
+      `loss` (or all it has, if less) and then harvests
+    - `add_strategy`: `(strategy, debt_ratio, min_debt, max_debt, fee)`
+    - `update_strategy_debt_ratio`: `(strategy, debt_ratio)`
+    - `remove_strategy_from_queue`: `(strategy,)`, so a withdrawal can come up
+      short of what its shares are worth
+    - `add_strategy_to_queue`: `(strategy,)`
+    - `sleep`: `(seconds,)`
+    """
+
+    action: str
+    args: Tuple[int, ...]
+
+
+class Harness:
+    """
+    A `VaultModel`, plus the tokens of its users and of its strategies (which
+    behave like `TestStrategy`), so it can run a fuzzed sequence the way it
+    goes on-chain.
+    """
+
+    def __init__(
+        self, model: VaultModel, users: List[str], strategies: List[str], funds: int
+    ):
+        self.model = model
+        self.users = users
+        self.strategies = strategies
+        self.tokens: Dict[str, int] = {user: funds for user in users}
+        self.tokens.update({strategy: 0 for strategy in strategies})
+
+    def _liquidate(self, strategy: str, amount_needed: int) -> Tuple[int, int]:
+        # See `TestStrategy.liquidatePosition` and `BaseStrategy.withdraw`
+        total_debt = self.model.strategies[strategy].total_debt
+        total_assets = self.tokens[strategy]
+        loss = 0
+        if amount_needed > total_assets:
+            liquidated = total_assets
+            loss = amount_needed - total_assets
+        else:
+            if total_debt > total_assets:
+                loss = min(total_debt - total_assets, amount_needed)
+            liquidated = amount_needed
+        self.tokens[strategy] -= liquidated
+        return liquidated, loss
+
+    def _harvest(self, strategy: str):
+        # See `TestStrategy.prepareReturn` and `BaseStrategy.harvest`
+        debt_outstanding = self.model.debt_outstanding(strategy)
+        total_assets = self.tokens[strategy]
+        total_debt = self.model.strategies.get(strategy)
+        total_debt = total_debt.total_debt if total_debt else 0
+        if total_assets > debt_outstanding:
+            debt_payment = debt_outstanding
+            total_assets -= debt_outstanding
+        else:
+            debt_payment = total_assets
+            total_assets = 0
+        total_debt -= debt_payment
+
+        profit = loss = 0
+        if total_assets > total_debt:
+            profit = total_assets - total_debt
+        else:
+            loss = total_debt - total_assets
+
+        total_idle = self.model.total_idle
+        self.model.report(strategy, profit, loss, debt_payment)
+        # NOTE: Whatever the Vault took or lent is the change in its idle funds
+        self.tokens[strategy] -= self.model.total_idle - total_idle
+
+    def apply(self, step: Step) -> bool:
+        """
+        Runs `step` at `model.timestamp`, and returns whether it went through.
+        """
+        model = self.model
+        if step.action == "report":
+            # NOTE: Made before harvesting, they stay even if it reverts
+            strategy, gain, loss = self.strategies[step.args[0]], *step.args[1:]
+            self.tokens[strategy] += gain
+            self.tokens[strategy] -= min(loss, self.tokens[strategy])
+
+        tokens = copy.copy(self.tokens)
+        try:
+            if step.action == "deposit":
+                user, amount = self.users[step.args[0]], step.args[1]
+                if amount != MAX_UINT256 and amount > self.tokens[user]:
+                    raise Revert("transfer amount exceeds balance")
+                total_idle = model.total_idle
+                model.deposit(amount, user, balance=self.tokens[user])
+                self.tokens[user] -= model.total_idle - total_idle
+
+            elif step.action == "withdraw":
+                user, shares, max_loss = self.users[step.args[0]], *step.args[1:]
+                self.tokens[user] += model.withdraw(
+                    user, shares, max_loss, liquidate=self._liquidate
+                )
+
+            elif step.action == "report":
+                self._harvest(self.strategies[step.args[0]])
+
+            elif step.action == "add_strategy":
+                model.add_strategy(self.strategies[step.args[0]], *step.args[1:])
+
+            elif step.action == "update_strategy_debt_ratio":
+                model.update_strategy_debt_ratio(
+                    self.strategies[step.args[0]], step.args[1]
+                )
+
+            elif step.action == "remove_strategy_from_queue":
+                model.remove_strategy_from_queue(self.strategies[step.args[0]])
+
+            elif step.action == "add_strategy_to_queue":
+                model.add_strategy_to_queue(self.strategies[step.args[0]])
+
+            elif step.action == "sleep":
+                pass
+
+            else:
+                raise ValueError(f"Unknown action '{step.action}'")
+
+        except Revert:
+            # NOTE: The model rolls itself back, the tokens are ours to restore
+            self.tokens = tokens
+            return False
+        return True
+
+    def snapshot(self) -> Dict:
+        """
+        All public state of the Vault, keyed like its getters, along with the
+        tokens of users and strategies (see `snapshot_vault`).
+        """
+        model = self.model
+        holders = self.users + self.strategies + [model.rewards]
+        return {
+            "totalSupply": model.total_supply,
+            "totalIdle": model.total_idle,
+            "totalDebt": model.total_debt,
+            "debtRatio": model.debt_ratio,
+            "lastReport": model.last_report,
+            "lockedProfit": model.locked_profit,
+            "withdrawalQueue": list(model.withdrawal_queue),
+            "balanceOf": {holder: model.balance_of(holder) for holder in holders},
+            "strategies": {
+                strategy: tuple(vars(params).values())
+                for strategy, params in model.strategies.items()
+            },
+            "tokens": dict(self.tokens),
+        }
+
+    def check_invariants(self):
+        model = self.model
+        assert sum(model.balances.values()) == model.total_supply
+        assert model.balance_of(model.address) == 0
+        assert model.total_debt == sum(
+            params.total_debt for params in model.strategies.values()
+        )
+        assert model.debt_ratio == sum(
+            params.debt_ratio for params in model.strategies.values()
+        )
+        assert model.debt_ratio <= MAX_BPS
+        assert model.calculate_locked_profit() <= model.total_assets()
+        assert all(balance >= 0 for balance in self.tokens.values())
+
+
+def _pick(rng: random.Random, likely: List, unlikely: List):
+    # NOTE: Mostly what makes sense, sometimes what doesn't
+    return rng.choice(likely if rng.random() < 0.9 or not unlikely else unlikely)
+
+
+def random_step(rng: random.Random, harness: Harness, scale: int) -> Step:
+    """
+    A step that mostly makes sense in the state `harness` is in, and sometimes
+    doesn't so reverts get their share of coverage.
+    """
+    model = harness.model
+    action = rng.choices(list(ACTIONS), weights=list(ACTIONS.values()))[0]
+    user = rng.randrange(len(harness.users))
+    added = [
+        i
+        for i, strategy in enumerate(harness.strategies)
+        if strategy in model.strategies
+    ]
+    others = [i for i in range(len(harness.strategies)) if i not in added]
+
+    if action == "deposit":
+        funded = [i for i, u in enumerate(harness.users) if harness.tokens[u] > 0]
+        user = _pick(rng, funded or [user], [user])
+        wallet = harness.tokens[harness.users[user]]
+        amount = _pick(
+            rng,
+            [rng.randrange(1, wallet + 1) if wallet else 0, wallet, MAX_UINT256],
+            [0, wallet + 1],
+        )
+        return Step(action, (user, amount))
+
+    elif action == "withdraw":
+        holders = [i for i, u in enumerate(harness.users) if model.balance_of(u) > 0]
+        user = _pick(rng, holders or [user], [user])
+        shares = model.balance_of(harness.users[user])
+        shares = _pick(
+            rng,
+            [rng.randrange(1, shares + 1) if shares else 0, shares, MAX_UINT256],
+            [0, shares + 1],
+        )
+        max_loss = _pick(rng, [1, rng.randrange(MAX_BPS + 1)], [MAX_BPS + 1])
+        return Step(action, (user, shares, max_loss))
+
+    elif action == "report":
+        strategy = _pick(rng, added or others, others)
+        tokens = harness.tokens[harness.strategies[strategy]]
+        gain = rng.choice([0, rng.randrange(scale // 100)])
+        loss = _pick(rng, [0, 0, 0, rng.randrange(tokens + 1)], [tokens])
+        return Step(action, (strategy, gain, loss))
+
+    elif action == "add_strategy":
+        strategy = _pick(rng, others or added, added)
+        debt_ratio = _pick(
+            rng, [rng.randrange(MAX_BPS - model.debt_ratio + 1)], [MAX_BPS + 1]
+        )
+        min_debt = _pick(rng, [0], [rng.randrange(scale)])
+        max_debt = _pick(rng, [MAX_UINT256, rng.randrange(scale)], [0])
+        fee = _pick(rng, [rng.randrange(MAX_BPS // 2 + 1)], [MAX_BPS // 2 + 1])
+        return Step(action, (strategy, debt_ratio, min_debt, max_debt, fee))
+
+    elif action == "update_strategy_debt_ratio":
+        strategy = _pick(rng, added or others, others)
+        params = model.strategies.get(harness.strategies[strategy])
+        room = MAX_BPS - model.debt_ratio + (params.debt_ratio if params else 0)
+        debt_ratio = _pick(rng, [0, rng.randrange(room + 1)], [MAX_BPS + 1])
+        return Step(action, (strategy, debt_ratio))
+
+    elif action in ("remove_strategy_from_queue", "add_strategy_to_queue"):
+        queued = [
+            i
+            for i, strategy in enumerate(harness.strategies)
+            if strategy in model.withdrawal_queue
+        ]
+        unqueued = [i for i in added if i not in queued]
+        if action == "remove_strategy_from_queue":
+            # NOTE: Mostly one with debt, that `withdraw` then has to do without
+            indebted = [
+                i
+                for i in queued
+                if model.strategies[harness.strategies[i]].total_debt > 0
+            ]
+            strategy = _pick(
+                rng, indebted or queued or added or others, unqueued + others
+            )
+        else:
+            strategy = _pick(rng, unqueued or others or queued, queued + others)
+        return Step(action, (strategy,))
+
+    else:
+        return Step(action, (rng.choice(SLEEPS),))
+
+
+def run_model(
+    harness: Harness, rng: random.Random, steps: int, scale: int
+) -> List[Step]:
+    """
+    Runs `steps` random steps against the model only, checking its invariants
+    after each one, and returns them so they can be replayed.
+    """
+    sequence = []
+    for _ in range(steps):
+        step = random_step(rng, harness, scale)
+        if step.action == "sleep":
+            harness.model.timestamp += step.args[0]
+        else:
+            harness.model.timestamp += 1  # Every call is its own block
+        harness.apply(step)
+        harness.check_invariants()
+        sequence.append(step)
+    return sequence
+
+
+def fuzz(
+    new_harness,
+    seed: int,
+    runs: int,
+    steps: int,
+    scale: int,
+    sample_rate: float = 0.01,
+) -> List[List[Step]]:
+    """
+    Runs `runs` random sequences of `steps` against fresh models made by
+    `new_harness()`, and returns the ones sampled (at `sample_rate`, and at
+    least one) for on-chain confirmation with `replay`.
+    """
+    rng = random.Random(seed)
+    sampled = []
+    for run in range(runs):
+        sequence = run_model(new_harness(), rng, steps, scale)
+        if rng.random() < sample_rate or (run == runs - 1 and not sampled):
+            sampled.append(sequence)
+    return sampled
+
+
+def snapshot_vault(vault, token, users: List, strategies: List, rewards) -> Dict:
+    """
+    Same as `Harness.snapshot`, read from the deployed `vault`.
+    """
+    holders = list(users) + list(strategies) + [rewards]
+    queue = []
+    for i in range(MAXIMUM_STRATEGIES):
+        strategy = vault.withdrawalQueue(i)
+        if strategy == ZERO_ADDRESS:
+            break
+        queue.append(strategy)
+    return {
+        "totalSupply": vault.totalSupply(),
+        "totalIdle": vault.totalIdle(),
+        "totalDebt": vault.totalDebt(),
+        "debtRatio": vault.debtRatio(),
+        "lastReport": vault.lastReport(),
+        "lockedProfit": vault.lockedProfit(),
+        "withdrawalQueue": queue,
+        "balanceOf": {str(holder): vault.balanceOf(holder) for holder in holders},
+        "strategies": {
+            str(strategy): tuple(vault.strategies(strategy))
+            for strategy in strategies
+            if vault.strategies(strategy)[1] > 0  # activation
+        },
+        "tokens": {
+            str(holder): token.balanceOf(holder)
+            for holder in list(users) + list(strategies)
+        },
+    }
+
+
+def differences(expected: Dict, actual: Dict) -> List[str]:
+    return [
+        f"{key}: model {expected[key]} != vault {actual.get(key)}"
+        for key in expected
+        if expected[key] != actual.get(key)
+    ]
+
+
+def replay(
+    sequence: List[Step],
+    harness: Harness,
+    chain,
+    vault,
+    token,
+    users: List,
+    strategies: List,
+    gov,
+) -> Optional[str]:
+    """
+    Runs `sequence` against the deployed `vault` (fresh, like the model of
+    `harness`) and the model side by side, comparing all public state after
+    every step. Returns what differed first, if anything did.
+
+    `users` are the accounts of `harness.users`, with `vault` approved.
+    `strategies` are `TestStrategy`s of `vault`, not added yet, and `gov` is
+    its governance, with tokens to give as gains.
+    """
+    for i, step in enumerate(sequence):
+        went_through = True
+        try:
+            if step.action == "deposit":
+                user = users[step.args[0]]
+                vault.deposit(step.args[1], user, {"from": user})
+            elif step.action == "withdraw":
+                user, shares, max_loss = users[step.args[0]], *step.args[1:]
+                vault.withdraw(shares, user, max_loss, {"from": user})
+            elif step.action == "report":
+                strategy, gain, loss = strategies[step.args[0]], *step.args[1:]
+                if gain > 0:
+                    token.transfer(strategy, gain, {"from": gov})
+                loss = min(loss, token.balanceOf(strategy))
+                if loss > 0:
+                    strategy._takeFunds(loss, {"from": gov})
+                strategy.harvest({"from": gov})
+            elif step.action == "add_strategy":
+                strategy = strategies[step.args[0]]
+                vault.addStrategy(strategy, *step.args[1:], {"from": gov})
+            elif step.action == "update_strategy_debt_ratio":
+                strategy = strategies[step.args[0]]
+                vault.updateStrategyDebtRatio(strategy, step.args[1], {"from": gov})
+            elif step.action == "remove_strategy_from_queue":
+                strategy = strategies[step.args[0]]
+                vault.removeStrategyFromQueue(strategy, {"from": gov})
+            elif step.action == "add_strategy_to_queue":
+                strategy = strategies[step.args[0]]
+                vault.addStrategyToQueue(strategy, {"from": gov})
+            elif step.action == "sleep":
+                chain.sleep(step.args[0])
+        except VirtualMachineError:
+            went_through = False
+
+        if step.action != "sleep":
+            # NOTE: The chain decides the timestamps, the model follows
+            harness.model.timestamp = chain[-1].timestamp
+            if harness.apply(step) != went_through:
+                return f"Step {i} {step}: went through on-chain: {went_through}"
+
+        found = differences(
+            harness.snapshot(),
+            snapshot_vault(vault, token, users, strategies, harness.model.rewards),
+        )
+        if found:
+            return f"Step {i} {step}: " + "; ".join(found)
+    return None
@@ -0,0 +1,207 @@
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import pyarrow as pa
+
+from scripts.model.forecast import VaultState
+from scripts.model.vault import ZERO_ADDRESS, VaultModel, _add, _sub
+
+# Every Vault log that changes what `pricePerShare()` depends on
+HISTORY_EVENTS = (
+    "Deposit",
+    "Withdraw",
+    "Transfer",
+    "StrategyReported",
+    "FeeReport",
+    "WithdrawFromStrategy",
+    "StrategyMigrated",
+    "LockedProfitDegradationUpdated",
+)
+HISTORY_SCHEMA = pa.schema(
+    [
+        ("address", pa.string()),
+        ("block_number", pa.int64()),
+        ("timestamp", pa.int64()),
+        # NOTE: Arrow has no 256 bit integers, so these are decimal strings
+        ("total_idle", pa.string()),
+        ("total_debt", pa.string()),
+        ("total_supply", pa.string()),
+        ("locked_profit", pa.string()),
+        ("last_report", pa.int64()),
+        ("locked_profit_degradation", pa.string()),
+        ("decimals", pa.int64()),
+        ("price_per_share", pa.string()),
+    ]
+)
+
+
+class VaultHistory:
+    """
+    Rebuilds the accounting of Vaults (`totalIdle`, `totalDebt`, `totalSupply`
+    and `lockedProfit`) from their logs alone, so their history needs no calls
+    to an archive node.
+
+    Each log is applied to a `VaultModel` the way the function that emitted it
+    changed the Vault:
+      - `Transfer` from/to nobody mints/burns shares (deposits and fees/withdrawals)
+      - `Deposit` and `Withdraw` move tokens in/out of `totalIdle`
+      - `WithdrawFromStrategy` moves what a withdrawal took out of a strategy
+        (its drop in debt, minus the loss) from `totalDebt` to `totalIdle`
+      - `StrategyReported` sets the strategy's debt, moves the difference
+        between what it paid back (`gain + debtPaid`) and was lent (`debtAdded`)
+        in or out of `totalIdle`, and locks `gain` minus the fees that the
+        `FeeReport` right before it charged
+    so the state after each log is the Vault's, to the wei.
+
+    The logs of a Vault must be replayed from its deployment on, in the order
+    they were emitted (see `ColumnStore.scan`). `decimals` are the Vaults'
+    `decimals()` (18 if missing), which no log has.
+    """
+
+    def __init__(self, decimals: Optional[Dict[str, int]] = None):
+        self.decimals = decimals or {}
+        self.models: Dict[str, VaultModel] = {}
+        self.debts: Dict[str, Dict[str, int]] = {}  # Vault => strategy => debt
+        # NOTE: Vault => transaction and fees of its last `FeeReport`
+        self._fees: Dict[str, Tuple[str, int]] = {}
+
+    def _model(self, vault: str) -> VaultModel:
+        if vault not in self.models:
+            self.models[vault] = VaultModel(
+                address=vault, decimals=self.decimals.get(vault, 18)
+            )
+            self.debts[vault] = {}
+        return self.models[vault]
+
+    def _set_debt(self, vault: str, strategy: str, debt: int) -> int:
+        # NOTE: Returns how much the strategy's debt went down
+        model = self.models[vault]
+        previous = self.debts[vault].get(strategy, 0)
+        self.debts[vault][strategy] = debt
+        model.total_debt = _sub(_add(model.total_debt, debt), previous)
+        return previous - debt
+
+    def apply(self, event: str, row: Dict):
+        """
+        Applies the log `row` of `event` (see `event_schema`).
+        """
+        vault = row["address"]
+        model = self._model(vault)
+        model.timestamp = row["timestamp"]
+
+        if event == "Transfer":
+            if row["sender"] == ZERO_ADDRESS:
+                model.total_supply = _add(model.total_supply, int(row["value"]))
+            elif row["receiver"] == ZERO_ADDRESS:
+                model.total_supply = _sub(model.total_supply, int(row["value"]))
+
+        elif event == "Deposit":
+            model.total_idle = _add(model.total_idle, int(row["amount"]))
+
+        elif event == "Withdraw":
+            model.total_idle = _sub(model.total_idle, int(row["amount"]))
+
+        elif event == "WithdrawFromStrategy":
+            change = self._set_debt(vault, row["strategy"], int(row["totalDebt"]))
+            withdrawn = _sub(change, int(row["loss"]))
+            model.total_idle = _add(model.total_idle, withdrawn)
+
+        elif event == "FeeReport":
+            fees = sum(
+                int(row[name])
+                for name in ("management_fee", "performance_fee", "strategist_fee")
+            )
+            self._fees[vault] = (row["transaction_hash"], fees)
+
+        elif event == "StrategyReported":
+            gain, loss = int(row["gain"]), int(row["loss"])
+            self._set_debt(vault, row["strategy"], int(row["totalDebt"]))
+            # NOTE: Paid back `gain + debtPaid` and was lent `debtAdded`
+            model.total_idle = _sub(
+                _add(model.total_idle, gain + int(row["debtPaid"])),
+                int(row["debtAdded"]),
+            )
+
+            # NOTE: `FeeReport` is only logged if fees were assessed, by this report
+            transaction, fees = self._fees.pop(vault, (None, 0))
+            total_fees = (
+                min(fees, gain) if transaction == row["transaction_hash"] else 0
+            )
+            locked_profit = _sub(
+                _add(model.calculate_locked_profit(), gain), total_fees
+            )
+            model.locked_profit = locked_profit - loss if locked_profit > loss else 0
+            model.last_report = row["timestamp"]
+
+        elif event == "StrategyMigrated":
+            debts = self.debts[vault]
+            debts[row["newVersion"]] = debts.pop(row["oldVersion"], 0)
+
+        elif event == "LockedProfitDegradationUpdated":
+            model.locked_profit_degradation = int(row["value"])
+
+    def state(self, vault: str, block_number: int) -> VaultState:
+        model = self.models[vault]
+        return VaultState(
+            vault,
+            block_number,
+            model.timestamp,
+            model.total_idle,
+            model.total_debt,
+            model.total_supply,
+            model.locked_profit,
+            model.last_report,
+            model.locked_profit_degradation,
+            model.decimals,
+        )
+
+    def _snapshot(self, vault: str, block_number: int) -> Tuple[VaultState, int]:
+        return self.state(vault, block_number), self.models[vault].price_per_share()
+
+    def replay(
+        self, logs: Iterable[Tuple[str, Dict]]
+    ) -> Iterator[Tuple[VaultState, int]]:
+        """
+        Applies `logs`, and yields the state and `pricePerShare()` of each Vault
+        at the end of every block it logged something in.
+
+        NOTE: In between, `forecast` gives `pricePerShare()` at any time.
+        """
+        block_number = None
+        changed = []  # Vaults with logs in `block_number`, in order
+        for event, row in logs:
+            if row["block_number"] != block_number:
+                for vault in changed:
+                    yield self._snapshot(vault, block_number)
+                block_number, changed = row["block_number"], []
+            self.apply(event, row)
+            if row["address"] not in changed:
+                changed.append(row["address"])
+
+        for vault in changed:
+            yield self._snapshot(vault, block_number)
+
+
+def price_history(store, decimals: Optional[Dict[str, int]] = None) -> pa.Table:
+    """
+    The state and `pricePerShare()` of every Vault indexed in `store` (see
+    `EventIndexer`) at the end of every block it logged something in, from one
+    pass over its logs.
+    """
+    history = VaultHistory(decimals)
+    rows = [
+        {
+            "address": state.address,
+            "block_number": state.block_number,
+            "timestamp": state.timestamp,
+            "total_idle": str(state.total_idle),
+            "total_debt": str(state.total_debt),
+            "total_supply": str(state.total_supply),
+            "locked_profit": str(state.locked_profit),
+            "last_report": state.last_report,
+            "locked_profit_degradation": str(state.locked_profit_degradation),
+            "decimals": state.decimals,
+            "price_per_share": str(price_per_share),
+        }
+        for state, price_per_share in history.replay(store.scan(HISTORY_EVENTS))
+    ]
+    return pa.Table.from_pylist(rows, schema=HISTORY_SCHEMA)
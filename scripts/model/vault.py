@@ -0,0 +1,484 @@
+import copy
+from dataclasses import dataclass
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+
+# See `Vault.vy`
+MAX_UINT256 = 2**256 - 1
+MAX_BPS = 10_000
+SECS_PER_YEAR = 31_556_952  # 365.2425 days
+DEGRADATION_COEFFICIENT = 10**18
+MAXIMUM_STRATEGIES = 20
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# Set by `Vault.initialize`
+PERFORMANCE_FEE = 1000  # 10% of yield (per Strategy)
+MANAGEMENT_FEE = 200  # 2% per year
+LOCKED_PROFIT_DEGRADATION = DEGRADATION_COEFFICIENT * 46 // 10**6  # 6 hours in blocks
+
+
+class Revert(Exception):
+    """
+    The call would revert on-chain. The model is left as it was before the call.
+    """
+
+
+# NOTE: Vyper checks every operation on `uint256`, these are the same checks
+def _add(a: int, b: int) -> int:
+    if a + b > MAX_UINT256:
+        raise Revert("overflow")
+    return a + b
+
+
+def _sub(a: int, b: int) -> int:
+    if b > a:
+        raise Revert("underflow")
+    return a - b
+
+
+def _mul(a: int, b: int) -> int:
+    if a * b > MAX_UINT256:
+        raise Revert("overflow")
+    return a * b
+
+
+def _div(a: int, b: int) -> int:
+    if b == 0:
+        raise Revert("division by zero")
+    return a // b
+
+
+def _check(condition: bool, reason: str = "assert"):
+    if not condition:
+        raise Revert(reason)
+
+
+def _atomic(method):
+    # NOTE: Like a transaction, a revert undoes everything the call did
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        state = copy.deepcopy(self.__dict__)
+        try:
+            return method(self, *args, **kwargs)
+        except Revert:
+            self.__dict__ = state
+            raise
+
+    return wrapper
+
+
+@dataclass
+class StrategyParams:
+    # NOTE: Same order as `Vault.strategies()`
+    performance_fee: int = 0
+    activation: int = 0
+    debt_ratio: int = 0
+    min_debt_per_harvest: int = 0
+    max_debt_per_harvest: int = MAX_UINT256
+    last_report: int = 0
+    total_debt: int = 0
+    total_gain: int = 0
+    total_loss: int = 0
+
+
+def withdraw_in_full(strategy: str, amount_needed: int) -> Tuple[int, int]:
+    """
+    Default for `VaultModel.withdraw`: the strategy frees all `amount_needed`,
+    without a loss.
+    """
+    return amount_needed, 0
+
+
+class VaultModel:
+    """
+    The share accounting of `Vault.vy`, in pure Python.
+
+    Every method mirrors the Vault function of the same name, operation for
+    operation: integer math floors like the EVM does, and anything that would
+    revert on-chain (including under/overflows) raises `Revert`. So the state
+    after any sequence of calls is the one the Vault would be in, to the wei.
+
+    `timestamp` stands for `block.timestamp`, move it forward between calls.
+    Tokens are only tracked as far as the Vault does (`total_idle` and
+    `total_debt`), the balances of strategies and depositors are up to the
+    caller. Access control isn't modelled.
+    """
+
+    def __init__(
+        self,
+        address: str = "0xVault",
+        rewards: str = "0xRewards",
+        decimals: int = 18,
+        timestamp: int = 0,
+        deposit_limit: int = 0,
+        performance_fee: int = PERFORMANCE_FEE,
+        management_fee: int = MANAGEMENT_FEE,
+        locked_profit_degradation: int = LOCKED_PROFIT_DEGRADATION,
+    ):
+        self.address = address
+        self.rewards = rewards
+        self.decimals = decimals
+        self.timestamp = timestamp
+
+        self.total_supply = 0
+        self.balances: Dict[str, int] = {}
+
+        self.strategies: Dict[str, StrategyParams] = {}
+        self.withdrawal_queue: List[str] = []
+        self.emergency_shutdown = False
+        self.deposit_limit = deposit_limit
+        self.debt_ratio = 0
+        self.total_idle = 0
+        self.total_debt = 0
+        self.last_report = timestamp
+        self.activation = timestamp
+        self.locked_profit = 0
+        self.locked_profit_degradation = locked_profit_degradation
+        self.management_fee = management_fee
+        self.performance_fee = performance_fee
+
+    def balance_of(self, account: str) -> int:
+        return self.balances.get(account, 0)
+
+    def _transfer(self, sender: str, receiver: str, amount: int):
+        _check(receiver not in (self.address, ZERO_ADDRESS))
+        self.balances[sender] = _sub(self.balance_of(sender), amount)
+        self.balances[receiver] = _add(self.balance_of(receiver), amount)
+
+    def total_assets(self) -> int:
+        return _add(self.total_idle, self.total_debt)
+
+    def calculate_locked_profit(self) -> int:
+        locked_funds_ratio = _mul(
+            _sub(self.timestamp, self.last_report), self.locked_profit_degradation
+        )
+        if locked_funds_ratio < DEGRADATION_COEFFICIENT:
+            locked_profit = self.locked_profit
+            return _sub(
+                locked_profit,
+                _mul(locked_funds_ratio, locked_profit) // DEGRADATION_COEFFICIENT,
+            )
+        else:
+            return 0
+
+    def free_funds(self) -> int:
+        return _sub(self.total_assets(), self.calculate_locked_profit())
+
+    def _issue_shares_for_amount(self, to: str, amount: int) -> int:
+        total_supply = self.total_supply
+        if total_supply > 0:
+            shares = _div(_mul(amount, total_supply), self.free_funds())
+        else:
+            shares = amount
+        _check(shares != 0, "division rounding resulted in zero")
+
+        self.total_supply = _add(total_supply, shares)
+        self.balances[to] = _add(self.balance_of(to), shares)
+        return shares
+
+    def share_value(self, shares: int) -> int:
+        if self.total_supply == 0:
+            return shares
+        return _div(_mul(shares, self.free_funds()), self.total_supply)
+
+    def shares_for_amount(self, amount: int) -> int:
+        free_funds = self.free_funds()
+        if free_funds > 0:
+            return _mul(amount, self.total_supply) // free_funds
+        else:
+            return 0
+
+    def price_per_share(self) -> int:
+        return self.share_value(10**self.decimals)
+
+    def max_available_shares(self) -> int:
+        shares = self.shares_for_amount(self.total_idle)
+        for strategy in self.withdrawal_queue:
+            shares = _add(
+                shares, self.shares_for_amount(self.strategies[strategy].total_debt)
+            )
+        return shares
+
+    def available_deposit_limit(self) -> int:
+        if self.deposit_limit > self.total_assets():
+            return self.deposit_limit - self.total_assets()
+        else:
+            return 0
+
+    @_atomic
+    def deposit(
+        self, amount: int, recipient: str, balance: Optional[int] = None
+    ) -> int:
+        """
+        Deposits `amount` for `recipient`, and returns the shares issued. If
+        `amount` is `MAX_UINT256`, `balance` is what the depositor holds.
+        """
+        _check(not self.emergency_shutdown)
+        _check(recipient not in (self.address, ZERO_ADDRESS))
+
+        if amount == MAX_UINT256:
+            if balance is None:
+                raise ValueError("`balance` is needed to deposit everything")
+            amount = min(_sub(self.deposit_limit, self.total_assets()), balance)
+        else:
+            _check(_add(self.total_assets(), amount) <= self.deposit_limit)
+        _check(amount > 0)
+
+        shares = self._issue_shares_for_amount(recipient, amount)
+        self.total_idle = _add(self.total_idle, amount)
+        return shares
+
+    def _report_loss(self, strategy: str, loss: int):
+        params = self.strategies[strategy]
+        total_debt = params.total_debt
+        _check(total_debt >= loss)
+
+        if self.debt_ratio != 0:
+            ratio_change = min(
+                _div(_mul(loss, self.debt_ratio), self.total_debt), params.debt_ratio
+            )
+            params.debt_ratio = _sub(params.debt_ratio, ratio_change)
+            self.debt_ratio = _sub(self.debt_ratio, ratio_change)
+        params.total_loss = _add(params.total_loss, loss)
+        params.total_debt = _sub(total_debt, loss)
+        self.total_debt = _sub(self.total_debt, loss)
+
+    @_atomic
+    def withdraw(
+        self,
+        owner: str,
+        max_shares: int = MAX_UINT256,
+        max_loss: int = 1,
+        liquidate: Callable[[str, int], Tuple[int, int]] = withdraw_in_full,
+    ) -> int:
+        """
+        Redeems `max_shares` of `owner`, and returns the amount withdrawn.
+
+        `liquidate(strategy, amount_needed)` stands for `Strategy.withdraw`, it
+        returns what the strategy freed and the loss it reported.
+        """
+        shares = max_shares
+        _check(max_loss <= MAX_BPS)
+        if shares == MAX_UINT256:
+            shares = self.balance_of(owner)
+        _check(shares <= self.balance_of(owner))
+        _check(shares > 0)
+
+        value = self.share_value(shares)
+        vault_balance = self.total_idle
+
+        if value > vault_balance:
+            total_loss = 0
+            for strategy in self.withdrawal_queue:
+                if value <= vault_balance:
+                    break
+
+                params = self.strategies[strategy]
+                amount_needed = min(value - vault_balance, params.total_debt)
+                if amount_needed == 0:
+                    continue
+
+                withdrawn, loss = liquidate(strategy, amount_needed)
+                vault_balance = _add(vault_balance, withdrawn)
+
+                if loss > 0:
+                    value = _sub(value, loss)
+                    total_loss = _add(total_loss, loss)
+                    self._report_loss(strategy, loss)
+
+                params.total_debt = _sub(params.total_debt, withdrawn)
+                self.total_debt = _sub(self.total_debt, withdrawn)
+
+            self.total_idle = vault_balance
+            if value > vault_balance:
+                value = vault_balance
+                shares = self.shares_for_amount(_add(value, total_loss))
+
+            _check(
+                total_loss <= _mul(max_loss, _add(value, total_loss)) // MAX_BPS,
+                "loss protection",
+            )
+
+        self.total_supply = _sub(self.total_supply, shares)
+        self.balances[owner] = _sub(self.balance_of(owner), shares)
+        self.total_idle = _sub(self.total_idle, value)
+        return value
+
+    @_atomic
+    def add_strategy(
+        self,
+        strategy: str,
+        debt_ratio: int,
+        min_debt_per_harvest: int,
+        max_debt_per_harvest: int,
+        performance_fee: int,
+    ):
+        _check(len(self.withdrawal_queue) < MAXIMUM_STRATEGIES)
+        _check(not self.emergency_shutdown)
+        _check(strategy != ZERO_ADDRESS)
+        _check(strategy not in self.strategies)
+        _check(_add(self.debt_ratio, debt_ratio) <= MAX_BPS)
+        _check(min_debt_per_harvest <= max_debt_per_harvest)
+        _check(performance_fee <= MAX_BPS // 2)
+
+        self.strategies[strategy] = StrategyParams(
+            performance_fee=performance_fee,
+            activation=self.timestamp,
+            debt_ratio=debt_ratio,
+            min_debt_per_harvest=min_debt_per_harvest,
+            max_debt_per_harvest=max_debt_per_harvest,
+            last_report=self.timestamp,
+        )
+        self.debt_ratio = _add(self.debt_ratio, debt_ratio)
+        self.withdrawal_queue.append(strategy)
+
+    @_atomic
+    def update_strategy_debt_ratio(self, strategy: str, debt_ratio: int):
+        _check(strategy in self.strategies)
+        params = self.strategies[strategy]
+        self.debt_ratio = _sub(self.debt_ratio, params.debt_ratio)
+        params.debt_ratio = debt_ratio
+        self.debt_ratio = _add(self.debt_ratio, debt_ratio)
+        _check(self.debt_ratio <= MAX_BPS)
+
+    @_atomic
+    def add_strategy_to_queue(self, strategy: str):
+        _check(strategy in self.strategies)
+        _check(strategy not in self.withdrawal_queue)
+        _check(len(self.withdrawal_queue) < MAXIMUM_STRATEGIES)
+        self.withdrawal_queue.append(strategy)
+
+    @_atomic
+    def remove_strategy_from_queue(self, strategy: str):
+        # NOTE: Its debt stays, `withdraw` just can't free it up anymore
+        _check(strategy in self.withdrawal_queue)
+        self.withdrawal_queue.remove(strategy)
+
+    def debt_outstanding(self, strategy: str) -> int:
+        params = self.strategies.get(strategy, StrategyParams())
+        if self.debt_ratio == 0:
+            return params.total_debt
+
+        strategy_debt_limit = _mul(params.debt_ratio, self.total_assets()) // MAX_BPS
+        if self.emergency_shutdown:
+            return params.total_debt
+        elif params.total_debt <= strategy_debt_limit:
+            return 0
+        else:
+            return params.total_debt - strategy_debt_limit
+
+    def credit_available(self, strategy: str) -> int:
+        if self.emergency_shutdown:
+            return 0
+        params = self.strategies.get(strategy, StrategyParams())
+        vault_total_assets = self.total_assets()
+        vault_debt_limit = _mul(self.debt_ratio, vault_total_assets) // MAX_BPS
+        strategy_debt_limit = _mul(params.debt_ratio, vault_total_assets) // MAX_BPS
+
+        if (
+            strategy_debt_limit <= params.total_debt
+            or vault_debt_limit <= self.total_debt
+        ):
+            return 0
+
+        available = strategy_debt_limit - params.total_debt
+        available = min(available, vault_debt_limit - self.total_debt)
+        available = min(available, self.total_idle)
+
+        if available < params.min_debt_per_harvest:
+            return 0
+        else:
+            return min(available, params.max_debt_per_harvest)
+
+    def _assess_fees(self, strategy: str, gain: int, delegated_assets: int) -> int:
+        params = self.strategies[strategy]
+        if params.activation == self.timestamp:
+            return 0
+
+        duration = _sub(self.timestamp, params.last_report)
+        _check(duration != 0, "can't assessFees twice within the same block")
+
+        if gain == 0:
+            return 0
+
+        management_fee = (
+            _mul(
+                _mul(_sub(params.total_debt, delegated_assets), duration),
+                self.management_fee,
+            )
+            // MAX_BPS
+            // SECS_PER_YEAR
+        )
+        strategist_fee = _mul(gain, params.performance_fee) // MAX_BPS
+        performance_fee = _mul(gain, self.performance_fee) // MAX_BPS
+
+        total_fee = _add(_add(performance_fee, strategist_fee), management_fee)
+        if total_fee > gain:
+            total_fee = gain
+        if total_fee > 0:
+            reward = self._issue_shares_for_amount(self.address, total_fee)
+            if strategist_fee > 0:
+                strategist_reward = _mul(strategist_fee, reward) // total_fee
+                self._transfer(self.address, strategy, strategist_reward)
+            if self.balance_of(self.address) > 0:
+                self._transfer(
+                    self.address, self.rewards, self.balance_of(self.address)
+                )
+        return total_fee
+
+    @_atomic
+    def report(
+        self,
+        strategy: str,
+        gain: int,
+        loss: int,
+        debt_payment: int,
+        delegated_assets: int = 0,
+    ) -> int:
+        """
+        `strategy` reports, and the outstanding debt it should pay back next is
+        returned. `delegated_assets` is what `Strategy.delegatedAssets()` gives.
+
+        NOTE: When the strategy's debt ratio is 0 or the Vault is shut down, the
+              Vault returns the strategy's `estimatedTotalAssets()` instead, which
+              is out of the model's reach.
+        """
+        _check(strategy in self.strategies)
+
+        if loss > 0:
+            self._report_loss(strategy, loss)
+
+        total_fees = self._assess_fees(strategy, gain, delegated_assets)
+        params = self.strategies[strategy]
+        params.total_gain = _add(params.total_gain, gain)
+
+        credit = self.credit_available(strategy)
+        debt = self.debt_outstanding(strategy)
+        debt_payment = min(debt_payment, debt)
+
+        if debt_payment > 0:
+            params.total_debt = _sub(params.total_debt, debt_payment)
+            self.total_debt = _sub(self.total_debt, debt_payment)
+            debt -= debt_payment
+
+        if credit > 0:
+            params.total_debt = _add(params.total_debt, credit)
+            self.total_debt = _add(self.total_debt, credit)
+
+        total_avail = _add(gain, debt_payment)
+        if total_avail < credit:
+            self.total_idle = _sub(self.total_idle, credit - total_avail)
+        elif total_avail > credit:
+            self.total_idle = _add(self.total_idle, total_avail - credit)
+
+        locked_profit_before_loss = _sub(
+            _add(self.calculate_locked_profit(), gain), total_fees
+        )
+        if locked_profit_before_loss > loss:
+            self.locked_profit = locked_profit_before_loss - loss
+        else:
+            self.locked_profit = 0
+
+        params.last_report = self.timestamp
+        self.last_report = self.timestamp
+        return debt
@@ -0,0 +1,118 @@
+import brownie
+import pytest
+
+MAX_UINT256 = 2**256 - 1
+
+
+@pytest.fixture
+def adapter(gov, rando, token, vault, ERC4626Adapter):
+    adapter = gov.deploy(ERC4626Adapter, vault, "Adapter", "ad")
+    token.approve(adapter, MAX_UINT256, {"from": gov})
+    token.approve(adapter, MAX_UINT256, {"from": rando})
+    yield adapter
+
+
+def event(tx, name, contract):
+    # NOTE: The Vault logs a `Deposit` and `Withdraw` of its own
+    return next(e for e in tx.events[name] if e.address == contract)
+
+
+def lock_profit(chain, gov, token, strategy):
+    strategy.harvest({"from": gov})
+    token.transfer(strategy, token.balanceOf(strategy) // 10, {"from": gov})
+    chain.sleep(3600)
+    strategy.harvest({"from": gov})
+    chain.sleep(3600)
+    chain.mine()
+
+
+def test_config(token, vault, adapter):
+    assert adapter.apiVersion() == "0.1.0"
+    assert adapter.vault() == vault
+    assert adapter.asset() == token
+    assert adapter.decimals() == vault.decimals()
+    assert adapter.name() == "Adapter"
+    assert adapter.symbol() == "ad"
+
+
+def test_deposit_redeem(chain, gov, rando, token, vault, strategy, adapter):
+    lock_profit(chain, gov, token, strategy)
+    amount = token.balanceOf(gov) // 2
+    shares = adapter.previewDeposit(amount)
+    assert adapter.convertToShares(amount) == shares
+
+    tx = adapter.deposit(amount, rando, {"from": gov})
+    assert tx.return_value == shares
+    assert event(tx, "Deposit", adapter)["sender"] == gov
+    assert event(tx, "Deposit", adapter)["owner"] == rando
+    assert adapter.balanceOf(rando) == adapter.totalSupply() == shares
+    assert vault.balanceOf(adapter) == shares
+    assert adapter.totalAssets() == vault.previewRedeem(shares)
+
+    assets = adapter.previewRedeem(shares)
+    assert adapter.convertToAssets(shares) == assets
+    tx = adapter.redeem(shares, gov, rando, {"from": rando})
+    assert tx.return_value == assets
+    assert event(tx, "Withdraw", adapter)["receiver"] == gov
+    assert event(tx, "Withdraw", adapter)["shares"] == shares
+    assert adapter.balanceOf(rando) == adapter.totalSupply() == 0
+    assert vault.balanceOf(adapter) == 0
+
+
+def test_mint_withdraw(chain, gov, token, vault, strategy, adapter):
+    lock_profit(chain, gov, token, strategy)
+    shares = 10 ** token.decimals()
+    paid = adapter.previewMint(shares)
+    balance = token.balanceOf(gov)
+    assert adapter.mint(shares, {"from": gov}).return_value == paid
+    assert token.balanceOf(gov) == balance - paid
+    assert adapter.balanceOf(gov) >= shares
+
+    assets = adapter.maxWithdraw(gov)
+    shares = adapter.previewWithdraw(assets)
+    tx = adapter.withdraw(assets, {"from": gov})
+    assert tx.return_value == shares
+    received = event(tx, "Withdraw", adapter)["assets"]
+    assert received >= assets
+    assert token.balanceOf(gov) == balance - paid + received
+
+
+def test_allowance(gov, rando, token, adapter):
+    adapter.deposit(10 ** token.decimals(), {"from": gov})
+    shares = adapter.balanceOf(gov)
+    with brownie.reverts():
+        adapter.redeem(shares, rando, gov, {"from": rando})
+
+    adapter.approve(rando, shares // 2, {"from": gov})
+    adapter.redeem(shares // 2, rando, gov, {"from": rando})
+    assert adapter.allowance(gov, rando) == 0
+    with brownie.reverts():
+        adapter.redeem(1, rando, gov, {"from": rando})
+
+    adapter.transfer(rando, adapter.balanceOf(gov), {"from": gov})
+    assert adapter.balanceOf(gov) == 0
+    assert adapter.balanceOf(rando) == shares - shares // 2
+
+
+def test_max(chain, gov, token, vault, strategy, adapter):
+    vault.setDepositLimit(vault.totalAssets() + 1000, {"from": gov})
+    assert adapter.maxDeposit(gov) == 1000
+    assert adapter.maxMint(gov) == vault.previewDeposit(1000)
+    with brownie.reverts():
+        adapter.deposit(1001, {"from": gov})
+    adapter.deposit(1000, {"from": gov})
+
+    strategy.harvest({"from": gov})
+    # NOTE: What's in the Strategy can't be freed up once it's out of the queue
+    vault.removeStrategyFromQueue(strategy, {"from": gov})
+    vault.withdraw(
+        vault.previewDeposit(vault.totalIdle()) - 500, {"from": gov}
+    )  # Leaves ~500 idle
+    assert adapter.maxWithdraw(gov) == vault.totalIdle() < 1000
+    with brownie.reverts():
+        adapter.withdraw(adapter.maxWithdraw(gov) + 1, {"from": gov})
+
+    shares = adapter.maxRedeem(gov)
+    assert shares < adapter.balanceOf(gov)
+    idle = vault.totalIdle()
+    assert adapter.redeem(shares, {"from": gov}).return_value <= idle
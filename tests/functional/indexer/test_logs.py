@@ -0,0 +1,134 @@
+import pytest
+
+from scripts.indexer.logs import EventIndexer, block_ranges
+from scripts.indexer.store import ColumnStore
+
+
+@pytest.fixture
+def path(tmp_path):
+    yield str(tmp_path / "index")
+
+
+@pytest.fixture
+def endorsed_vault(gov, registry, create_token, create_vault):
+    def endorsed_vault():
+        token = create_token()
+        vault = create_vault(token=token)
+        if registry.numReleases() == 0:
+            registry.newRelease(vault, {"from": gov})
+        registry.endorseVault(vault, {"from": gov})
+        token.approve(vault, 2**256 - 1, {"from": gov})
+        return vault
+
+    yield endorsed_vault
+
+
+def amounts(store, event="Deposit"):
+    return [int(row["amount"]) for row in store.read(event).to_pylist()]
+
+
+def test_block_ranges():
+    assert block_ranges(0, 9, 5) == [(0, 4), (5, 9)]
+    assert block_ranges(3, 10, 5) == [(3, 7), (8, 10)]
+    assert block_ranges(3, 3, 5) == [(3, 3)]
+    assert block_ranges(4, 3, 5) == []
+
+
+def test_index(path, gov, rando, registry, endorsed_vault):
+    vault = endorsed_vault()
+    vault.deposit(1000, {"from": gov})
+
+    # Ranges of 2 blocks, so the logs are read in many requests
+    indexer = EventIndexer(ColumnStore(path), registry, max_block_range=2)
+    assert indexer.run() > 0
+    assert list(indexer.vaults) == [vault.address]
+    (new_vault,) = indexer.store.read("NewVault").to_pylist()
+    assert new_vault["vault"] == vault.address
+    assert new_vault["api_version"] == vault.apiVersion()
+    assert amounts(indexer.store) == [1000]
+    assert indexer.run() == 0  # Nothing new
+
+    vault.transfer(rando, 100, {"from": gov})
+    vault.withdraw(50, {"from": rando})
+
+    # Picks up after the checkpoint
+    indexer = EventIndexer(ColumnStore(path), registry)
+    assert indexer.run() == 3
+    transfers = indexer.store.read("Transfer").to_pylist()
+    assert [(t["sender"], t["receiver"], int(t["value"])) for t in transfers][1:] == [
+        (gov, rando, 100),
+        (rando, "0x0000000000000000000000000000000000000000", 50),
+    ]
+    (withdrawal,) = indexer.store.read("Withdraw").to_pylist()
+    assert withdrawal["recipient"] == rando
+    assert int(withdrawal["shares"]) == 50
+
+
+def test_backfill(path, gov, registry, endorsed_vault, create_token, create_vault):
+    indexer = EventIndexer(ColumnStore(path), registry)
+    endorsed_vault().deposit(1000, {"from": gov})
+    indexer.run()
+
+    # Used before it is endorsed
+    token = create_token()
+    vault = create_vault(token=token)
+    token.approve(vault, 2**256 - 1, {"from": gov})
+    vault.deposit(500, {"from": gov})
+    indexer.run()
+    registry.endorseVault(vault, {"from": gov})
+
+    indexer.run()
+    assert amounts(indexer.store) == [1000, 500]
+
+
+def test_resume(path, gov, registry, endorsed_vault, create_token, create_vault):
+    indexer = EventIndexer(ColumnStore(path), registry)
+    endorsed_vault().deposit(1000, {"from": gov})
+
+    # Used before the checkpoint, endorsed after it
+    token = create_token()
+    vault = create_vault(token=token)
+    token.approve(vault, 2**256 - 1, {"from": gov})
+    vault.deposit(500, {"from": gov})
+    indexer.run()
+    registry.endorseVault(vault, {"from": gov})
+
+    # Stops after writing the partitions, before the checkpoint
+    def crash():
+        raise KeyboardInterrupt
+
+    indexer._save = crash
+    with pytest.raises(KeyboardInterrupt):
+        indexer.run()
+    assert amounts(indexer.store) == [1000, 500]
+
+    # Backfills the Vault again, without keeping its logs twice
+    indexer = EventIndexer(ColumnStore(path), registry)
+    assert amounts(indexer.store) == [1000]
+    assert vault.address not in indexer.vaults
+    indexer.run()
+    assert amounts(indexer.store) == [1000, 500]
+    assert vault.address in indexer.vaults
+
+
+def test_reorg(path, chain, gov, registry, endorsed_vault):
+    vault = endorsed_vault()
+    vault.deposit(1000, {"from": gov})
+    indexer = EventIndexer(ColumnStore(path), registry)
+    indexer.run()
+
+    chain.snapshot()
+    vault.deposit(500, {"from": gov})
+    indexer.run()
+    assert amounts(indexer.store) == [1000, 500]
+
+    # The deposit of 500 never happened on the new chain
+    chain.revert()
+    chain.mine(2)
+    vault.deposit(200, {"from": gov})
+    assert indexer.find_fork() == chain[-3].number
+
+    indexer.run()
+    assert amounts(indexer.store) == [1000, 200]
+    assert indexer.last_block == chain.height
+    assert indexer.store.load_checkpoint()["block"] == chain.height
@@ -0,0 +1,122 @@
+import pyarrow as pa
+import pytest
+
+from scripts.indexer.store import ColumnStore, event_schema
+
+DEPOSIT = {
+    "name": "Deposit",
+    "type": "event",
+    "inputs": [
+        {"name": "recipient", "type": "address", "indexed": True},
+        {"name": "shares", "type": "uint256", "indexed": False},
+        {"name": "amount", "type": "uint256", "indexed": False},
+    ],
+}
+
+
+def deposit(block_number, log_index=0, amount=1):
+    return {
+        "block_number": block_number,
+        "timestamp": 1_600_000_000 + 12 * block_number,
+        "log_index": log_index,
+        "transaction_hash": f"0x{block_number:064x}",
+        "address": "0xVault",
+        "recipient": "0xUser",
+        "shares": str(amount),
+        "amount": str(amount),
+    }
+
+
+@pytest.fixture(params=["parquet", "arrow"])
+def store(tmp_path, request):
+    yield ColumnStore(str(tmp_path / "index"), format=request.param)
+
+
+def test_schema():
+    schema = event_schema(DEPOSIT)
+    assert schema.names[:5] == [
+        "block_number",
+        "timestamp",
+        "log_index",
+        "transaction_hash",
+        "address",
+    ]
+    # NOTE: uint256 doesn't fit in any Arrow integer
+    assert schema.field("shares").type == pa.string()
+
+
+def test_write_and_read(store):
+    schema = event_schema(DEPOSIT)
+    assert store.read("Deposit") is None
+
+    # Rows come in any order, but are stored in log order
+    store.write(
+        "Deposit", schema, [deposit(12, 1), deposit(12, 0), deposit(10)], 10, 19
+    )
+    store.write("Deposit", schema, [], 20, 29)  # Nothing to write
+    store.write("Deposit", schema, [deposit(35, amount=2**256 - 1)], 30, 39)
+    assert [p[:2] for p in store.partitions("Deposit")] == [(10, 19), (30, 39)]
+    assert store.events == ["Deposit"]
+
+    rows = store.read("Deposit").to_pylist()
+    assert [(r["block_number"], r["log_index"]) for r in rows] == [
+        (10, 0),
+        (12, 0),
+        (12, 1),
+        (35, 0),
+    ]
+    assert int(rows[-1]["amount"]) == 2**256 - 1
+    assert len(store.read("Deposit", from_block=11, to_block=35)) == 3
+
+    # Backfilled partitions overlap the ones before them
+    store.write("Deposit", schema, [deposit(5), deposit(36)], 5, 39)
+    rows = store.read("Deposit").to_pylist()
+    assert [r["block_number"] for r in rows] == [5, 10, 12, 12, 35, 36]
+
+
+def test_scan(store):
+    schema = event_schema(DEPOSIT)
+    store.write("Deposit", schema, [deposit(10, 2), deposit(12)], 10, 19)
+    store.write("Deposit", schema, [deposit(25)], 20, 29)
+    store.write("Withdraw", schema, [deposit(10, 0), deposit(12, 1)], 10, 19)
+
+    # NOTE: In log order across events
+    assert [
+        (event, row["block_number"], row["log_index"])
+        for event, row in store.scan(["Deposit", "Withdraw", "Transfer"])
+    ] == [
+        ("Withdraw", 10, 0),
+        ("Deposit", 10, 2),
+        ("Deposit", 12, 0),
+        ("Withdraw", 12, 1),
+        ("Deposit", 25, 0),
+    ]
+    assert len(list(store.scan(["Deposit"], from_block=20))) == 1
+
+
+def test_rollback(store):
+    schema = event_schema(DEPOSIT)
+    store.write("Deposit", schema, [deposit(10), deposit(15)], 10, 19)
+    store.write("Deposit", schema, [deposit(25)], 20, 29)
+    store.write("Withdraw", schema, [deposit(27)], 20, 29)
+
+    store.rollback(15)
+    assert [p[:2] for p in store.partitions("Deposit")] == [(10, 14)]
+    assert store.partitions("Withdraw") == []
+    assert [r["block_number"] for r in store.read("Deposit").to_pylist()] == [10]
+
+    # Indexing again picks up where the rollback cut
+    store.write("Deposit", schema, [deposit(16)], 15, 29)
+    assert [r["block_number"] for r in store.read("Deposit").to_pylist()] == [10, 16]
+
+    store.rollback(0)
+    assert store.read("Deposit") is None
+
+
+def test_checkpoint(store):
+    assert store.load_checkpoint() == {}
+    store.save_checkpoint({"block": 10, "hashes": {"10": "0xabc"}})
+    assert ColumnStore(store.path, store.format).load_checkpoint() == {
+        "block": 10,
+        "hashes": {"10": "0xabc"},
+    }
@@ -0,0 +1,94 @@
+from scripts.keeper.backoff import (
+    OPEN_DURATION,
+    POLICIES,
+    CircuitBreaker,
+    Failure,
+    classify,
+)
+from scripts.keeper.state import StateStore
+
+STRATEGY = "0x0000000000000000000000000000000000000001"
+
+
+def test_classify():
+    assert (
+        classify(
+            "Gas estimation failed: '!healthcheck'. This transaction will likely revert."
+        )
+        == Failure.HEALTHCHECK
+    )
+    assert (
+        classify("max fee per gas less than block base fee: maxFeePerGas: 1")
+        == Failure.BASE_FEE
+    )
+    assert classify("replacement transaction underpriced") == Failure.BASE_FEE
+    assert classify("execution reverted: Vault is in emergency shutdown") == (
+        Failure.VAULT_SHUTDOWN
+    )
+    assert (
+        classify("Gas estimation failed: 'None'. This transaction will likely revert.")
+        == Failure.REVERT
+    )
+    assert classify("Connection refused") == Failure.ERROR
+    assert classify(None) == Failure.ERROR
+
+
+def test_exponential_backoff():
+    breaker = CircuitBreaker()
+    policy = POLICIES[Failure.REVERT]
+    assert breaker.allowed(STRATEGY, now=0)
+
+    for failures in range(1, policy.trip_after):
+        health = breaker.record_failure(STRATEGY, Failure.REVERT, now=0)
+        assert health.retry_at == policy.base_delay * 2 ** (failures - 1)
+        assert not health.circuit_open
+    assert not breaker.allowed(STRATEGY, now=health.retry_at - 1)
+    assert breaker.allowed(STRATEGY, now=health.retry_at)
+
+    # A mined call resets everything
+    breaker.record_success(STRATEGY)
+    assert breaker.record_failure(STRATEGY, Failure.REVERT, now=0).failures == 1
+
+
+def test_circuit_breaker():
+    breaker = CircuitBreaker()
+    # Not being allowed to call it won't fix itself
+    health = breaker.record_failure(STRATEGY, Failure.KEEPER_AUTH, now=0)
+    assert health.circuit_open
+    assert health.retry_at == OPEN_DURATION
+
+    # Half-open: tried once more, and a failure keeps it open for longer
+    assert breaker.allowed(STRATEGY, now=OPEN_DURATION)
+    health = breaker.record_failure(STRATEGY, Failure.KEEPER_AUTH, now=OPEN_DURATION)
+    assert health.retry_at == OPEN_DURATION + 2 * OPEN_DURATION
+
+    # Not the strategy's fault, never opens the circuit
+    breaker.record_success(STRATEGY)
+    for _ in range(10):
+        health = breaker.record_failure(STRATEGY, Failure.BASE_FEE, now=0)
+    assert not health.circuit_open
+    assert health.retry_at == POLICIES[Failure.BASE_FEE].max_delay
+
+
+def test_old_failures_are_forgotten():
+    breaker = CircuitBreaker()
+    policy = POLICIES[Failure.REVERT]
+    health = breaker.record_failure(STRATEGY, Failure.REVERT, now=0)
+    later = health.retry_at + policy.max_delay
+    assert breaker.record_failure(STRATEGY, Failure.REVERT, now=later).failures == 1
+
+
+def test_persisted(tmp_path):
+    path = str(tmp_path / "keeper.db")
+    breaker = CircuitBreaker(store=StateStore(path))
+    breaker.record_failure(STRATEGY, Failure.HEALTHCHECK, "!healthcheck", now=0)
+
+    health = CircuitBreaker(store=StateStore(path)).health[STRATEGY]
+    assert (health.failure, health.reason, health.failures) == (
+        Failure.HEALTHCHECK,
+        "!healthcheck",
+        1,
+    )
+
+    breaker.record_success(STRATEGY)
+    assert CircuitBreaker(store=StateStore(path)).health == {}
@@ -0,0 +1,47 @@
+from scripts.keeper.cache import MISSING, GasEstimateCache
+
+STRATEGY = "0x0000000000000000000000000000000000000001"
+
+
+def test_hit_and_miss():
+    cache = GasEstimateCache()
+    key = cache.key("harvest", 1000, False, 0)
+    assert cache.get(STRATEGY, key) is MISSING
+
+    cache.put(STRATEGY, key, 100_000)
+    assert cache.get(STRATEGY, key) == 100_000
+    # Any change to the inputs is a miss
+    assert cache.get(STRATEGY, cache.key("harvest", 1001, False, 0)) is MISSING
+    assert cache.get(STRATEGY, cache.key("harvest", 1000, True, 0)) is MISSING
+    assert cache.get(STRATEGY, cache.key("tend", 1000, False, 0)) is MISSING
+    assert (cache.hits, cache.misses) == (1, 4)
+
+
+def test_debt_outstanding_is_bucketed():
+    cache = GasEstimateCache()
+    cache.put(STRATEGY, cache.key("harvest", 1000, False, 1025), 100_000)
+    assert cache.get(STRATEGY, cache.key("harvest", 1000, False, 2000)) == 100_000
+    assert cache.get(STRATEGY, cache.key("harvest", 1000, False, 5000)) is MISSING
+    assert cache.get(STRATEGY, cache.key("harvest", 1000, False, 0)) is MISSING
+
+
+def test_methods_are_cached_separately():
+    cache = GasEstimateCache()
+    harvest = cache.key("harvest", 1000, False, 0)
+    tend = cache.key("tend", 1000, False, 0)
+    cache.put(STRATEGY, harvest, 100_000)
+    cache.put(STRATEGY, tend, None)  # Failed estimate
+    assert cache.get(STRATEGY, harvest) == 100_000
+    assert cache.get(STRATEGY, tend) is None
+
+
+def test_expiry_and_invalidate():
+    cache = GasEstimateCache(ttl=-1)
+    key = cache.key("harvest", 1000, False, 0)
+    cache.put(STRATEGY, key, 100_000)
+    assert cache.get(STRATEGY, key) is MISSING
+
+    cache = GasEstimateCache()
+    cache.put(STRATEGY, key, 100_000)
+    cache.invalidate(STRATEGY)
+    assert cache.get(STRATEGY, key) is MISSING
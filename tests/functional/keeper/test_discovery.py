@@ -0,0 +1,67 @@
+from scripts.keeper.discovery import RegistryIndex, StrategyIndex
+
+
+def addresses(entries):
+    return [entry.address for entry in entries]
+
+
+def test_static_index(gov, keeper, vault, strategy, token, TestStrategy):
+    index = StrategyIndex(keeper.address)
+    entry = index.add(strategy.address)
+    assert entry.vault.address == vault.address
+    assert entry.want.address == token.address
+    assert entry.decimals == vault.decimals()
+    assert strategy.address in index
+    assert entry.strategy.emergencyExit() == strategy.emergencyExit()
+    assert entry.strategy.baseFeeOracle() == strategy.baseFeeOracle()
+
+    # Not kept by the bot
+    other = gov.deploy(TestStrategy, vault)
+    assert index.add(other.address) is None
+    assert addresses(index) == [strategy.address]
+    assert index.refresh() == ([], [])
+
+    # Read again, e.g. after a call reverted
+    assert index.is_authorized(entry)
+    strategy.setKeeper(gov, {"from": gov})
+    assert not index.is_authorized(entry)
+
+
+def test_registry_discovery(
+    gov, keeper, registry, vault, strategy, create_vault, create_token, TestStrategy
+):
+    registry.newRelease(vault, {"from": gov})
+    registry.endorseVault(vault, {"from": gov})
+
+    index = RegistryIndex(keeper.address, registry)
+    assert addresses(index.load()) == [strategy.address]
+    assert index.refresh() == ([], [])
+
+    # Strategies added to a known Vault are picked up live
+    new_strategy = gov.deploy(TestStrategy, vault)
+    new_strategy.setKeeper(keeper, {"from": gov})
+    vault.addStrategy(new_strategy, 1_000, 0, 2**256 - 1, 0, {"from": gov})
+    # ...unless the bot isn't their keeper
+    other = gov.deploy(TestStrategy, vault)
+    vault.addStrategy(other, 1_000, 0, 2**256 - 1, 0, {"from": gov})
+    added, removed = index.refresh()
+    assert addresses(added) == [new_strategy.address]
+    assert removed == []
+    assert other.address not in index
+
+    # So are new Vaults
+    new_vault = create_vault(token=create_token())
+    vault_strategy = gov.deploy(TestStrategy, new_vault)
+    vault_strategy.setKeeper(keeper, {"from": gov})
+    new_vault.addStrategy(vault_strategy, 1_000, 0, 2**256 - 1, 0, {"from": gov})
+    registry.endorseVault(new_vault, {"from": gov})
+    added, removed = index.refresh()
+    assert addresses(added) == [vault_strategy.address]
+    assert len(index.vaults) == 2
+
+    # Revoked strategies are dropped once they have no debt left
+    vault.revokeStrategy(new_strategy, {"from": gov})
+    added, removed = index.refresh()
+    assert added == []
+    assert addresses(removed) == [new_strategy.address]
+    assert new_strategy.address not in index
@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+from brownie import Multicall
+
+from scripts.keeper.cache import GasEstimateCache
+from scripts.keeper.discovery import StrategyIndex
+from scripts.keeper.engine import Keeper, decide
+from scripts.keeper.fees import FeeHistoryScalingStrategy
+from scripts.keeper.scheduler import GasBudget, Scheduler
+
+GAS_PRICE = 10**9
+
+
+class FixedGasPrice:
+    def __init__(self, gas_price):
+        self.gas_price = gas_price
+
+    def get_gas_price(self):
+        while True:
+            yield self.gas_price
+
+
+class Stop(Exception):
+    pass
+
+
+@pytest.fixture
+def index(keeper, strategy):
+    index = StrategyIndex(keeper.address)
+    index.add(strategy.address)
+    yield index
+
+
+def test_decide():
+    # `harvest` takes precedence over `tend`
+    assert decide(100, True, 100, True) == "harvest"
+    assert decide(100, False, 100, True) == "tend"
+    assert decide(100, False, 100, False) is None
+    # Only if its gas estimate succeeded
+    assert decide(None, True, 100, True) == "tend"
+    assert decide(None, True, None, True) is None
+
+
+def test_evaluate(gov, keeper, vault, strategy, index):
+    bot = Keeper(keeper, index, FeeHistoryScalingStrategy())
+    entry = index[strategy.address]
+
+    evaluation = asyncio.run(bot.evaluate(entry, GAS_PRICE))
+    assert evaluation.credit == vault.creditAvailable(strategy) > 0
+    assert evaluation.debt == vault.debtOutstanding(strategy)
+    assert evaluation.tend_gas_estimate > 0
+    assert evaluation.harvest_gas_estimate > 0
+    assert evaluation.action is None  # Under `creditThreshold`, `tend` never is
+
+    strategy.setForceHarvestTriggerOnce(True, {"from": gov})
+    evaluation = asyncio.run(bot.evaluate(entry, GAS_PRICE))
+    assert evaluation.action == "harvest"
+    assert evaluation.action_gas_estimate == evaluation.harvest_gas_estimate
+    # e.g. rejected by its `BaseFeeOracle`
+    evaluation = asyncio.run(bot.evaluate(entry, GAS_PRICE, harvest_allowed=False))
+    assert evaluation.action is None
+
+
+@pytest.mark.parametrize("batched", [True, False])
+def test_evaluate_all(gov, keeper, vault, strategy, index, batched):
+    multicall = gov.deploy(Multicall) if batched else None
+    bot = Keeper(keeper, index, FeeHistoryScalingStrategy(), multicall=multicall)
+    strategy.setForceHarvestTriggerOnce(True, {"from": gov})
+
+    (evaluation,) = asyncio.run(bot.evaluate_all(GAS_PRICE))
+    assert evaluation.entry.address == strategy.address
+    assert evaluation.credit == vault.creditAvailable(strategy)
+    assert evaluation.action == "harvest"
+    assert evaluation.gas_estimate == (
+        evaluation.tend_gas_estimate + evaluation.harvest_gas_estimate
+    )
+
+
+@pytest.mark.parametrize("batched", [True, False])
+def test_evaluate_all_cached(gov, keeper, strategy, index, batched):
+    multicall = gov.deploy(Multicall) if batched else None
+    gas_cache = GasEstimateCache()
+    bot = Keeper(
+        keeper,
+        index,
+        FeeHistoryScalingStrategy(),
+        multicall=multicall,
+        gas_cache=gas_cache,
+    )
+
+    (evaluation,) = asyncio.run(bot.evaluate_all(GAS_PRICE))
+    assert gas_cache.misses == 2
+    (cached,) = asyncio.run(bot.evaluate_all(GAS_PRICE))
+    assert gas_cache.hits == 2
+    assert cached.tend_gas_estimate == evaluation.tend_gas_estimate
+    assert cached.harvest_gas_estimate == evaluation.harvest_gas_estimate
+
+    # Its debt changed, so both are estimated again
+    strategy.harvest({"from": keeper})
+    asyncio.run(bot.evaluate_all(GAS_PRICE))
+    assert (gas_cache.hits, gas_cache.misses) == (2, 4)
+
+
+def test_pass_within_budget(gov, keeper, vault, strategy, index):
+    strategy.setForceHarvestTriggerOnce(True, {"from": gov})
+    budget = GasBudget(per_hour=1)
+    bot = Keeper(
+        keeper, index, FeeHistoryScalingStrategy(), scheduler=Scheduler(budget)
+    )
+
+    # Over the budget, nothing is called
+    assert asyncio.run(bot._pass(list(index))) == 0
+    assert strategy.forceHarvestTriggerOnce()
+
+    budget.per_hour = 10**18
+    assert asyncio.run(bot._pass(list(index))) == 1
+    assert not strategy.forceHarvestTriggerOnce()
+    assert vault.strategies(strategy).dict()["totalDebt"] > 0
+    assert budget.available() < 10**18
+
+
+def test_pass_balance_check(capsys, keeper, index):
+    # Running 10 of each call would cost more than the bot has
+    gas_price = keeper.balance() // 10**5
+    bot = Keeper(keeper, index, FixedGasPrice(gas_price))
+    assert asyncio.run(bot._pass(list(index))) == 0
+    assert f"Need more ether please! {keeper.address}" in capsys.readouterr().out
+
+    bot = Keeper(keeper, index, FixedGasPrice(0))
+    assert asyncio.run(bot._pass(list(index))) == 0
+    assert "Need more ether please!" not in capsys.readouterr().out
+
+
+def test_run(monkeypatch, gov, keeper, vault, strategy, index):
+    bot = Keeper(keeper, index, FeeHistoryScalingStrategy())
+    strategy.setForceHarvestTriggerOnce(True, {"from": gov})
+
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+        raise Stop
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    with pytest.raises(Stop):
+        asyncio.run(bot.run(sleep_time=30))
+
+    # Harvests, then sleeps once there is nothing left to do
+    assert sleeps == [30]
+    assert not strategy.forceHarvestTriggerOnce()
+    assert vault.strategies(strategy).dict()["totalDebt"] > 0
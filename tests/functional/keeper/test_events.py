@@ -0,0 +1,44 @@
+from scripts.keeper.events import BlockWatcher
+
+
+def test_no_new_block(vault):
+    watcher = BlockWatcher([vault])
+    assert watcher.poll() is None
+
+
+def test_deposit_marks_vault(chain, gov, token, vault, strategy):
+    watcher = BlockWatcher([vault])
+    strategies = {strategy.address: vault.address}
+    watcher.mark_evaluated(strategies, chain.height)
+
+    chain.mine()
+    changes = watcher.poll()
+    assert changes.block_number == chain.height
+    assert len(changes.vaults) == 0
+    assert watcher.due(strategies, changes) == []
+
+    token.approve(vault, 1000, {"from": gov})
+    vault.deposit(1000, {"from": gov})
+    changes = watcher.poll()
+    assert changes.vaults == {vault.address}
+    assert len(changes.reported) == 0
+    assert watcher.due(strategies, changes) == [strategy.address]
+
+
+def test_report_marks_strategy(chain, gov, vault, strategy):
+    watcher = BlockWatcher([vault])
+    strategy.harvest({"from": gov})
+    changes = watcher.poll()
+    assert changes.vaults == {vault.address}
+    assert changes.reported == {strategy.address}
+
+
+def test_stale_strategies_are_due(chain, vault, strategy):
+    watcher = BlockWatcher([vault], max_stale_blocks=3)
+    strategies = {strategy.address: vault.address}
+    watcher.mark_evaluated(strategies, chain.height)
+
+    chain.mine(2)
+    assert watcher.due(strategies, watcher.poll()) == []
+    chain.mine()
+    assert watcher.due(strategies, watcher.poll()) == [strategy.address]
@@ -0,0 +1,83 @@
+import pytest
+from brownie import ZERO_ADDRESS, web3
+
+from scripts.keeper.discovery import StrategyIndex
+from scripts.keeper.fees import (
+    BaseFeeGate,
+    FeeHistory,
+    FeeHistoryScalingStrategy,
+    OracleSettings,
+    next_base_fee,
+)
+
+
+def test_next_base_fee():
+    assert next_base_fee(1000, 0.5) == 1000
+    assert next_base_fee(1000, 1.0) == 1125  # +12.5% for a full block
+    assert next_base_fee(1000, 0.0) == 875  # -12.5% for an empty one
+    assert next_base_fee(1, 0.51) == 2  # Always increases by at least 1 wei
+
+
+def test_oracle_settings():
+    manual = OracleSettings(ZERO_ADDRESS, 0, True)
+    assert manual.is_acceptable(10**12)
+    manual.manual_base_fee_bool = False
+    assert not manual.is_acceptable(0)
+
+    provider = OracleSettings("0x0000000000000000000000000000000000000001", 100, False)
+    assert provider.is_acceptable(100)
+    assert not provider.is_acceptable(101)
+
+
+def test_fee_history_is_incremental(chain):
+    chain.mine(5)
+    history = FeeHistory(blocks=10)
+    head = history.update()
+    assert head == chain.height
+    assert len(history.base_fees) == min(10, head + 1)
+    latest = web3.eth.get_block(head)
+    assert history.latest_base_fee == latest["baseFeePerGas"]
+    assert history.pending_base_fee == next_base_fee(
+        latest["baseFeePerGas"], latest["gasUsed"] / latest["gasLimit"]
+    )
+    assert history.predict_base_fee(1) == history.pending_base_fee
+
+    chain.mine(8)
+    assert history.update() == chain.height
+    assert len(history.base_fees) == 10  # Only the last 10 blocks are kept
+    assert history.latest_base_fee == web3.eth.get_block("latest")["baseFeePerGas"]
+
+
+def test_scaling_strategy(chain):
+    chain.mine()
+    gas_strategy = FeeHistoryScalingStrategy(blocks_ahead=1, increment=1.5)
+    prices = gas_strategy.get_gas_price()
+    first = next(prices)
+    history = gas_strategy.history
+    assert first == history.pending_base_fee + history.priority_fee()
+    assert next(prices) >= int(first * 1.5)
+
+    capped = FeeHistoryScalingStrategy(max_gas_price=1)
+    assert next(capped.get_gas_price()) == 1
+
+
+@pytest.mark.parametrize("batched", [True, False])
+def test_base_fee_gate(gov, keeper, strategy, base_fee_oracle, Multicall, batched):
+    multicall = gov.deploy(Multicall) if batched else None
+    index = StrategyIndex(keeper.address)
+    entry = index.add(strategy.address)
+    gate = BaseFeeGate(FeeHistory(), multicall=multicall)
+
+    # No oracle set, never rejected
+    assert gate.rejected([entry]) == set()
+
+    strategy.setBaseFeeOracle(base_fee_oracle, {"from": gov})
+    base_fee_oracle.setManualBaseFeeBool(False, {"from": gov})
+    gate.expiry = 0  # Settings are only read again once expired
+    assert gate.rejected([entry]) == {strategy.address}
+    assert not strategy.harvestTrigger(0)
+
+    base_fee_oracle.setManualBaseFeeBool(True, {"from": gov})
+    assert gate.rejected([entry]) == {strategy.address}  # Still cached
+    gate.expiry = 0
+    assert gate.rejected([entry]) == set()
@@ -0,0 +1,86 @@
+import asyncio
+import io
+import json
+import urllib.request
+
+import pytest
+
+from scripts.keeper.discovery import StrategyIndex
+from scripts.keeper.engine import Keeper
+from scripts.keeper.fees import FeeHistoryScalingStrategy
+from scripts.keeper.metrics import Metrics, call_label
+
+
+def test_counters_and_histograms():
+    metrics = Metrics()
+    metrics.calls.inc(strategy="0xA", action="harvest", outcome="mined")
+    metrics.calls.inc(strategy="0xA", action="harvest", outcome="mined")
+    metrics.rpc_seconds.observe(0.02, method="Vault.creditAvailable")
+    metrics.rpc_seconds.observe(3, method="Vault.creditAvailable")
+    metrics.rpc_seconds.observe(10_000, method="Vault.creditAvailable")
+
+    text = metrics.render()
+    assert "# TYPE keeper_calls_total counter" in text
+    assert (
+        'keeper_calls_total{strategy="0xA",action="harvest",outcome="mined"} 2' in text
+    )
+    assert "# TYPE keeper_rpc_seconds histogram" in text
+    labels = 'method="Vault.creditAvailable"'
+    assert f'keeper_rpc_seconds_bucket{{{labels},le="0.01"}} 0' in text
+    assert f'keeper_rpc_seconds_bucket{{{labels},le="0.025"}} 1' in text
+    assert f'keeper_rpc_seconds_bucket{{{labels},le="5"}} 2' in text
+    assert f'keeper_rpc_seconds_bucket{{{labels},le="+Inf"}} 3' in text
+    assert f"keeper_rpc_seconds_count{{{labels}}} 3" in text
+
+
+def test_timed_and_log():
+    log = io.StringIO()
+    metrics = Metrics(log_file=log)
+
+    def fails():
+        raise ValueError
+
+    assert metrics.timed(lambda: 1, "ok")() == 1
+    with pytest.raises(ValueError):
+        metrics.timed(fails, "fails")()
+    text = metrics.render()
+    assert 'keeper_rpc_seconds_count{method="ok"} 1' in text
+    assert 'keeper_rpc_errors_total{method="fails"} 1' in text
+
+    metrics.log("call", strategy="0xA", outcome="mined")
+    (line,) = log.getvalue().splitlines()
+    assert json.loads(line)["event"] == "call"
+    assert json.loads(line)["outcome"] == "mined"
+
+
+def test_serve():
+    metrics = Metrics()
+    metrics.balance.set(42)
+    server = metrics.serve(0)
+    port = server.server_address[1]
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+        assert "keeper_balance_wei 42" in response.read().decode()
+    server.shutdown()
+
+
+def test_call_label(vault, strategy):
+    assert call_label(vault.creditAvailable) == "Vault.creditAvailable"
+    assert call_label(strategy.harvest.estimate_gas).endswith("harvest.estimate_gas")
+    assert call_label(test_call_label) == "test_call_label"
+
+
+def test_keeper_pass_is_measured(keeper, strategy):
+    index = StrategyIndex(keeper.address)
+    index.add(strategy.address)
+    log = io.StringIO()
+    metrics = Metrics(log_file=log)
+    bot = Keeper(keeper, index, FeeHistoryScalingStrategy(), metrics=metrics)
+    asyncio.run(bot._pass(list(index)))
+
+    text = metrics.render()
+    assert 'keeper_rpc_seconds_count{method="Vault.creditAvailable"} 1' in text
+    assert f'keeper_evaluations_total{{strategy="{strategy.address}"}} 1' in text
+    assert 'keeper_pass_seconds_count{phase="evaluate"} 1' in text
+    assert 'keeper_pass_seconds_count{phase="total"} 1' in text
+    events = [json.loads(line)["event"] for line in log.getvalue().splitlines()]
+    assert events[-1] == "pass"
@@ -0,0 +1,69 @@
+import pytest
+
+from brownie import Contract
+from scripts.keeper.discovery import StrategyIndex
+from scripts.keeper.multicall import Batch, fetch_gas_inputs, fetch_snapshots
+
+
+@pytest.fixture
+def multicall(gov, Multicall):
+    yield gov.deploy(Multicall)
+
+
+def test_batch_matches_direct_calls(multicall, vault, strategy, token):
+    batch = Batch(multicall)
+    credit = batch.add(vault.creditAvailable["address"], strategy)
+    debt = batch.add(vault.debtOutstanding["address"], strategy)
+    trigger = batch.add(strategy.harvestTrigger, 0)
+    symbol = batch.add(token.symbol)
+    assert len(batch) == 4
+
+    block_number, results = batch.execute()
+    assert block_number > 0
+    assert results[credit] == vault.creditAvailable(strategy)
+    assert results[debt] == vault.debtOutstanding(strategy)
+    assert results[trigger] == strategy.harvestTrigger(0)
+    assert results[symbol] == token.symbol()
+
+
+def test_batch_failed_call_is_none(multicall, vault, token, strategy, rando):
+    batch = Batch(multicall)
+    batch.add(vault.creditAvailable["address"], strategy)
+    # NOTE: `rando` has no code, so the call returns nothing
+    batch.add(Contract.from_abi("Fake", rando.address, token.abi).symbol)
+
+    _, results = batch.execute()
+    assert results[0] == vault.creditAvailable(strategy)
+    assert results[1] is None
+
+
+def test_fetch_snapshots(multicall, vault, token, strategy, keeper, gov):
+    entries = [StrategyIndex(keeper.address).add(strategy.address)]
+    snapshots = fetch_snapshots(multicall, entries, {strategy.address: 0}, {})
+    assert len(snapshots) == 1
+    snapshot = snapshots[0]
+    assert snapshot.strategy.address == strategy.address
+    assert snapshot.credit == vault.creditAvailable(strategy) > 0
+    assert snapshot.debt == vault.debtOutstanding(strategy) == 0
+    assert snapshot.harvest_triggered == strategy.harvestTrigger(0)
+    # NOTE: No tend cost given, so that trigger is skipped
+    assert not snapshot.tend_triggered
+
+    strategy.harvest({"from": gov})
+    snapshot = fetch_snapshots(multicall, entries, {}, {})[0]
+    assert snapshot.credit == vault.creditAvailable(strategy) == 0
+    assert not snapshot.harvest_triggered
+
+
+def test_fetch_gas_inputs(multicall, vault, strategy, keeper, gov):
+    entries = [StrategyIndex(keeper.address).add(strategy.address)]
+    strategy.harvest({"from": gov})
+    inputs = fetch_gas_inputs(multicall, entries)[strategy.address]
+    assert inputs.total_debt == vault.strategies(strategy).dict()["totalDebt"] > 0
+    assert not inputs.emergency_exit
+    assert inputs.debt_outstanding == 0
+
+    strategy.setEmergencyExit({"from": gov})
+    inputs = fetch_gas_inputs(multicall, entries)[strategy.address]
+    assert inputs.emergency_exit
+    assert inputs.debt_outstanding == inputs.total_debt
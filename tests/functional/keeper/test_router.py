@@ -0,0 +1,64 @@
+import asyncio
+from types import SimpleNamespace
+
+from scripts.keeper.discovery import StrategyEntry, StrategyIndex
+from scripts.keeper.engine import Evaluation, Keeper
+from scripts.keeper.fees import FeeHistoryScalingStrategy
+from scripts.keeper.router import TX_BASE_GAS, Router, call_gas, pack
+
+
+def fake_evaluation(address, vault, gas_estimate):
+    entry = StrategyEntry(
+        strategy=SimpleNamespace(address=address),
+        vault=SimpleNamespace(address=vault),
+        want=SimpleNamespace(address="0x01"),
+        symbol="TKN",
+        decimals=18,
+    )
+    return Evaluation(
+        entry=entry,
+        credit=0,
+        debt=0,
+        harvest_gas_estimate=gas_estimate,
+        action="harvest",
+    )
+
+
+def test_pack():
+    evaluations = [
+        fake_evaluation("0xA", "0xV2", 300_000),
+        fake_evaluation("0xB", "0xV1", 300_000),
+        fake_evaluation("0xC", "0xV2", 300_000),
+        fake_evaluation("0xD", "0xV1", 300_000),
+        fake_evaluation("0xE", "0xV3", 2_000_000),  # Too big to share
+    ]
+    per_call = call_gas(evaluations[0])
+    assert per_call == 300_000 - TX_BASE_GAS + 10_000
+
+    batches = pack(evaluations, TX_BASE_GAS + 2 * per_call)
+    # Strategies of the same Vault go together
+    assert [[e.entry.address for e in batch] for batch in batches] == [
+        ["0xB", "0xD"],
+        ["0xA", "0xC"],
+        ["0xE"],
+    ]
+    # Everything fits in one transaction with a high enough limit
+    assert len(pack(evaluations, 10_000_000)) == 1
+    assert pack([], 10_000_000) == []
+
+
+def test_keeper_uses_router(gov, strategist, keeper, strategy, KeeperRouter):
+    contract = gov.deploy(KeeperRouter)
+    contract.setAuthorized(keeper, True, {"from": gov})
+    strategy.setKeeper(contract, {"from": strategist})
+
+    index = StrategyIndex(contract.address)
+    entry = index.add(strategy.address)
+    router = Router(contract)
+    bot = Keeper(keeper, index, FeeHistoryScalingStrategy(), router=router)
+    evaluation = asyncio.run(bot.evaluate(entry, 10**9))
+    assert evaluation.harvest_gas_estimate  # Estimated as the router
+    evaluation.action = "harvest"
+
+    assert asyncio.run(bot.execute_batch([evaluation])) == [evaluation]
+    assert strategy.keeper() == contract.address
@@ -0,0 +1,127 @@
+from types import SimpleNamespace
+
+import pytest
+from brownie import Multicall
+
+from scripts.keeper.discovery import StrategyEntry
+from scripts.keeper.engine import Evaluation
+from scripts.keeper.multicall import LockedProfit
+from scripts.keeper.scheduler import (
+    DEGRADATION_COEFFICIENT,
+    GasBudget,
+    Scheduler,
+    deferred_profit,
+    locked_profit_at,
+)
+
+GAS_PRICE = 10**9
+
+
+def fake_evaluation(address, action, gas_estimate, want="0x01"):
+    entry = StrategyEntry(
+        strategy=SimpleNamespace(address=address),
+        vault=SimpleNamespace(address="0xVault"),
+        want=SimpleNamespace(address=want),
+        symbol="TKN",
+        decimals=18,
+    )
+    return Evaluation(
+        entry=entry,
+        credit=0,
+        debt=0,
+        tend_gas_estimate=gas_estimate,
+        harvest_gas_estimate=gas_estimate,
+        action=action,
+    )
+
+
+def test_locked_profit():
+    # 10% of the locked profit is released per second
+    state = LockedProfit(
+        locked_profit=1000, last_report=100, degradation=DEGRADATION_COEFFICIENT // 10
+    )
+    assert locked_profit_at(state, 100) == 1000
+    assert locked_profit_at(state, 104) == 600
+    assert locked_profit_at(state, 110) == 0
+    assert locked_profit_at(state, 200) == 0
+
+    # Nothing to defer right after a report, or once everything is unlocked
+    assert deferred_profit(state, 100) == 0
+    assert deferred_profit(state, 104) == 600 * 4 // 20
+    assert deferred_profit(state, 110) == 0
+
+
+def test_gas_budget():
+    budget = GasBudget(per_block=100, per_hour=250)
+    assert budget.available(block_number=1, now=0) == 100
+    budget.spend(80, block_number=1, now=0)
+    assert budget.available(block_number=1, now=0) == 20
+    # A new block resets the per-block limit, but not the hourly one
+    budget.spend(100, block_number=2, now=10)
+    assert budget.available(block_number=3, now=20) == 70
+    # Spending rolls out of the hourly window
+    assert budget.available(block_number=3, now=3600) == 100
+
+    assert GasBudget().available(block_number=1, now=0) is None
+
+
+def test_plan_ranks_by_value_per_gas():
+    scheduler = Scheduler(prices={"0x01": 10**18})
+    scheduler._fetch_inputs = lambda entries: SimpleNamespace(
+        timestamp=0,
+        expected_returns={"0xA": 10**13, "0xB": 10**17, "0xC": 10**16},
+        locked_profits={"0xVault": LockedProfit(0, 0, 0)},
+    )
+    evaluations = [
+        fake_evaluation("0xA", "harvest", 100_000),
+        fake_evaluation("0xB", "harvest", 100_000),
+        fake_evaluation("0xC", "harvest", 100_000),
+        fake_evaluation("0xD", None, 100_000),
+    ]
+    planned = scheduler.plan(evaluations, GAS_PRICE)
+    assert [e.entry.address for e in planned] == ["0xB", "0xC", "0xA"]
+
+    # Not worth its gas
+    scheduler.min_score = 1
+    planned = scheduler.plan(evaluations, GAS_PRICE)
+    assert [e.entry.address for e in planned] == ["0xB", "0xC"]
+
+
+def test_plan_respects_budget():
+    cost = 100_000 * GAS_PRICE
+    budget = GasBudget(per_block=2 * cost)
+    scheduler = Scheduler(budget=budget)
+    evaluations = [
+        fake_evaluation("0xA", "tend", 100_000),
+        fake_evaluation("0xB", "harvest", 300_000),
+        fake_evaluation("0xC", "harvest", 100_000),
+    ]
+    planned = scheduler.plan(evaluations, GAS_PRICE)
+    # NOTE: Unpriced calls all score the same, so they keep their order
+    assert [e.entry.address for e in planned] == ["0xA", "0xC"]
+
+    scheduler.record(planned[0], GAS_PRICE)
+    scheduler.record(planned[1], GAS_PRICE)
+    assert scheduler.plan(evaluations, GAS_PRICE) == []
+
+
+@pytest.mark.parametrize("batched", [True, False])
+def test_profit_inputs(chain, gov, keeper, token, vault, strategy, batched):
+    strategy.harvest({"from": keeper})
+    token.transfer(strategy, 10 ** token.decimals(), {"from": gov})
+    chain.sleep(3600)
+    strategy.harvest({"from": keeper})
+    chain.sleep(60)
+    token.transfer(strategy, 10 ** token.decimals(), {"from": gov})
+    chain.mine()
+
+    multicall = gov.deploy(Multicall) if batched else None
+    entry = StrategyEntry(strategy, vault, token, token.symbol(), token.decimals())
+    inputs = Scheduler(multicall=multicall)._fetch_inputs([entry])
+
+    assert inputs.expected_returns[strategy.address] == vault.expectedReturn(strategy)
+    state = inputs.locked_profits[vault.address]
+    assert state.locked_profit == vault.lockedProfit() > 0
+    assert state.last_report == vault.lastReport()
+    assert state.degradation == vault.lockedProfitDegradation()
+    assert 0 < locked_profit_at(state, inputs.timestamp) < state.locked_profit
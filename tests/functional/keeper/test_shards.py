@@ -0,0 +1,89 @@
+import queue
+
+from scripts.keeper.shards import (
+    ShardedRegistryIndex,
+    ShardIndex,
+    ShardStats,
+    StrategyStats,
+    imbalance,
+    partition,
+    strategy_loads,
+)
+
+
+def test_strategy_loads():
+    stats = {"A": StrategyStats(calls=3, gas_spent=300), "B": StrategyStats(1, 100)}
+    loads = strategy_loads(["A", "B", "C", "D"], stats)
+    assert loads == {
+        "A": 0.25 + 0.75 + 0.75,
+        "B": 0.25 + 0.25 + 0.25,
+        "C": 0.25,
+        "D": 0.25,
+    }
+    # Without any stats, all strategies weigh the same
+    assert set(strategy_loads(["A", "B"], {}).values()) == {0.5}
+
+
+def test_partition():
+    loads = {"A": 4, "B": 3, "C": 2, "D": 2, "E": 1}
+    everyone = {0, 1}
+    shards = partition(loads, {s: everyone for s in loads}, 2)
+    assert sorted(sum(loads[s] for s in shard) for shard in shards) == [6, 6]
+    assert imbalance(shards, loads) == 1.0
+    assert imbalance([{"A", "B"}, {"C", "D", "E"}], loads) == 7 / 6
+
+    # A strategy only goes to a shard that may call it
+    eligible = {s: everyone for s in loads}
+    eligible["A"] = eligible["B"] = {1}
+    eligible["E"] = set()  # Nobody can, so it is left out
+    shards = partition(loads, eligible, 2)
+    assert shards == [{"C", "D"}, {"A", "B"}]
+
+
+def test_shard_stats():
+    stats = ShardStats()
+    stats.record("A", 100)
+    stats.record("A", 50)
+    assert stats.flush() == {"A": (2, 150)}
+    assert stats.flush() == {}
+
+
+def test_shard_index(keeper, strategy):
+    inbox, outbox = queue.Queue(), queue.Queue()
+    stats = ShardStats()
+    index = ShardIndex(keeper.address, inbox, outbox, stats)
+    assert index.refresh() == ([], [])
+    assert outbox.empty()
+
+    # Only the latest assignment counts
+    inbox.put(set())
+    inbox.put({strategy.address})
+    added, removed = index.refresh()
+    assert [entry.address for entry in added] == [strategy.address]
+    assert removed == []
+
+    stats.record(strategy.address, 100)
+    inbox.put(set())
+    added, removed = index.refresh()
+    assert added == []
+    assert [entry.address for entry in removed] == [strategy.address]
+    assert outbox.get_nowait() == (keeper.address, {strategy.address: (1, 100)})
+
+
+def test_sharded_registry_index(gov, keeper, rando, registry, vault, strategy):
+    registry.newRelease(vault, {"from": gov})
+    registry.endorseVault(vault, {"from": gov})
+
+    # NOTE: `gov` is the Vault's governance, so it may call any strategy of it
+    index = ShardedRegistryIndex([keeper.address, rando.address], registry)
+    index.load()
+    assert strategy.address in index
+    assert index.eligible[strategy.address] == {0}
+
+    index = ShardedRegistryIndex([gov.address, rando.address, keeper.address], registry)
+    index.load()
+    assert index.eligible[strategy.address] == {0, 2}
+
+    index = ShardedRegistryIndex([rando.address], registry)
+    index.load()
+    assert len(index) == 0
@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+
+from eth_abi import encode
+from hexbytes import HexBytes
+
+from scripts.keeper.discovery import StrategyEntry, StrategyIndex
+from scripts.keeper.engine import Evaluation
+from scripts.keeper.simulation import Simulation, Simulator, revert_reason
+
+GAS_PRICE = 10**9
+
+
+def fake_evaluation(address, action, want="0x01"):
+    entry = StrategyEntry(
+        strategy=SimpleNamespace(address=address),
+        vault=SimpleNamespace(address="0xVault"),
+        want=SimpleNamespace(address=want),
+        symbol="TKN",
+        decimals=18,
+    )
+    return Evaluation(
+        entry=entry,
+        credit=0,
+        debt=0,
+        tend_gas_estimate=100_000,
+        harvest_gas_estimate=100_000,
+        action=action,
+    )
+
+
+def fake_simulation(address, success=True, gain=0, loss=0, debt_after=100):
+    revert_data = (
+        b""
+        if success
+        else HexBytes("0x08c379a0") + encode(["string"], ["!healthcheck"])
+    )
+    return Simulation(address, success, revert_data, gain, loss, 100, debt_after, 1)
+
+
+def test_revert_reason():
+    assert (
+        revert_reason(HexBytes("0x08c379a0") + encode(["string"], ["!healthcheck"]))
+        == "!healthcheck"
+    )
+    assert revert_reason(b"") is None
+    assert revert_reason(HexBytes("0x4e487b71") + encode(["uint256"], [0x11])) is None
+
+
+def test_filter(keeper):
+    simulator = Simulator(keeper.address, prices={"0x01": 10**18})
+    simulations = {
+        "0xA": fake_simulation("0xA", success=False),
+        "0xB": fake_simulation("0xB", gain=10**13),  # Worth less than its gas
+        "0xC": fake_simulation("0xC", gain=10**15),
+        "0xD": fake_simulation("0xD", loss=1),  # Always worth reporting
+        "0xE": fake_simulation("0xE", debt_after=0),  # Pays back debt
+        "0xF": fake_simulation("0xF", gain=0),  # No price, no profit
+        "0xG": fake_simulation("0xG", gain=1),  # No price, some profit
+    }
+    simulator.simulate = lambda entries: {
+        e.address: simulations[e.address] for e in entries
+    }
+    evaluations = [
+        fake_evaluation(address, "harvest", want="0x02" if address > "0xE" else "0x01")
+        for address in simulations
+    ] + [fake_evaluation("0xH", "tend")]
+
+    kept = simulator.filter(evaluations, GAS_PRICE)
+    assert [e.entry.address for e in kept] == ["0xC", "0xD", "0xE", "0xG", "0xH"]
+    assert kept[0].simulation.gain == 10**15
+    assert kept[-1].simulation is None  # `tend` isn't simulated
+
+
+def test_simulate(chain, gov, keeper, token, vault, strategy, CommonHealthCheck):
+    strategy.harvest({"from": keeper})
+    chain.sleep(10)
+    entry = StrategyIndex(keeper.address).add(strategy.address)
+    simulator = Simulator(keeper.address)
+    total_gain = vault.strategies(strategy).dict()["totalGain"]
+
+    gain = strategy.estimatedTotalAssets() // 50
+    token.transfer(strategy, gain, {"from": gov})
+    chain.mine()
+    simulation = simulator.simulate([entry])[strategy.address]
+    assert simulation.success
+    assert (simulation.gain, simulation.loss) == (gain, 0)
+    assert simulation.gas_used > 0
+    # Nothing actually happened
+    assert vault.strategies(strategy).dict()["totalGain"] == total_gain
+
+    # Over the health check's profit limit
+    strategy.setHealthCheck(gov.deploy(CommonHealthCheck), {"from": gov})
+    token.transfer(strategy, gain * 2, {"from": gov})
+    chain.mine()
+    simulation = simulator.simulate([entry])[strategy.address]
+    assert not simulation.success
+    assert simulation.revert_reason == "!healthcheck"
@@ -0,0 +1,117 @@
+import pytest
+from brownie import web3
+from brownie.network.transaction import Status
+
+from scripts.keeper.cache import GasEstimateCache
+from scripts.keeper.discovery import StrategyIndex
+from scripts.keeper.scheduler import GasBudget
+from scripts.keeper.state import StateStore
+from scripts.keeper.transactions import PendingTransaction, TransactionPipeline
+
+STRATEGY = "0x0000000000000000000000000000000000000001"
+
+
+@pytest.fixture
+def path(tmp_path):
+    yield str(tmp_path / "keeper.db")
+
+
+def test_meta_and_calls(path):
+    store = StateStore(path)
+    assert store.get("index_last_block") is None
+    store.set("index_last_block", 123)
+
+    store.record_call(STRATEGY, "harvest", "submitted", at=100)
+    store.record_call(STRATEGY, "harvest", "mined", gas_cost=10**18, at=200)
+    store.record_call(STRATEGY, "tend", "reverted", gas_cost=5, at=300)
+    store.close()
+
+    # Everything survives a restart
+    store = StateStore(path)
+    assert store.get("index_last_block") == 123
+    assert store.gas_spent_since(150) == [(200, 10**18), (300, 5)]
+
+    budget = GasBudget(per_hour=10**18 + 10)
+    budget.restore(store.gas_spent_since(150))
+    assert budget.available(block_number=1, now=1000) == 5
+    assert budget.available(block_number=1, now=3900) == 10**18 + 10
+
+
+def test_gas_cache_resume(path):
+    cache = GasEstimateCache(store=StateStore(path))
+    harvest = cache.key("harvest", 10**30, False, 1025)
+    tend = cache.key("tend", 10**30, False, 1025)
+    cache.put(STRATEGY, harvest, 100_000)
+    cache.put(STRATEGY, tend, None)  # Failed estimate
+
+    cache = GasEstimateCache(store=StateStore(path))
+    assert cache.get(STRATEGY, harvest) == 100_000
+    assert cache.get(STRATEGY, tend) is None
+    assert cache.misses == 0
+
+    cache.invalidate(STRATEGY)
+    cache = GasEstimateCache(store=StateStore(path))
+    assert len(cache._entries) == 0
+
+    # Expired entries aren't loaded back
+    GasEstimateCache(ttl=-1, store=StateStore(path)).put(STRATEGY, harvest, 1)
+    assert len(GasEstimateCache(store=StateStore(path))._entries) == 0
+
+
+def test_index_resume(path, keeper, strategy):
+    store = StateStore(path)
+    index = StrategyIndex(keeper.address)
+    entry = index.add(strategy.address)
+    store.save_index(index, [entry])
+
+    resumed = StrategyIndex(keeper.address)
+    (restored,) = resumed.restore(store.load_entries())
+    assert restored.address == strategy.address
+    assert restored.vault.address == entry.vault.address
+    assert (restored.symbol, restored.decimals) == (entry.symbol, entry.decimals)
+    assert not restored.retiring
+
+    entry.retiring = True
+    store.save_index(index)
+    assert resumed.restore(store.load_entries())[0].retiring
+
+    store.save_index(index, removed=[entry])
+    assert store.load_entries() == []
+
+
+def test_pipeline_resume(path, chain, token, keeper, rando):
+    store = StateStore(path)
+    web3.provider.make_request("miner_stop", [])
+    try:
+        pipeline = TransactionPipeline(keeper, "1 gwei", store=store)
+        pending = pipeline.submit(
+            token.approve, rando, 1, target=rando.address, label="a"
+        )
+
+        # A restarted keeper knows the call is in flight, and doesn't reuse its nonce
+        resumed = TransactionPipeline(keeper, "1 gwei", store=StateStore(path))
+        assert resumed.is_pending(rando.address)
+        assert resumed.in_flight[pending.nonce].tx.txid == pending.tx.txid
+        assert resumed.nonces.allocate() == pending.nonce + 1
+        resumed.nonces.release(pending.nonce + 1)
+    finally:
+        web3.provider.make_request("miner_start", [])
+
+    chain.mine()
+    (finished,) = resumed.drain(timeout=30)
+    assert finished.status == Status.Confirmed
+    assert store.load_pending(keeper.address) == []
+
+
+def test_unbroadcast_nonce_is_dropped(path, keeper):
+    store = StateStore(path)
+    nonce = keeper.nonce
+    # NOTE: Saved right before the keeper went down, never broadcast
+    pipeline = TransactionPipeline(keeper, "1 gwei", store=store)
+    pipeline._save(PendingTransaction(nonce, STRATEGY, "harvest", 1, 0))
+    assert len(store.load_pending(keeper.address)) == 1
+
+    resumed = TransactionPipeline(keeper, "1 gwei", store=store)
+    assert len(resumed) == 0
+    assert store.load_pending(keeper.address) == []
+    assert resumed.nonces.allocate() == nonce
@@ -0,0 +1,82 @@
+import pytest
+from brownie import web3
+from brownie.network.transaction import Status
+
+from scripts.keeper.transactions import NonceManager, TransactionPipeline
+
+
+@pytest.fixture
+def paused_miner(chain):
+    # NOTE: Keeps transactions pending until `chain.mine()` is called
+    web3.provider.make_request("miner_stop", [])
+    yield
+    web3.provider.make_request("miner_start", [])
+
+
+@pytest.fixture
+def pipeline(keeper):
+    yield TransactionPipeline(keeper, "1 gwei", replace_after=3600)
+
+
+def test_nonce_manager(keeper):
+    nonces = NonceManager(keeper)
+    start = keeper.nonce
+    assert [nonces.allocate() for _ in range(3)] == [start, start + 1, start + 2]
+
+    # A gap in the middle is filled first
+    nonces.release(start + 1)
+    assert nonces.allocate() == start + 1
+    assert nonces.allocate() == start + 3
+
+    # A trailing nonce just moves the counter back
+    nonces.release(start + 3)
+    assert nonces.allocate() == start + 3
+
+
+def test_many_in_flight(chain, token, keeper, rando, pipeline, paused_miner):
+    pending = [
+        pipeline.submit(token.approve, rando, amount, target=rando.address, label="a")
+        for amount in range(1, 4)
+    ]
+    start = pending[0].nonce
+    assert [p.nonce for p in pending] == [start, start + 1, start + 2]
+    assert len(pipeline) == 3
+    assert pipeline.poll() == []  # Nothing is mined yet
+
+    chain.mine()
+    finished = pipeline.drain(timeout=30)
+    assert sorted(p.nonce for p in finished) == [start, start + 1, start + 2]
+    assert all(p.status == Status.Confirmed for p in finished)
+    assert len(pipeline) == 0
+    assert token.allowance(keeper, rando) == 3
+
+
+def test_speed_up(chain, token, keeper, rando, paused_miner):
+    pipeline = TransactionPipeline(keeper, "1 gwei", replace_after=0)
+    pending = pipeline.submit(token.approve, rando, 1, target=rando.address, label="a")
+    assert pipeline.is_pending(rando.address)
+
+    assert pipeline.poll() == []
+    assert pending.replacements == 1
+    assert pending.gas_price > "1 gwei"
+    assert pending.tx.nonce == pending.nonce
+
+    chain.mine()
+    pipeline.replace_after = 3600
+    (finished,) = pipeline.drain(timeout=30)
+    assert finished.status == Status.Confirmed
+    assert finished.receipt.txid == pending.tx.txid
+    assert not pipeline.is_pending(rando.address)
+    assert token.allowance(keeper, rando) == 1
+
+
+def test_cancel(chain, token, keeper, rando, pipeline, paused_miner):
+    pending = pipeline.submit(token.approve, rando, 1, target=rando.address, label="a")
+    pipeline.cancel(pending)
+    assert pending.cancelled
+
+    chain.mine()
+    (finished,) = pipeline.drain(timeout=30)
+    assert finished.status == Status.Confirmed
+    assert finished.receipt.receiver == keeper.address
+    assert token.allowance(keeper, rando) == 0
@@ -0,0 +1,69 @@
+import brownie
+import pytest
+
+from scripts.keeper.simulation import revert_reason
+
+HARVEST, TEND = 0, 1
+
+
+@pytest.fixture
+def router(gov, KeeperRouter):
+    yield gov.deploy(KeeperRouter)
+
+
+def test_set_goverance(gov, rando, router):
+    with brownie.reverts():
+        router.setPendingGovernance(rando, {"from": rando})
+    router.setPendingGovernance(rando, {"from": gov})
+    with brownie.reverts():
+        router.acceptGovernance({"from": gov})
+    router.acceptGovernance({"from": rando})
+    with brownie.reverts():
+        router.setPendingGovernance(rando, {"from": gov})
+    assert router.governance() == rando.address
+
+
+def test_set_and_revoke_authorized(gov, keeper, router):
+    with brownie.reverts("!authorized"):
+        router.work([], {"from": keeper})
+    with brownie.reverts():
+        router.setAuthorized(keeper, True, {"from": keeper})
+    router.setAuthorized(keeper, True, {"from": gov})
+    router.work([], {"from": keeper})
+
+    router.setAuthorized(keeper, False, {"from": gov})
+    with brownie.reverts("!authorized"):
+        router.work([], {"from": keeper})
+
+
+def test_work(gov, strategist, keeper, vault, strategy, router, TestStrategy):
+    router.setAuthorized(keeper, True, {"from": gov})
+    strategy.setKeeper(router, {"from": strategist})
+    # NOTE: Its keeper is still `strategist`, so the router can't call it
+    other = strategist.deploy(TestStrategy, vault)
+
+    tx = router.work(
+        [(strategy, HARVEST), (other, HARVEST), (strategy, TEND)], {"from": keeper}
+    )
+    events = tx.events["StrategyCalled"]
+    assert [event["strategy"] for event in events] == [strategy, other, strategy]
+    assert [event["success"] for event in events] == [True, False, True]
+    assert all(event["gasUsed"] > 0 for event in events)
+    # The one that failed didn't stop the others
+    assert vault.strategies(strategy).dict()["totalDebt"] > 0
+    assert "Harvested" in tx.events
+
+    results = router.work.call([(strategy, HARVEST), (other, TEND)], {"from": keeper})
+    assert [result[0] for result in results] == [True, False]
+
+
+def test_work_without_code(gov, rando, keeper, strategist, strategy, router):
+    router.setAuthorized(keeper, True, {"from": gov})
+    strategy.setKeeper(router, {"from": strategist})
+
+    # NOTE: Not a contract, fails on its own instead of failing the batch
+    tx = router.work([(rando, HARVEST), (strategy, HARVEST)], {"from": keeper})
+    events = tx.events["StrategyCalled"]
+    assert [event["success"] for event in events] == [False, True]
+    assert revert_reason(events[0]["reason"]) == "!contract"
+    assert "Harvested" in tx.events
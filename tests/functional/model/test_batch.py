@@ -0,0 +1,106 @@
+import copy
+import random
+
+import numpy as np
+
+from scripts.model.batch import VaultBatch, uints
+from scripts.model.vault import MAX_UINT256, Revert, VaultModel
+
+STRATEGY = "0xStrategy"
+
+
+def random_model(rng):
+    model = VaultModel(
+        deposit_limit=MAX_UINT256,
+        timestamp=rng.randrange(1, 10**9),
+        decimals=rng.choice([2, 6, 8, 18]),
+        management_fee=rng.randrange(0, 500),
+        performance_fee=rng.randrange(0, 2_000),
+    )
+    model.deposit(rng.randrange(1, 10**24), "0xAlice")
+    model.add_strategy(
+        STRATEGY, rng.randrange(0, 10_001), 0, MAX_UINT256, rng.randrange(0, 5_001)
+    )
+    model.timestamp += rng.randrange(0, 2)
+    model.report(STRATEGY, 0, 0, 0)
+    model.timestamp += rng.randrange(1, 10**6)
+    return model
+
+
+def assert_same(batch, models):
+    expected = VaultBatch.from_models(models)
+    for name, values in vars(expected).items():
+        assert getattr(batch, name).tolist() == values.tolist(), name
+
+
+def test_report():
+    rng = random.Random(42)
+    models = [random_model(rng) for _ in range(200)]
+    batch = VaultBatch.from_models(models)
+
+    gains, losses, debts, reverted = [], [], [], []
+    for i, model in enumerate(models):
+        total_debt = model.strategies[STRATEGY].total_debt
+        gains.append(rng.randrange(0, 10**22))
+        # NOTE: Some of them lose more than their debt, and revert
+        losses.append(rng.choice([0, rng.randrange(0, total_debt + 2)]))
+        try:
+            debts.append(model.report(STRATEGY, gains[i], losses[i], 0))
+        except Revert:
+            debts.append(0)
+            reverted.append(i)
+
+    debt, ok = batch.report(gains, losses, 0)
+    assert debt.tolist() == debts
+    assert np.flatnonzero(~ok).tolist() == reverted
+    assert_same(batch, models)
+
+
+def test_deposit_withdraw_and_pps():
+    rng = random.Random(7)
+    models = [random_model(rng) for _ in range(200)]
+    for model in models:
+        model.report(STRATEGY, rng.randrange(0, 10**21), 0, 0)
+        model.timestamp += rng.randrange(0, 10**5)
+    batch = VaultBatch.from_models(models)
+
+    assert batch.price_per_share().tolist() == [m.price_per_share() for m in models]
+    assert batch.calculate_locked_profit().tolist() == [
+        m.calculate_locked_profit() for m in models
+    ]
+
+    amounts = [rng.randrange(0, 10**21) for _ in models]
+    shares, ok = batch.deposit(amounts)
+    expected = []
+    for model, amount in zip(models, amounts):
+        try:
+            expected.append(model.deposit(amount, "0xAlice"))
+        except Revert:
+            expected.append(0)
+    assert shares.tolist() == expected
+    assert (ok == (shares > 0)).all()
+
+    redeemed = [rng.randrange(1, m.balance_of("0xAlice") + 1) for m in models]
+    values, ok = batch.withdraw(redeemed)
+    assert ok.all()
+    assert values.tolist() == [
+        model.withdraw("0xAlice", shares) for model, shares in zip(models, redeemed)
+    ]
+    assert_same(batch, models)
+
+
+def test_many_vaults():
+    model = random_model(random.Random(1))
+    batch = VaultBatch.from_models([model] * 10_000)
+    batch.sleep(uints(range(10_000)))
+    locked_profit = batch.calculate_locked_profit()
+
+    _, ok = batch.report(10**18, 0, 0)
+    assert ok.all()
+    # Fees are shares, so the price only moves once the profit unlocks
+    assert (batch.locked_profit >= locked_profit).all()
+
+    later = copy.deepcopy(model)
+    later.timestamp += 9_999
+    later.report(STRATEGY, 10**18, 0, 0)
+    assert batch.locked_profit[-1] == later.locked_profit
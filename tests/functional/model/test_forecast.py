@@ -0,0 +1,106 @@
+import copy
+
+import pytest
+
+from scripts.model.forecast import (
+    VaultState,
+    fetch_states,
+    fetch_states_from_lens,
+    forecast,
+    locked_profit_curve,
+)
+from scripts.model.vault import DEGRADATION_COEFFICIENT, MAX_UINT256, Revert, VaultModel
+
+DAY = 24 * 3600
+
+
+@pytest.fixture
+def multicall(gov, Multicall):
+    yield gov.deploy(Multicall)
+
+
+def model_state(model):
+    return VaultState(
+        model.address,
+        0,
+        model.timestamp,
+        model.total_idle,
+        model.total_debt,
+        model.total_supply,
+        model.locked_profit,
+        model.last_report,
+        model.locked_profit_degradation,
+        model.decimals,
+    )
+
+
+def test_forecast():
+    models = []
+    for decimals, gain in [(18, 10**18), (6, 12_345_678), (2, 0)]:
+        model = VaultModel(
+            deposit_limit=MAX_UINT256, decimals=decimals, timestamp=1_600_000_000
+        )
+        model.deposit(1_000 * 10**decimals, "0xAlice")
+        model.add_strategy("0xStrategy", 10_000, 0, MAX_UINT256, 1_000)
+        model.timestamp += 1
+        model.report("0xStrategy", 0, 0, 0)
+        model.timestamp += DAY
+        model.report("0xStrategy", gain, 0, 0)
+        models.append(model)
+    states = [model_state(model) for model in models]
+
+    timestamps = [states[0].timestamp + i * 3_600 for i in range(8)]
+    pps = forecast(states, timestamps)
+    locked_profit = locked_profit_curve(states, timestamps)
+    assert pps.shape == locked_profit.shape == (3, 8)
+    for model, row, locked in zip(models, pps, locked_profit):
+        for timestamp, price, profit in zip(timestamps, row, locked):
+            later = copy.deepcopy(model)
+            later.timestamp = timestamp
+            assert price == later.price_per_share()
+            assert profit == later.calculate_locked_profit()
+
+    # Goes up while the profit unlocks, and stays put after that
+    assert list(pps[0]) == sorted(pps[0]) and pps[0][0] < pps[0][-1]
+    unlocked_at = states[0].unlocked_at
+    assert unlocked_at - states[0].last_report == -(
+        -DEGRADATION_COEFFICIENT // states[0].locked_profit_degradation
+    )
+    assert locked_profit_curve(states[:1], [unlocked_at - 1, unlocked_at]).tolist() == [
+        [locked_profit_curve(states[:1], [unlocked_at - 1])[0][0], 0]
+    ]
+    assert (pps[2] == 10**2).all()  # Never made a profit
+
+    # A row of timestamps per Vault
+    assert forecast(states, [[t] for t in timestamps[:3]]).tolist() == [
+        [pps[0][0]],
+        [pps[1][1]],
+        [pps[2][2]],
+    ]
+
+    with pytest.raises(Revert):
+        forecast(states, [states[0].last_report - 1])
+
+
+def test_forecast_matches_vault(chain, gov, keeper, token, vault, strategy, multicall):
+    strategy.harvest({"from": keeper})
+    token.transfer(strategy, token.balanceOf(gov) // 10, {"from": gov})
+    chain.sleep(DAY)
+    strategy.harvest({"from": keeper})
+    chain.mine()
+
+    (state,) = fetch_states(multicall, [vault])
+    assert state.locked_profit == vault.lockedProfit() > 0
+    assert state.total_supply == vault.totalSupply()
+    timestamps = [state.timestamp + i * 1_800 for i in range(1, 6)]
+    (pps,) = forecast([state], timestamps + [state.unlocked_at])
+
+    for timestamp, price in zip(timestamps + [state.unlocked_at], pps):
+        chain.mine(timestamp=timestamp)
+        assert vault.pricePerShare(block_identifier=chain.height) == price
+
+
+def test_fetch_states_from_lens(gov, keeper, vault, strategy, multicall, VaultLens):
+    strategy.harvest({"from": keeper})
+    lens = gov.deploy(VaultLens)
+    assert fetch_states_from_lens(lens, [vault]) == fetch_states(multicall, [vault])
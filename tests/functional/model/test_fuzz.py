@@ -0,0 +1,53 @@
+from scripts.model.fuzz import Harness, fuzz, replay
+from scripts.model.vault import MAX_UINT256, VaultModel
+
+FUNDS = 1_000 * 10**18  # Per user
+SCALE = 1_000 * 10**18  # Size of the amounts fuzzed
+
+
+def test_model():
+    def new_harness():
+        model = VaultModel(deposit_limit=MAX_UINT256, timestamp=1_600_000_000)
+        return Harness(model, ["0xA", "0xB", "0xC"], ["0xS1", "0xS2", "0xS3"], FUNDS)
+
+    # NOTE: Every step checks the invariants of the model
+    sampled = fuzz(new_harness, seed=0, runs=200, steps=50, scale=SCALE)
+    assert 1 <= len(sampled) < 200
+
+
+def test_differential(
+    chain, gov, rewards, accounts, create_token, create_vault, TestStrategy
+):
+    token = create_token()
+    vault = create_vault(token=token)
+    users = accounts[6:9]
+    for user in users:
+        token.transfer(user, FUNDS, {"from": gov})
+        token.approve(vault, MAX_UINT256, {"from": user})
+    strategies = [gov.deploy(TestStrategy, vault) for _ in range(3)]
+
+    def new_harness():
+        model = VaultModel(
+            address=vault.address,
+            rewards=rewards.address,
+            decimals=vault.decimals(),
+            timestamp=vault.activation(),
+            deposit_limit=vault.depositLimit(),
+        )
+        return Harness(
+            model,
+            [user.address for user in users],
+            [strategy.address for strategy in strategies],
+            FUNDS,
+        )
+
+    sampled = fuzz(
+        new_harness, seed=1, runs=100, steps=25, scale=SCALE, sample_rate=0.02
+    )
+    for sequence in sampled:
+        chain.snapshot()
+        assert (
+            replay(sequence, new_harness(), chain, vault, token, users, strategies, gov)
+            is None
+        )
+        chain.revert()
@@ -0,0 +1,156 @@
+from scripts.indexer.logs import EventIndexer
+from scripts.indexer.store import ColumnStore
+from scripts.model.fuzz import Harness, fuzz, replay
+from scripts.model.history import VaultHistory, price_history
+from scripts.model.vault import MAX_UINT256, ZERO_ADDRESS, VaultModel
+
+FUNDS = 1_000 * 10**18  # Per user
+SCALE = 1_000 * 10**18  # Size of the amounts fuzzed
+START = 1_600_000_000
+
+
+def log(event, block_number, log_index, vault="0xVault", timestamp=None, **args):
+    row = {
+        "block_number": block_number,
+        "timestamp": START + 10_000 * block_number if timestamp is None else timestamp,
+        "log_index": log_index,
+        "transaction_hash": f"0x{block_number:064x}",  # A transaction per block
+        "address": vault,
+    }
+    row.update({name: str(value) for name, value in args.items()})
+    return event, row
+
+
+def reported(block_number, log_index, gain=0, loss=0, debt_paid=0, debt=0, added=0):
+    return log(
+        "StrategyReported",
+        block_number,
+        log_index,
+        strategy="0xStrategy",
+        gain=gain,
+        loss=loss,
+        debtPaid=debt_paid,
+        totalGain=gain,
+        totalLoss=loss,
+        totalDebt=debt,
+        debtAdded=added,
+        debtRatio=6_000,
+    )
+
+
+def test_replay():
+    logs = [
+        log("Transfer", 1, 0, sender=ZERO_ADDRESS, receiver="0xUser", value=1_000),
+        log("Deposit", 1, 1, recipient="0xUser", shares=1_000, amount=1_000),
+        # Lends 600 to the strategy
+        reported(2, 0, debt=600, added=600),
+        log(
+            "Transfer",
+            2,
+            1,
+            vault="0xOther",
+            sender=ZERO_ADDRESS,
+            receiver="0xUser",
+            value=5,
+        ),
+        log("Deposit", 2, 2, vault="0xOther", recipient="0xUser", shares=5, amount=5),
+        # Earns 100, of which 21 go to fees
+        log(
+            "FeeReport",
+            3,
+            0,
+            management_fee=1,
+            performance_fee=10,
+            strategist_fee=10,
+            duration=10_000,
+        ),
+        log("Transfer", 3, 1, sender=ZERO_ADDRESS, receiver="0xVault", value=21),
+        log("Transfer", 3, 2, sender="0xVault", receiver="0xStrategy", value=10),
+        log("Transfer", 3, 3, sender="0xVault", receiver="0xRewards", value=11),
+        reported(3, 4, gain=100, debt=600),
+        # Takes 90 out of the strategy, losing 10 more, to pay a withdrawal
+        log(
+            "WithdrawFromStrategy", 4, 0, strategy="0xStrategy", totalDebt=500, loss=10
+        ),
+        log("Transfer", 4, 1, sender="0xUser", receiver=ZERO_ADDRESS, value=500),
+        log("Withdraw", 4, 2, recipient="0xUser", shares=500, amount=480),
+    ]
+    history = VaultHistory({"0xOther": 6})
+    states = [
+        (
+            state.address,
+            state.block_number,
+            state.total_idle,
+            state.total_debt,
+            state.total_supply,
+            state.locked_profit,
+            price_per_share,
+        )
+        for state, price_per_share in history.replay(logs)
+    ]
+    # NOTE: 43 of the 79 locked are still locked 10,000 seconds later
+    assert states == [
+        ("0xVault", 1, 1_000, 0, 1_000, 0, 10**18),
+        ("0xVault", 2, 400, 600, 1_000, 0, 10**18),
+        ("0xOther", 2, 5, 0, 5, 0, 10**6),
+        ("0xVault", 3, 500, 600, 1_021, 79, 10**18),
+        ("0xVault", 4, 110, 500, 521, 79, 10**18 * (110 + 500 - 43) // 521),
+    ]
+    assert history.models["0xVault"].last_report == START + 30_000
+    assert history.debts["0xVault"] == {"0xStrategy": 500}
+
+    # No `FeeReport` means no fees (7 of the 79 are still locked)
+    (state, _), *_ = history.replay([reported(5, 0, gain=10, debt=500)])
+    assert state.locked_profit == 7 + 10
+
+
+def test_history_matches_vault(
+    tmp_path, chain, gov, rewards, accounts, create_token, create_vault, TestStrategy
+):
+    token = create_token()
+    vault = create_vault(token=token)
+    users = accounts[6:9]
+    for user in users:
+        token.transfer(user, FUNDS, {"from": gov})
+        token.approve(vault, MAX_UINT256, {"from": user})
+    strategies = [gov.deploy(TestStrategy, vault) for _ in range(3)]
+
+    def new_harness():
+        model = VaultModel(
+            address=vault.address,
+            rewards=rewards.address,
+            decimals=vault.decimals(),
+            timestamp=vault.activation(),
+            deposit_limit=vault.depositLimit(),
+        )
+        return Harness(
+            model,
+            [user.address for user in users],
+            [strategy.address for strategy in strategies],
+            FUNDS,
+        )
+
+    # NOTE: Deposits, withdrawals, gains and losses at random
+    sequence = max(
+        fuzz(new_harness, seed=2, runs=10, steps=50, scale=SCALE, sample_rate=1),
+        key=len,
+    )
+    assert (
+        replay(sequence, new_harness(), chain, vault, token, users, strategies, gov)
+        is None
+    )
+
+    store = ColumnStore(str(tmp_path / "index"))
+    EventIndexer(store, vaults=[vault.address]).run()
+    history = price_history(store, {vault.address: vault.decimals()}).to_pylist()
+    assert len(history) > 10
+    for row in history:
+        block_number = row["block_number"]
+        for column, getter in [
+            ("total_idle", vault.totalIdle),
+            ("total_debt", vault.totalDebt),
+            ("total_supply", vault.totalSupply),
+            ("locked_profit", vault.lockedProfit),
+            ("price_per_share", vault.pricePerShare),
+        ]:
+            assert int(row[column]) == getter(block_identifier=block_number), column
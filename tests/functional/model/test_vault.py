@@ -0,0 +1,143 @@
+import pytest
+
+from scripts.model.vault import (
+    DEGRADATION_COEFFICIENT,
+    MAX_UINT256,
+    Revert,
+    VaultModel,
+    withdraw_in_full,
+)
+
+STRATEGY = "0xStrategy"
+
+
+@pytest.fixture
+def model():
+    model = VaultModel(deposit_limit=MAX_UINT256, timestamp=1_000)
+    model.deposit(10**18, "0xAlice")
+    model.add_strategy(STRATEGY, 5_000, 0, MAX_UINT256, 1_000)
+    model.timestamp += 1
+    model.report(STRATEGY, 0, 0, 0)  # Takes its credit
+    yield model
+
+
+def test_deposit():
+    model = VaultModel(deposit_limit=10**18)
+    assert model.deposit(10**17, "0xAlice") == 10**17  # 1:1 while empty
+    assert model.price_per_share() == 10**18
+    assert model.deposit(MAX_UINT256, "0xBob", balance=10**18) == 9 * 10**17
+    assert model.available_deposit_limit() == 0
+
+    with pytest.raises(Revert):
+        model.deposit(1, "0xAlice")  # Over the deposit limit
+    with pytest.raises(Revert):
+        model.deposit(0, "0xAlice")
+    with pytest.raises(Revert):
+        model.deposit(1, model.address)
+
+
+def test_report(model):
+    assert model.strategies[STRATEGY].total_debt == 5 * 10**17
+    assert model.total_idle == 5 * 10**17
+
+    model.timestamp += 1_000
+    assert model.report(STRATEGY, 10**16, 0, 0) == 0
+    # 10% performance fee, 10% strategist fee and 2% a year on the debt
+    fees = 2 * 10**15 + 316_887_385_068
+    assert model.balance_of(STRATEGY) == 10**15
+    assert model.balance_of(model.rewards) == fees - 10**15
+    assert model.total_supply == 10**18 + fees
+    assert model.locked_profit == 10**16 - fees
+    assert model.strategies[STRATEGY].total_gain == 10**16
+    # The gain went to the Vault, it's only lent out on the next report
+    assert model.strategies[STRATEGY].total_debt == 5 * 10**17
+    assert model.total_idle == 5 * 10**17 + 10**16
+
+    # What's left of the profit is locked, the price only moves as it unlocks
+    assert model.price_per_share() == 10**18
+    model.timestamp += DEGRADATION_COEFFICIENT // model.locked_profit_degradation + 1
+    assert model.calculate_locked_profit() == 0
+    assert model.price_per_share() > 10**18
+
+    with pytest.raises(Revert, match="same block"):
+        model.timestamp = model.last_report
+        model.report(STRATEGY, 1, 0, 0)
+
+
+def test_report_loss(model):
+    model.timestamp += 1
+    model.report(STRATEGY, 0, 10**17, 0)
+    # Loses trust, on top of the debt
+    assert model.strategies[STRATEGY].debt_ratio == 5_000 - 1_000
+    assert model.debt_ratio == 4_000
+    assert model.strategies[STRATEGY].total_loss == 10**17
+    assert model.total_assets() == 9 * 10**17
+    assert model.price_per_share() == 9 * 10**17
+
+
+def test_withdraw(model):
+    losses = []
+
+    def liquidate(strategy, amount_needed):
+        losses.append(amount_needed // 10)
+        return amount_needed - losses[-1], losses[-1]
+
+    # Too much of a loss
+    with pytest.raises(Revert, match="loss protection"):
+        model.withdraw("0xAlice", liquidate=liquidate)
+    # Nothing changed
+    assert model.balance_of("0xAlice") == 10**18
+    assert model.strategies[STRATEGY].total_debt == 5 * 10**17
+
+    assert model.withdraw("0xAlice", max_loss=10_000, liquidate=liquidate) == (
+        10**18 - losses[-1]
+    )
+    assert model.total_supply == model.total_assets() == 0
+
+    with pytest.raises(Revert):
+        model.withdraw("0xAlice")
+
+
+def test_withdraw_from_strategy(model):
+    assert model.withdraw("0xAlice", 6 * 10**17, liquidate=withdraw_in_full) == (
+        6 * 10**17
+    )
+    assert model.total_idle == 0
+    assert model.strategies[STRATEGY].total_debt == model.total_debt == 4 * 10**17
+    assert model.max_available_shares() == 4 * 10**17
+
+
+def test_add_strategy(model):
+    with pytest.raises(Revert):
+        model.add_strategy(STRATEGY, 0, 0, 0, 0)  # Already there
+    with pytest.raises(Revert):
+        model.add_strategy("0xOther", 5_001, 0, 0, 0)  # Over 100%
+    model.add_strategy("0xOther", 5_000, 0, 0, 0)
+    assert model.withdrawal_queue == [STRATEGY, "0xOther"]
+
+    with pytest.raises(Revert):
+        model.update_strategy_debt_ratio(STRATEGY, 5_001)
+    model.update_strategy_debt_ratio(STRATEGY, 0)
+    assert model.debt_ratio == 5_000
+    # Wants its debt back
+    assert model.debt_outstanding(STRATEGY) == 5 * 10**17
+
+
+def test_withdrawal_queue(model):
+    with pytest.raises(Revert):
+        model.add_strategy_to_queue(STRATEGY)  # Already there
+    with pytest.raises(Revert):
+        model.add_strategy_to_queue("0xOther")  # Not a strategy
+    model.remove_strategy_from_queue(STRATEGY)
+    assert model.withdrawal_queue == []
+    with pytest.raises(Revert):
+        model.remove_strategy_from_queue(STRATEGY)
+
+    # NOTE: Only what's idle is paid, for the shares it's worth
+    assert model.withdraw("0xAlice", 6 * 10**17) == 5 * 10**17
+    assert model.balance_of("0xAlice") == model.total_supply == 5 * 10**17
+    assert model.total_idle == 0
+
+    model.add_strategy_to_queue(STRATEGY)
+    assert model.withdrawal_queue == [STRATEGY]
+    assert model.withdraw("0xAlice") == 5 * 10**17
@@ -0,0 +1,109 @@
+import brownie
+
+MAX_UINT256 = 2**256 - 1
+
+
+def test_deposit_many(gov, accounts, token, vault):
+    recipients = accounts[1:6]
+    amounts = [(i + 1) * 10 ** token.decimals() for i in range(len(recipients))]
+    token.approve(vault, MAX_UINT256, {"from": gov})
+    expected = [vault.previewDeposit(amount) for amount in amounts]
+    total_supply = vault.totalSupply()
+    balance = token.balanceOf(gov)
+
+    tx = vault.depositMany(amounts, recipients, {"from": gov})
+    assert tx.return_value == sum(expected)
+    assert [vault.balanceOf(r) for r in recipients] == expected
+    assert [e["recipient"] for e in tx.events["Deposit"]] == recipients
+    assert [e["amount"] for e in tx.events["Deposit"]] == amounts
+    assert [e["shares"] for e in tx.events["Deposit"]] == expected
+
+    # NOTE: One transfer, and the totals written once, for all of them
+    assert len(tx.events["Transfer"]) == len(recipients) + 1
+    assert token.balanceOf(gov) == balance - sum(amounts)
+    assert vault.totalSupply() == total_supply + sum(expected)
+    assert vault.totalIdle() == token.balanceOf(vault)
+
+
+def test_deposit_many_checks(gov, rando, token, vault):
+    token.approve(vault, MAX_UINT256, {"from": gov})
+    with brownie.reverts():  # Lengths don't match
+        vault.depositMany([1, 2], [rando], {"from": gov})
+    with brownie.reverts():
+        vault.depositMany([1, 2], [rando, vault], {"from": gov})
+    with brownie.reverts():
+        vault.depositMany([0], [rando], {"from": gov})
+
+    # NOTE: The deposit limit applies to the total
+    vault.setDepositLimit(vault.totalAssets() + 1000, {"from": gov})
+    with brownie.reverts():
+        vault.depositMany([500, 501], [rando, gov], {"from": gov})
+    vault.depositMany([500, 500], [rando, gov], {"from": gov})
+
+    vault.setDepositLimit(MAX_UINT256, {"from": gov})
+    vault.setEmergencyShutdown(True, {"from": gov})
+    with brownie.reverts():
+        vault.depositMany([500], [rando], {"from": gov})
+
+
+def test_withdraw_many(chain, gov, accounts, token, vault, strategy):
+    strategy.harvest({"from": gov})
+    # NOTE: Needs more than what's idle, and takes a loss freeing it up
+    strategy._takeFunds(token.balanceOf(strategy) // 10, {"from": gov})
+    vault.withdraw(vault.previewDeposit(vault.totalIdle()) - 1000, {"from": gov})
+    recipients = accounts[1:6]
+    shares = [vault.balanceOf(gov) // 10] * len(recipients)
+    balances = [token.balanceOf(r) for r in recipients]
+
+    with brownie.reverts():
+        vault.withdrawMany(shares, recipients, {"from": gov})  # Over `maxLoss`
+
+    tx = vault.withdrawMany(shares, recipients, 10_000, {"from": gov})
+    withdrawn = [token.balanceOf(r) - b for r, b in zip(recipients, balances)]
+    assert tx.return_value == sum(withdrawn)
+    assert [e["amount"] for e in tx.events["Withdraw"]] == withdrawn
+    assert [e["shares"] for e in tx.events["Withdraw"]] == shares
+    assert vault.strategies(strategy)["totalLoss"] > 0
+
+    # NOTE: The loss is shared, the last one also gets what rounding leaves
+    assert max(withdrawn) - min(withdrawn) < len(recipients)
+    assert withdrawn[-1] == max(withdrawn)
+    assert vault.totalIdle() == token.balanceOf(vault)
+
+
+def test_withdraw_many_checks(gov, rando, token, vault, strategy):
+    strategy.harvest({"from": gov})
+    with brownie.reverts():  # Lengths don't match
+        vault.withdrawMany([1, 2], [rando], {"from": gov})
+    with brownie.reverts():
+        vault.withdrawMany([0], [rando], {"from": gov})
+    with brownie.reverts():
+        vault.withdrawMany([vault.balanceOf(gov)], [rando], {"from": rando})
+
+    # NOTE: Fails rather than pay only part of what's owed
+    vault.removeStrategyFromQueue(strategy, {"from": gov})
+    shares = vault.balanceOf(gov) // 2
+    with brownie.reverts():
+        vault.withdrawMany([shares, shares], [rando, gov], 10_000, {"from": gov})
+    shares = vault.previewDeposit(vault.totalIdle()) // 2
+    vault.withdrawMany([shares, shares], [rando, gov], 10_000, {"from": gov})
+
+
+def test_batch_gas(gov, accounts, token, vault):
+    recipients = accounts[1:9]
+    amount = 10 ** token.decimals()
+    token.approve(vault, MAX_UINT256, {"from": gov})
+
+    # NOTE: Each one past the first saves at least a transaction's base cost
+    saved = 21_000 * (len(recipients) - 1)
+    single = vault.deposit(amount, accounts[9], {"from": gov}).gas_used
+    batch = vault.depositMany(
+        [amount] * len(recipients), recipients, {"from": gov}
+    ).gas_used
+    assert batch + saved < single * len(recipients)
+
+    single = vault.withdraw(amount, accounts[9], {"from": gov}).gas_used
+    batch = vault.withdrawMany(
+        [amount] * len(recipients), recipients, {"from": gov}
+    ).gas_used
+    assert batch + saved < single * len(recipients)
@@ -0,0 +1,79 @@
+import brownie
+from brownie import ZERO_ADDRESS
+
+MAX_UINT256 = 2**256 - 1
+
+
+def lock_profit(chain, gov, token, vault, strategy):
+    # NOTE: Leaves part of a gain locked, so the previews have to account for it
+    strategy.harvest({"from": gov})
+    token.transfer(strategy, token.balanceOf(strategy) // 10, {"from": gov})
+    chain.sleep(3600)
+    strategy.harvest({"from": gov})
+    chain.sleep(3600)
+    chain.mine()
+    assert 0 < vault.lockedProfit()
+
+
+def test_preview_deposit(chain, gov, token, vault, strategy):
+    lock_profit(chain, gov, token, vault, strategy)
+    token.approve(vault, MAX_UINT256, {"from": gov})
+    for amount in (1, 10 ** token.decimals(), token.balanceOf(gov)):
+        assert vault.previewDeposit(amount) == vault.deposit.call(amount, {"from": gov})
+
+
+def test_preview_redeem(chain, gov, token, vault, strategy):
+    lock_profit(chain, gov, token, vault, strategy)
+    for shares in (1, vault.balanceOf(gov) // 3, vault.balanceOf(gov)):
+        assert vault.previewRedeem(shares) == vault.withdraw.call(
+            shares, gov, 10_000, {"from": gov}
+        )
+
+
+def test_preview_withdraw(chain, gov, token, vault, strategy):
+    lock_profit(chain, gov, token, vault, strategy)
+    for amount in (1, 10 ** token.decimals(), vault.maxWithdraw(gov)):
+        shares = vault.previewWithdraw(amount)
+        # NOTE: The least shares to pass to `withdraw` for `amount`
+        assert vault.withdraw.call(shares, gov, 10_000, {"from": gov}) >= amount
+        if shares > 1:
+            assert vault.withdraw.call(shares - 1, gov, 10_000, {"from": gov}) < amount
+
+
+def test_preview_empty_vault(gov, create_vault):
+    vault = create_vault()
+    assert vault.previewDeposit(1234) == 1234
+    assert vault.previewRedeem(1234) == 1234
+    assert vault.previewWithdraw(1234) == 1234
+
+
+def test_max_deposit(gov, rando, token, vault):
+    token.approve(vault, MAX_UINT256, {"from": gov})
+    vault.setDepositLimit(vault.totalAssets() + 1000, {"from": gov})
+    assert vault.maxDeposit(rando) == 1000
+    assert vault.maxDeposit(vault) == vault.maxDeposit(ZERO_ADDRESS) == 0
+
+    with brownie.reverts():
+        vault.deposit(1001, rando, {"from": gov})
+    vault.deposit(1000, rando, {"from": gov})
+    assert vault.maxDeposit(rando) == 0
+
+    vault.setDepositLimit(MAX_UINT256, {"from": gov})
+    vault.setEmergencyShutdown(True, {"from": gov})
+    assert vault.maxDeposit(rando) == 0
+
+
+def test_max_withdraw(chain, gov, rando, token, vault, strategy):
+    lock_profit(chain, gov, token, vault, strategy)
+    assert vault.maxWithdraw(rando) == 0
+    assert vault.maxWithdraw(gov) == vault.previewRedeem(vault.balanceOf(gov))
+    assert vault.maxWithdraw(gov) == vault.withdraw.call(
+        MAX_UINT256, gov, 10_000, {"from": gov}
+    )
+
+    # Only what's idle and in the withdrawal queue can be freed up
+    vault.removeStrategyFromQueue(strategy, {"from": gov})
+    assert vault.maxWithdraw(gov) == vault.totalIdle()
+    assert vault.maxWithdraw(gov) == vault.withdraw.call(
+        MAX_UINT256, gov, 10_000, {"from": gov}
+    )
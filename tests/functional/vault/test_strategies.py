@@ -508,6 +508,40 @@ def test_reporting_gains_without_fee(chain, vault, token, strategy, gov, rando):
     vault.report(gain, 0, 0, {"from": strategy})
 
 
+def test_reporting_writes_back(chain, vault, token, strategy, other_strategy, gov):
+    # NOTE: `report` works off of copies, so what it logs must be what it keeps
+    def check_report(tx, reporter):
+        event = tx.events["StrategyReported"]
+        params = vault.strategies(reporter).dict()
+        for field in ("totalGain", "totalLoss", "totalDebt", "debtRatio"):
+            assert event[field] == params[field]
+        assert params["lastReport"] == vault.lastReport() == tx.timestamp
+        assert vault.totalIdle() == token.balanceOf(vault)
+        assert vault.totalDebt() == sum(
+            vault.strategies(s)["totalDebt"] for s in (strategy, other_strategy)
+        )
+
+    token.approve(vault, MAX_UINT256, {"from": gov})
+    vault.deposit(token.balanceOf(gov) // 2, {"from": gov})
+    vault.addStrategy(strategy, 5_000, 0, MAX_UINT256, 1_000, {"from": gov})
+    vault.addStrategy(other_strategy, 2_000, 0, MAX_UINT256, 0, {"from": gov})
+    chain.sleep(1)
+    check_report(strategy.harvest({"from": gov}), strategy)  # Credit
+    check_report(other_strategy.harvest({"from": gov}), other_strategy)
+
+    token.transfer(strategy, 10 ** token.decimals(), {"from": gov})
+    chain.sleep(3600)
+    check_report(strategy.harvest({"from": gov}), strategy)  # Gain, with fees
+
+    vault.updateStrategyDebtRatio(strategy, 1_000, {"from": gov})
+    chain.sleep(3600)
+    check_report(strategy.harvest({"from": gov}), strategy)  # Debt payment
+
+    strategy._takeFunds(token.balanceOf(strategy) // 2, {"from": gov})
+    chain.sleep(3600)
+    check_report(strategy.harvest({"from": gov}), strategy)  # Loss
+
+
 def test_withdrawalQueue(chain, gov, management, vault, strategy, other_strategy):
     vault.addStrategy(strategy, 100, 10, 20, 1000, {"from": gov})
     vault.addStrategy(other_strategy, 100, 10, 20, 1000, {"from": gov})
@@ -446,3 +446,87 @@ def test_withdraw_not_enough_funds_with_gains(
     priceAfter = vault.pricePerShare()
 
     assert priceBefore <= priceAfter  # with decimals=2 price remains the same.
+
+
+def test_withdrawal_writes_back(chain, gov, token, vault, TestStrategy):
+    # NOTE: `withdraw` writes each Strategy's debt back before the next call
+    vault.setManagementFee(0, {"from": gov})  # So `gov` owns every share
+    strategies = [gov.deploy(TestStrategy, vault) for _ in range(10)]
+    for s in strategies:
+        vault.addStrategy(s, 500, 0, MAX_UINT256, 1000, {"from": gov})
+    chain.sleep(1)
+    for s in strategies:
+        s.harvest({"from": gov})
+    assert token.balanceOf(vault) < vault.totalAssets()
+
+    # Every third one realizes a loss on withdrawal
+    for s in strategies[::3]:
+        s._takeFunds(token.balanceOf(s) // 4, {"from": gov})
+
+    tx = vault.withdraw(MAX_UINT256, gov, 10_000, {"from": gov})
+    events = tx.events["WithdrawFromStrategy"]
+    assert [event["strategy"] for event in events] == strategies
+    for event in events:
+        params = vault.strategies(event["strategy"]).dict()
+        assert event["totalDebt"] == params["totalDebt"] == 0
+        assert event["loss"] == params["totalLoss"]
+        assert (event["loss"] > 0) == (params["debtRatio"] < 500)
+    assert sum(event["loss"] > 0 for event in events) == 4
+
+    assert vault.totalDebt() == 0
+    assert vault.debtRatio() == sum(
+        vault.strategies(s)["debtRatio"] for s in strategies
+    )
+    assert vault.totalIdle() == token.balanceOf(vault) == 0
+
+
+def test_withdrawal_reentrant_report(chain, gov, token, Vault, TestStrategy):
+    # NOTE: A Strategy may `report` from within `withdraw`, it must not be overwritten
+    vault = gov.deploy(Vault)
+    vault.initialize(token, gov, gov, "", "", gov, {"from": gov})
+    vault.setDepositLimit(MAX_UINT256, {"from": gov})
+    vault.setManagementFee(0, {"from": gov})
+    token.approve(vault, MAX_UINT256, {"from": gov})
+    vault.deposit(1000, {"from": gov})
+
+    strategy = gov.deploy(TestStrategy, vault)
+    vault.addStrategy(strategy, 10_000, 0, MAX_UINT256, 0, {"from": gov})
+    strategy.harvest({"from": gov})
+    assert token.balanceOf(strategy) == vault.totalDebt() == 1000
+
+    strategy._takeFunds(100, {"from": gov})
+    strategy._toggleReportOnWithdraw({"from": gov})
+    chain.sleep(1)
+    tx = vault.withdraw(500, gov, {"from": gov})
+    assert tx.events["StrategyReported"]["loss"] == 100
+
+    params = vault.strategies(strategy).dict()
+    assert tx.events["WithdrawFromStrategy"]["totalDebt"] == params["totalDebt"]
+    assert params["totalDebt"] == token.balanceOf(strategy) == 400
+    assert params["totalLoss"] == 100
+    assert vault.totalDebt() == 400
+    assert vault.debtRatio() == params["debtRatio"] < 10_000
+    assert vault.totalIdle() == token.balanceOf(vault) == 0
+
+
+def test_withdrawal_shortfall(gov, rando, token, Vault, TestStrategy):
+    # NOTE: Pays only what the queue frees up, and burns only the shares for it
+    vault = gov.deploy(Vault)
+    vault.initialize(token, gov, gov, "", "", gov, {"from": gov})
+    vault.setDepositLimit(MAX_UINT256, {"from": gov})
+    vault.setManagementFee(0, {"from": gov})
+    token.approve(vault, MAX_UINT256, {"from": gov})
+    vault.deposit(100, {"from": gov})
+
+    strategies = [gov.deploy(TestStrategy, vault) for _ in range(2)]
+    for s in strategies:
+        vault.addStrategy(s, 5_000, 0, MAX_UINT256, 0, {"from": gov})
+        s.harvest({"from": gov})
+    assert vault.totalIdle() == 0
+    vault.removeStrategyFromQueue(strategies[1], {"from": gov})
+
+    tx = vault.withdraw(100, rando, 10_000, {"from": gov})
+    assert tx.return_value == token.balanceOf(rando) == 50
+    assert vault.balanceOf(gov) == vault.totalSupply() == 50
+    assert vault.totalDebt() == vault.totalAssets() == 50
+    assert vault.totalIdle() == token.balanceOf(vault) == 0
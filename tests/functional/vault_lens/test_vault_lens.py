@@ -0,0 +1,79 @@
+import pytest
+
+from brownie import ZERO_ADDRESS
+
+GETTERS = [
+    "token",
+    "decimals",
+    "totalSupply",
+    "totalAssets",
+    "totalIdle",
+    "totalDebt",
+    "debtRatio",
+    "lockedProfit",
+    "lockedProfitDegradation",
+    "lastReport",
+    "activation",
+    "depositLimit",
+    "availableDepositLimit",
+    "pricePerShare",
+    "performanceFee",
+    "managementFee",
+    "emergencyShutdown",
+]
+
+
+@pytest.fixture
+def lens(gov, VaultLens):
+    yield gov.deploy(VaultLens)
+
+
+def check_snapshot(snapshot, vault):
+    assert snapshot["vault"] == vault.address
+    for getter in GETTERS:
+        assert snapshot[getter] == getattr(vault, getter)(), getter
+
+    queue = [vault.withdrawalQueue(i) for i in range(20)]
+    queue = queue[: queue.index(ZERO_ADDRESS)] if ZERO_ADDRESS in queue else queue
+    assert [s["strategy"] for s in snapshot["strategies"]] == queue
+    for s in snapshot["strategies"]:
+        assert s["params"] == vault.strategies(s["strategy"])
+        assert s["creditAvailable"] == vault.creditAvailable(s["strategy"])
+        assert s["debtOutstanding"] == vault.debtOutstanding(s["strategy"])
+
+
+def test_api_version(lens):
+    assert lens.apiVersion() == "0.1.0"
+
+
+def test_snapshot(chain, gov, keeper, token, vault, strategy, lens, TestStrategy):
+    check_snapshot(lens.snapshot(vault), vault)
+
+    other = gov.deploy(TestStrategy, vault)
+    vault.addStrategy(other, 2_000, 0, 2**256 - 1, 1_000, {"from": gov})
+    strategy.harvest({"from": keeper})
+    token.transfer(strategy, token.balanceOf(gov) // 10, {"from": gov})
+    chain.sleep(3600)
+    strategy.harvest({"from": keeper})
+    chain.mine()
+
+    snapshot = lens.snapshot(vault)
+    assert len(snapshot["strategies"]) == 2
+    assert snapshot["lockedProfit"] > 0
+    assert snapshot["blockNumber"] == chain.height
+    assert snapshot["timestamp"] == chain[-1].timestamp
+    check_snapshot(snapshot, vault)
+
+    vault.setEmergencyShutdown(True, {"from": gov})
+    check_snapshot(lens.snapshot(vault), vault)
+
+
+def test_snapshots(gov, create_vault, vault, strategy, lens):
+    vaults = [vault, create_vault(), create_vault()]
+    snapshots = lens.snapshots(vaults)
+    assert len(snapshots) == 3
+    for snapshot, v in zip(snapshots, vaults):
+        check_snapshot(snapshot, v)
+    assert len(snapshots[1]["strategies"]) == 0
+
+    assert lens.snapshots([]) == []
@@ -0,0 +1,142 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from scripts.benchmark import benchmark
+from scripts.model.fuzz import Harness, fuzz, replay
+from scripts.model.vault import MAX_UINT256, VaultModel
+
+FUNDS = 1_000 * 10**18  # Per user
+SCALE = 1_000 * 10**18  # Size of the amounts fuzzed
+CONTRACTS = Path(__file__).parents[3] / "contracts"
+
+
+@pytest.fixture
+def create_packed_vault(gov, guardian, rewards, create_token, VaultPacked):
+    def create_packed_vault(token=None, governance=gov):
+        if token is None:
+            token = create_token()
+        vault = VaultPacked.deploy({"from": guardian})
+        vault.initialize(token, governance, rewards, "", "", guardian, governance)
+        vault.setDepositLimit(2**256 - 1, {"from": governance})
+        return vault
+
+    yield create_packed_vault
+
+
+def functions(path: Path) -> dict:
+    # NOTE: The source of every function, decorators included, by name
+    found, decorators, name = {}, [], None
+    for line in path.read_text().splitlines():
+        if line.startswith("@"):
+            decorators.append(line)
+            name = None
+        elif line.startswith("def "):
+            name = line[len("def ") : line.index("(")]
+            found[name], decorators = decorators + [line], []
+        elif name and (not line or line[0].isspace() or line.startswith(")")):
+            found[name].append(line)
+        else:
+            decorators, name = [], None
+    return {name: "\n".join(lines).rstrip() for name, lines in found.items()}
+
+
+def test_in_sync():
+    # NOTE: A copy of `Vault.vy`, only what uses the Strategy parameters differs
+    vault = functions(CONTRACTS / "Vault.vy")
+    packed = functions(CONTRACTS / "test" / "VaultPacked.vy")
+    assert packed.keys() - vault.keys() == {"_packConfig", "strategies"}
+    assert vault.keys() <= packed.keys()
+    for name, source in vault.items():
+        if "self.strategies[" not in source and "StrategyParams" not in source:
+            assert packed[name] == source, f"`{name}` differs from Vault.vy"
+
+
+def test_api(Vault, VaultPacked):
+    def abi(container):
+        return sorted(json.dumps(item, sort_keys=True) for item in container.abi)
+
+    assert abi(VaultPacked) == abi(Vault)
+
+
+def test_packing(chain, gov, create_packed_vault, TestStrategy):
+    vault = create_packed_vault()
+    strategy = gov.deploy(TestStrategy, vault)
+    # NOTE: Every field at its largest
+    tx = vault.addStrategy(strategy, 10_000, 0, MAX_UINT256, 5_000, {"from": gov})
+    params = vault.strategies(strategy).dict()
+    assert params["performanceFee"] == 5_000
+    assert params["debtRatio"] == 10_000
+    assert params["activation"] == params["lastReport"] == tx.timestamp
+
+    # NOTE: Updating one field leaves the others as they were
+    vault.updateStrategyPerformanceFee(strategy, 0, {"from": gov})
+    assert vault.strategies(strategy).dict() == {**params, "performanceFee": 0}
+    vault.updateStrategyDebtRatio(strategy, 1, {"from": gov})
+    assert vault.strategies(strategy).dict() == {
+        **params,
+        "performanceFee": 0,
+        "debtRatio": 1,
+    }
+    chain.sleep(1)
+    tx = strategy.harvest({"from": gov})
+    assert vault.strategies(strategy)["lastReport"] == tx.timestamp
+    assert vault.strategies(strategy)["activation"] == params["activation"]
+    assert vault.strategies(strategy)["debtRatio"] == 1
+    vault.revokeStrategy(strategy, {"from": gov})
+    assert vault.strategies(strategy)["debtRatio"] == 0
+    assert vault.strategies(strategy)["lastReport"] == tx.timestamp
+
+
+def test_differential(
+    chain, gov, rewards, accounts, create_token, create_packed_vault, TestStrategy
+):
+    token = create_token()
+    vault = create_packed_vault(token=token)
+    users = accounts[6:9]
+    for user in users:
+        token.transfer(user, FUNDS, {"from": gov})
+        token.approve(vault, MAX_UINT256, {"from": user})
+    strategies = [gov.deploy(TestStrategy, vault) for _ in range(3)]
+
+    def new_harness():
+        model = VaultModel(
+            address=vault.address,
+            rewards=rewards.address,
+            decimals=vault.decimals(),
+            timestamp=vault.activation(),
+            deposit_limit=vault.depositLimit(),
+        )
+        return Harness(
+            model,
+            [user.address for user in users],
+            [strategy.address for strategy in strategies],
+            FUNDS,
+        )
+
+    # NOTE: Same model as `Vault.vy`, so `strategies()` unpacks to the same values
+    sampled = fuzz(
+        new_harness, seed=2, runs=100, steps=25, scale=SCALE, sample_rate=0.02
+    )
+    for sequence in sampled:
+        chain.snapshot()
+        assert (
+            replay(sequence, new_harness(), chain, vault, token, users, strategies, gov)
+            is None
+        )
+        chain.revert()
+
+
+def test_gas(chain, gov, Vault, VaultPacked):
+    gas_used = {}
+    for container in (Vault, VaultPacked):
+        chain.snapshot()
+        txs = benchmark(container, gov)
+        gas_used[container._name] = {name: tx.gas_used for name, tx in txs.items()}
+        chain.revert()
+
+    # NOTE: `report` reads `activation`, `lastReport`, `performanceFee` and
+    #       `debtRatio`, now in a single slot
+    assert gas_used["VaultPacked"]["report"] < gas_used["Vault"]["report"]
+    assert gas_used["VaultPacked"]["withdraw"] <= gas_used["Vault"]["withdraw"]